@@ -85,13 +85,34 @@ contract ETHDKG {
     mapping (address => uint256[2]) public commitments_1st_coefficient;
     mapping (address => uint256[2]) public key_shares;
 
+    // Number of nodes which distributed their shares and are not disqualified by a dispute (i.e. nodes with a
+    // share distribution hash != 0), fixed after the dispute phase.
+    uint256 public num_qualified_nodes;
+
+    // Sum (in G1) of all accepted key shares and their number, updated with each key share submission. Once the key
+    // shares of all qualified nodes are submitted, the sum is the master public key (in G1), which is then verified
+    // against the submitted master public key (in G2) with a single pairing check.
+    uint256[2] public key_shares_aggregate;
+    uint256 public num_key_shares;
+
     function num_nodes() public view returns(uint256)
     {
         return addresses.length;
     }
 
+    // returns the addresses and public keys of all registered nodes,
+    // allows the clients to obtain the full registry using a single call
+    function get_registrations() public view returns(address[] memory, uint256[2][] memory)
+    {
+        uint256[2][] memory registered_public_keys = new uint256[2][](addresses.length);
+        for (uint256 i = 0; i < addresses.length; i += 1) {
+            registered_public_keys[i] = public_keys[addresses[i]];
+        }
+        return (addresses, registered_public_keys);
+    }
+
     // public output of the DKG protocol
-    uint256[4] master_public_key;
+    uint256[4] public master_public_key;
 
 
 
@@ -100,6 +121,7 @@ contract ETHDKG {
 
     // block numbers of different points in time during the protcol execution
     // initialized at time of contract deployment
+    uint256 public T_CONTRACT_CREATION;
     uint256 public T_REGISTRATION_END;
     uint256 public T_SHARE_DISTRIBUTION_END;
     uint256 public T_DISPUTE_END;
@@ -115,13 +137,32 @@ contract ETHDKG {
 
 
     constructor() public {
-        uint256 T_CONTRACT_CREATION = block.number;
+        T_CONTRACT_CREATION = block.number;
         T_REGISTRATION_END = T_CONTRACT_CREATION + DELTA_INCLUDE;
         T_SHARE_DISTRIBUTION_END = T_REGISTRATION_END + DELTA_CONFIRM + DELTA_INCLUDE;
         T_DISPUTE_END = T_SHARE_DISTRIBUTION_END + DELTA_CONFIRM + DELTA_INCLUDE;
         T_KEY_SHARE_SUBMISSION_END = T_DISPUTE_END + DELTA_CONFIRM + DELTA_INCLUDE;
     }
 
+    // returns all parameters of the protocol execution, the current number of registered nodes
+    // and the number of the block the call is evaluated at, allows the clients to initialize using a single call:
+    // [DELTA_CONFIRM, DELTA_INCLUDE, T_CONTRACT_CREATION, T_REGISTRATION_END, T_SHARE_DISTRIBUTION_END,
+    //  T_DISPUTE_END, T_KEY_SHARE_SUBMISSION_END, num_nodes, block.number]
+    function parameters() public view returns(uint256[9] memory)
+    {
+        return [
+            DELTA_CONFIRM,
+            DELTA_INCLUDE,
+            T_CONTRACT_CREATION,
+            T_REGISTRATION_END,
+            T_SHARE_DISTRIBUTION_END,
+            T_DISPUTE_END,
+            T_KEY_SHARE_SUBMISSION_END,
+            addresses.length,
+            block.number
+        ];
+    }
+
 
 
     ////////////////////////////////////////////////////////////////////////////////////////////////
@@ -180,6 +221,9 @@ contract ETHDKG {
             );
         }
 
+        if (share_distribution_hashes[msg.sender] == 0) {
+            num_qualified_nodes += 1;
+        }
         share_distribution_hashes[msg.sender] = keccak256(
             abi.encodePacked(encrypted_shares, commitments)
         );
@@ -189,6 +233,17 @@ contract ETHDKG {
     }
 
 
+    // Variant of distribute_shares taking the commitments in compressed form (see bn128_decompress), which halves
+    // their calldata at the cost of one modular exponentiation per commitment. The commitments are decompressed first,
+    // the stored share distribution hash and the emitted event are the same as for distribute_shares. Consequently,
+    // disputes can be submitted with compressed or uncompressed commitments, independent of the distribution format.
+    function distribute_shares_compressed(uint256[] memory encrypted_shares, uint256[] memory compressed_commitments)
+    public
+    {
+        distribute_shares(encrypted_shares, bn128_decompress_all(compressed_commitments));
+    }
+
+
     function submit_dispute(
         address issuer,
         uint256 issuer_list_idx,
@@ -222,6 +277,125 @@ contract ETHDKG {
             ),
             "dispute failed (invalid replay of sharing transaction)"
         );
+
+        // The encrypted shares of the issuer do not include a share for the issuer itself.
+        uint256 share_idx = disputer_list_idx < issuer_list_idx ? disputer_list_idx : disputer_list_idx - 1;
+        verify_dispute(issuer, encrypted_shares[share_idx], commitments, shared_key, shared_key_correctness_proof);
+    }
+
+
+    // Variant of submit_dispute taking the commitments in compressed form, see distribute_shares_compressed.
+    function submit_dispute_compressed(
+        address issuer,
+        uint256 issuer_list_idx,
+        uint256 disputer_list_idx,
+        uint256[] memory encrypted_shares,
+        uint256[] memory compressed_commitments,
+        uint256[2] memory shared_key,
+        uint256[2] memory shared_key_correctness_proof
+    )
+    public
+    {
+        submit_dispute(
+            issuer,
+            issuer_list_idx,
+            disputer_list_idx,
+            encrypted_shares,
+            bn128_decompress_all(compressed_commitments),
+            shared_key,
+            shared_key_correctness_proof
+        );
+    }
+
+
+    // Submits the disputes against several issuers in a single transaction (e.g. if a node received invalid shares
+    // from multiple issuers). The base costs of the transaction, the checks of the phase and the disputer's list index
+    // are only paid once. The arguments of the individual disputes are given as concatenated lists, i.e.
+    // encrypted_shares contains the n - 1 encrypted shares of issuers[0], followed by the ones of issuers[1], ...
+    // and commitments contains the t + 1 commitments of each issuer in the same order.
+    // Disputes against issuers which are already disqualified are skipped, all others must be valid.
+    function submit_disputes(
+        address[] memory issuers,
+        uint256[] memory issuer_list_indices,
+        uint256 disputer_list_idx,
+        uint256[] memory encrypted_shares,
+        uint256[2][] memory commitments,
+        uint256[2][] memory shared_keys,
+        uint256[2][] memory shared_key_correctness_proofs
+    )
+    public
+    {
+        require(
+            (T_SHARE_DISTRIBUTION_END < block.number) && (block.number <= T_DISPUTE_END),
+            "dispute failed (contract is not in dispute phase)"
+        );
+        require(
+            addresses[disputer_list_idx] == msg.sender,
+            "dispute failed (invalid list indices)"
+        );
+
+        // The buffers for the encrypted shares and commitments of a single issuer are allocated once and reused
+        // for all disputes, the number of commitments is t + 1 as enforced in distribute_shares.
+        uint256[] memory issuer_encrypted_shares = new uint256[](addresses.length - 1);
+        uint256[2][] memory issuer_commitments = new uint256[2][](addresses.length / 2 + (addresses.length & 1));
+        require(
+            issuer_list_indices.length == issuers.length &&
+            shared_keys.length == issuers.length &&
+            shared_key_correctness_proofs.length == issuers.length &&
+            encrypted_shares.length == issuers.length * issuer_encrypted_shares.length &&
+            commitments.length == issuers.length * issuer_commitments.length,
+            "dispute failed (inconsistent number of disputes)"
+        );
+
+        for (uint256 i = 0; i < issuers.length; i += 1) {
+            require(
+                addresses[issuer_list_indices[i]] == issuers[i],
+                "dispute failed (invalid list indices)"
+            );
+
+            // see submit_dispute, the issuer might already be disqualified by another dispute
+            if (share_distribution_hashes[issuers[i]] == 0) {
+                continue;
+            }
+
+            for (uint256 k = 0; k < issuer_encrypted_shares.length; k += 1) {
+                issuer_encrypted_shares[k] = encrypted_shares[i * issuer_encrypted_shares.length + k];
+            }
+            for (uint256 k = 0; k < issuer_commitments.length; k += 1) {
+                issuer_commitments[k] = commitments[i * issuer_commitments.length + k];
+            }
+            require(
+                share_distribution_hashes[issuers[i]] == keccak256(
+                    abi.encodePacked(issuer_encrypted_shares, issuer_commitments)
+                ),
+                "dispute failed (invalid replay of sharing transaction)"
+            );
+
+            verify_dispute(
+                issuers[i],
+                issuer_encrypted_shares[
+                    disputer_list_idx < issuer_list_indices[i] ? disputer_list_idx : disputer_list_idx - 1
+                ],
+                issuer_commitments,
+                shared_keys[i],
+                shared_key_correctness_proofs[i]
+            );
+        }
+    }
+
+
+    // Verifies a dispute of msg.sender against the given issuer, whose encrypted shares and commitments were already
+    // checked against the share distribution hash. Disqualifies the issuer if the share is shown to be invalid,
+    // reverts otherwise.
+    function verify_dispute(
+        address issuer,
+        uint256 encrypted_share,
+        uint256[2][] memory commitments,
+        uint256[2] memory shared_key,
+        uint256[2] memory shared_key_correctness_proof
+    )
+    internal
+    {
         require(
             dleq_verify(
                 [G1x, G1y], public_keys[msg.sender], public_keys[issuer], shared_key, shared_key_correctness_proof
@@ -229,20 +403,12 @@ contract ETHDKG {
             "dispute failed (invalid shared key or proof)"
         );
 
-        // Since all provided data is valid so far, we load the share and use the verified shared
-        // key to decrypt the share for the disputer.
-        uint256 share;
+        // Since all provided data is valid so far, we use the verified shared key to decrypt the share
+        // for the disputer.
         uint256 disputer_idx = uint256(msg.sender);
-        if (disputer_list_idx < issuer_list_idx) {
-            share = encrypted_shares[disputer_list_idx];
-        }
-        else {
-            share = encrypted_shares[disputer_list_idx - 1];
-        }
-        uint256 decryption_key = uint256(keccak256(
+        uint256 share = encrypted_share ^ uint256(keccak256(
             abi.encodePacked(shared_key[0], disputer_idx)
         ));
-        share ^= decryption_key;
 
         // Verify the share for it's correctness using the polynomial defined by the commitments.
         // First, the polynomial (in group G1) is evaluated at the disputer's idx.
@@ -265,6 +431,7 @@ contract ETHDKG {
         // We mark the nodes as disqualified by setting the distribution hash to 0. This way the
         // case of not proving shares at all and providing invalid shares can be handled equally.
         share_distribution_hashes[issuer] = 0;
+        num_qualified_nodes -= 1;
         emit Dispute(issuer, msg.sender, shared_key, shared_key_correctness_proof);
     }
 
@@ -310,6 +477,11 @@ contract ETHDKG {
         );
 
         key_shares[issuer] = key_share_G1;
+        // the aggregate is initialized to (0, 0), which the precompile treats as the point at infinity
+        key_shares_aggregate = bn128_add([
+            key_shares_aggregate[0], key_shares_aggregate[1], key_share_G1[0], key_share_G1[1]
+        ]);
+        num_key_shares += 1;
         emit KeyShareSubmission(issuer, key_share_G1, key_share_G1_correctness_proof, key_share_G2);
     }
 
@@ -354,30 +526,12 @@ contract ETHDKG {
             return;
         }
 
-        uint256 n = addresses.length;
-
-        // find first (i.e. lowest index) node contributing to the final key
-        uint256 i = 0;
-        address addr;
-
-        do {
-            addr = addresses[i];
-            i += 1;
-        } while(i < n && share_distribution_hashes[addr] == 0);
-
-        uint256[2] memory tmp = key_shares[addr];
-        require(tmp[0] != 0, 'master key submission failed (key share missing)');
-        uint256[2] memory mpk_G1 = key_shares[addr];
-
-        for (; i < n; i += 1) {
-            addr = addresses[i];
-            if (share_distribution_hashes[addr] == 0) {
-                continue;
-            }
-            tmp = key_shares[addr];
-            require(tmp[0] != 0, 'master key submission failed (key share missing)');
-            mpk_G1 = bn128_add([mpk_G1[0], mpk_G1[1], tmp[0], tmp[1]]);
-        }
+        // Key shares are only accepted after the dispute phase, i.e. from qualified nodes only.
+        require(
+            num_key_shares == num_qualified_nodes && num_key_shares > 0,
+            'master key submission failed (key share missing)'
+        );
+        uint256[2] memory mpk_G1 = key_shares_aggregate;
         require(
             bn128_check_pairing([
                 mpk_G1[0], mpk_G1[1],
@@ -437,6 +591,54 @@ contract ETHDKG {
             );
     }
 
+    function bn128_decompress(uint256 compressed_point)
+    private returns (uint256[2] memory point)
+    {
+        // The compressed form of a point is its x-coordinate, with the parity of the y-coordinate stored in the
+        // highest bit (unused, as FIELD_MODULUS < 2**254). The y-coordinate is obtained as the square root of
+        // x**3 + 3, which is computed as (x**3 + 3) ** ((FIELD_MODULUS + 1) / 4) since FIELD_MODULUS = 3 (mod 4).
+        uint256 x = compressed_point & (~uint256(0) >> 1);
+        require(x < FIELD_MODULUS, "point decompression failed (invalid x-coordinate)");
+        uint256 y_squared = addmod(mulmod(x, mulmod(x, x, FIELD_MODULUS), FIELD_MODULUS), 3, FIELD_MODULUS);
+        uint256 y = bn128_modexp(y_squared, (FIELD_MODULUS + 1) / 4);
+        require(
+            mulmod(y, y, FIELD_MODULUS) == y_squared,
+            "point decompression failed (point not on elliptic curve)"
+        );
+        if ((y & 1) != (compressed_point >> 255)) {
+            y = FIELD_MODULUS - y;
+        }
+        point = [x, y];
+    }
+
+    function bn128_decompress_all(uint256[] memory compressed_points)
+    private returns (uint256[2][] memory points)
+    {
+        points = new uint256[2][](compressed_points.length);
+        for (uint256 i = 0; i < compressed_points.length; i += 1) {
+            points[i] = bn128_decompress(compressed_points[i]);
+        }
+    }
+
+    function bn128_modexp(uint256 base, uint256 exponent)
+    private returns (uint256)
+    {
+        // computes base**exponent mod FIELD_MODULUS
+        uint256[6] memory input = [uint256(32), 32, 32, base, exponent, FIELD_MODULUS];
+        uint256[1] memory result;
+        bool success;
+        assembly {
+            // 0x05     id of precompiled bigModExp contract
+            // 0        number of ether to transfer
+            // 192      size of call parameters, i.e. the byte lengths of base, exponent and modulus (32 each),
+            //          followed by their values
+            // 32       size of the result
+            success := call(not(0), 0x05, 0, input, 192, result, 32)
+        }
+        require(success, "modular exponentiation failed");
+        return result[0];
+    }
+
     function bn128_add(uint256[4] memory input)
     public returns (uint256[2] memory result) {
         // computes P + Q
@@ -1,37 +1,50 @@
 import argparse
+import asyncio
+import collections
+import concurrent.futures
 import os
-import time
 
 from . import adversary
+from . import gas_pricing
 from . import logging
 from . import utils
-from .ethnode import EthNode, point_to_eth, point_G2_to_eth
+from .async_ethnode import AsyncEthNode
+from .events import ChainReorganization
+from .ethnode import EthNode, get_parameters, point_to_eth, point_G2_to_eth
 from .utils import STATUS_OK, STATUS_ERROR
-from .ethutils import set_polling_interval, get_polling_interval
+from .ethutils import set_polling_interval
 from .node import INVALID_SHARE
+from .sessions import SessionManager
 from web3.exceptions import BadFunctionCallOutput
 from .state_updates import enable_state_updates, StateUpdate
 
 node: EthNode
+anode: AsyncEthNode
 account: str
 contract = None
 logger = None
 args = None
 tx_receipt = None
 
-set_polling_interval(15.0)  # TODO change to e.g. 15.0 seconds for large scale testing on a single server
+# upper bound for the polling interval, in case no subscription for new blocks is possible
+set_polling_interval(15.0)
 
 
 def main():
     global account
 
     parse_cli_arguments()
-    account = utils.get_account_address(args.account_index)
+    if getattr(args, "private_key", None):
+        account = utils.add_local_account(args.private_key)
+    else:
+        account = utils.get_account_address(args.account_index)
 
     if args.command == "deploy":
         deploy()
     elif args.command == "run":
         run()
+    elif args.command == "run-sessions":
+        run_sessions()
 
 
 def parse_cli_arguments():
@@ -53,16 +66,76 @@ def parse_cli_arguments():
     parser_run.add_argument("--abort-after-registration", default=False, action="store_true")
     parser_run.add_argument("--abort-on-key-share-submission", default=False, action="store_true")
     parser_run.add_argument("--interactive", default=False, action="store_true")
+    parser_run.add_argument(
+        "--crypto-workers",
+        type=int,
+        default=0,
+        help="number of worker processes for crypto operations (by default no workers are used)",
+    )
+    parser_run.add_argument(
+        "--compressed-commitments",
+        default=False,
+        action="store_true",
+        help="send commitments in compressed form (half the calldata, but decompressed in the contract), "
+        "see eval_gas_costs for the gas consumption of both formats",
+    )
+    parser_run.add_argument(
+        "--batch-disputes",
+        default=False,
+        action="store_true",
+        help="submit the disputes against several nodes in a single transaction",
+    )
+
+    parser_sessions = subparsers.add_parser(
+        "run-sessions", help="participate in multiple runs of the DKG protocol (one per contract) within one process"
+    )
+    parser_sessions.add_argument(
+        "contract_addresses", type=str, nargs="+", help="the addresses of the DKG smart contracts to use"
+    )
+    parser_sessions.add_argument(
+        "--max-sessions",
+        type=int,
+        default=64,
+        help="maximum number of concurrently running sessions (further sessions are started as running ones finish)",
+    )
+    parser_sessions.add_argument(
+        "--crypto-workers",
+        type=int,
+        default=None,
+        help="number of worker processes for crypto operations (by default one per cpu, 0 disables the workers)",
+    )
 
     parser_deploy = subparsers.add_parser("deploy", help="compiles and deploys the DKG smart contract")
 
-    for subparser in [parser_run, parser_deploy]:
+    for subparser in [parser_run, parser_sessions, parser_deploy]:
         subparser.add_argument(
             "--account-index",
             type=int,
             default=0,
             help="the index of the ethereum account used to issue transactions (by default account 0 is used)",
         )
+    for subparser in [parser_run, parser_sessions]:
+        subparser.add_argument(
+            "--event-index",
+            type=str,
+            default=os.environ.get("ETHDKG_EVENT_INDEX"),
+            help="path of an event index (SQLite database) shared by all node processes on this host, "
+            "confirmed events are fetched only once (default: environment variable ETHDKG_EVENT_INDEX)",
+        )
+        subparser.add_argument(
+            "--coordinated-submission",
+            default=False,
+            action="store_true",
+            help="submit recovered key shares and the master public key only if they are still missing when the "
+            "node's (per protocol run pseudorandom) submission slot arrives, instead of all nodes submitting them",
+        )
+        subparser.add_argument(
+            "--private-key",
+            type=str,
+            default=os.environ.get("ETHDKG_PRIVATE_KEY"),
+            help="sign transactions locally using the given private key instead of an account of the Ethereum node "
+            "(default: environment variable ETHDKG_PRIVATE_KEY), allows sending multiple transactions at once",
+        )
 
     args = parser.parse_args()
     if args.command == "run":
@@ -100,19 +173,64 @@ def run():
     logger = logging.create_logger(f"node.{args.account_index:04}.log")
     StateUpdate.set_logger(logger)
     init()
-    registration()
-    share_distribution()
-    share_verification()
-    dispute_submission()
-    dispute_verification()
-    key_derivation_submission()
-    key_derivation_verification()
-    key_derivation_recovery()
-    key_derivation_result()
+    try:
+        asyncio.run(run_protocol())
+    except ChainReorganization as e:
+        # events which were already processed are no longer part of the chain, the state derived from them (e.g. the
+        # loaded shares) is invalid and the protocol is not continued
+        logger.critical(f"CHAIN REORGANIZATION DEEPER THAN THE CONFIRMATION BLOCKS ({e})")
+        exit(1)
+    finally:
+        # the node exits early (via exit()) if the protocol cannot be completed
+        if node.executor is not None:
+            node.executor.shutdown(wait=True)
+
+
+async def run_protocol():
+    await registration()
+    await share_distribution()
+    await share_verification()
+    await dispute_submission()
+    await dispute_verification()
+    await key_derivation_submission()
+    await key_derivation_verification()
+    await key_derivation_recovery()
+    await key_derivation_result()
+
+
+def run_sessions():
+    global logger
+    logger = logging.create_logger(f"sessions.{args.account_index:04}.log")
+    logger.info("started ETHDKG session manager")
+    logger.info(f"process id: {os.getpid()}")
+    logger.info(f"account index:   {args.account_index}")
+    logger.info(f"account address: {account}")
+    logger.newline()
+
+    init_event_index(utils.get_contract("ETHDKG", args.contract_addresses[0]))
+    with SessionManager(args.max_sessions, args.crypto_workers, args.coordinated_submission) as manager:
+        for i, contract_address in enumerate(args.contract_addresses):
+            session_logger = logging.create_logger(
+                f"node.{args.account_index:04}.session.{i:04}.log", name=f"ethdkg-session-{i}", cli_output=False
+            )
+            manager.start_session(contract_address, account, logger=session_logger)
+            logger.info(f"session {i} started for contract {contract_address}")
+        logger.newline()
+
+        failed_sessions = manager.wait()
+
+    for session in manager.sessions:
+        logfunc = logger.error if session.error is not None else logger.info
+        logfunc(f"contract {session.contract.address}: {session.phase}")
+    logger.newline()
+    logger.info(f"{len(manager.sessions) - len(failed_sessions)} session(s) completed, {len(failed_sessions)} failed")
+    log_rpc_summary()
+    if failed_sessions:
+        exit(1)
 
 
 def init():
-    global node, contract
+    global node, anode, contract
     print()
     logger.info("started ETHDKG protocol client")
     logger.info(f"process id: {os.getpid()}")
@@ -127,11 +245,12 @@ def init():
     contract = utils.get_contract("ETHDKG", args.contract_address)
     logger.info(f"contract address: {contract.address}")
     try:
-        contract.caller.num_nodes()
+        get_parameters(contract)
     except BadFunctionCallOutput as e:
         logger.critical("failed to connect to contract (is contract deployed?)")
         logger.newline(3)
         raise e
+    init_event_index(contract)
 
     node_cls = EthNode
     kwargs = {}
@@ -145,6 +264,11 @@ def init():
         node_cls = adversary.Adversary_AbortOnKeyShareSubmission
 
     node = node_cls(account, contract, logger, **kwargs)
+    node.compressed_commitments = args.compressed_commitments
+    node.batch_disputes = args.batch_disputes
+    if args.crypto_workers != 0:
+        node.executor = concurrent.futures.ProcessPoolExecutor(args.crypto_workers)
+    anode = AsyncEthNode(node)
 
     logger.newline()
     logger.info("initialization completed")
@@ -157,7 +281,14 @@ def init():
     logger.newline(3)
 
 
-def registration():
+def init_event_index(contract):
+    if args.event_index:
+        # only events which are confirmed according to the contract's assumptions are shared
+        utils.set_event_index(args.event_index, get_parameters(contract).DELTA_CONFIRM)
+        logger.info(f"using event index: {args.event_index}")
+
+
+async def registration():
     global tx_receipt
 
     logger.info(f"REGISTRATION PHASE")
@@ -177,17 +308,17 @@ def registration():
     logger.newline()
 
     logger.info("sending registration transaction")
-    log_tx(node.register(), StateUpdate.WAITING_FOR_REGISTRATION_CONFIRMATION)
+    await log_tx(await anode.register(), StateUpdate.WAITING_FOR_REGISTRATION_CONFIRMATION)
 
     logger.info("waiting for end of registration phase and consensus stabilization")
-    wait_until(node.T_REGISTRATION_END + node.DELTA_CONFIRM)
+    await wait_until(node.T_REGISTRATION_END + node.DELTA_CONFIRM)
     logger.newline()
     logger.info("registration phase completed")
     StateUpdate.REGISTRATION_PHASE_COMPLETED()
     logger.newline()
 
     logger.info("loading registrations")
-    node.setup()
+    await anode.setup()
     logger.info(f"registered nodes (n): {node.n}")
     logger.info(f"threshold (t):        {node.t}")
     logger.info("registered nodes: (* marks this node)")
@@ -202,7 +333,7 @@ def registration():
     StateUpdate.SETUP_COMPLETED()
 
 
-def share_distribution():
+async def share_distribution():
     logger.info(f"SHARE DISTRIBUTION PHASE")
     logger.newline()
 
@@ -216,25 +347,25 @@ def share_distribution():
 
     logger.info(f"running ({node.t}, {node.n}) secret sharing protocol")
     logger.info(f"shared secret:    {node.secret}")
-    tx_hash = node.distribute_shares()
+    tx_hash = await anode.distribute_shares()
     logger.newline()
 
     logger.info("sending share distribution transaction")
-    log_tx(tx_hash, StateUpdate.WAITING_FOR_SHARING_CONFIRMATION)
+    await log_tx(tx_hash, StateUpdate.WAITING_FOR_SHARING_CONFIRMATION)
     logger.newline()
 
     logger.info("waiting for end of share distribution phase and consensus stabilization")
-    wait_until(node.T_SHARE_DISTRIBUTION_END + node.DELTA_CONFIRM)
+    await wait_until(node.T_SHARE_DISTRIBUTION_END + node.DELTA_CONFIRM)
     logger.newline()
     logger.info("share distribution phase completed")
     StateUpdate.SHARING_PHASE_COMPLETED()
     logger.newline()
 
 
-def share_verification():
+async def share_verification():
     logger.info("loading shares")
     logger.newline()
-    node.load_shares()
+    await anode.load_shares()
 
     missing, invalid, ok = 0, 0, 0
     for other_node in node.other_nodes:
@@ -263,7 +394,7 @@ def share_verification():
     logger.newline(3)
 
 
-def dispute_submission():
+async def dispute_submission():
     logger.info(f"DISPUTE PHASE")
     logger.newline()
     current_block_number = utils.block_number()
@@ -271,7 +402,7 @@ def dispute_submission():
     logger.info(f"dispute phase until block: {node.T_DISPUTE_END}")
     logger.newline()
 
-    disputes = node.compute_disputes()
+    disputes = await anode.compute_disputes()
     if not disputes:
         logger.info("no disputes to submit")
         StateUpdate.NO_DISPUTES_TO_SUBMIT()
@@ -282,39 +413,39 @@ def dispute_submission():
         exit(1)
 
     logger.info(f"submitting disputes against {len(disputes)} node(s)")
-    txs = node.submit_disputes(disputes)
+    txs = await anode.submit_disputes(disputes)
 
     logger.newline()
     logger.info("submitting transactions")
     logger.info("transaction hashes:")
-    for tx_hash in txs.values():
+    for tx_hash in dict.fromkeys(txs.values()):  # a batch of disputes shares a single transaction
         logger.info(f"    {tx_hash.hex()}")
 
-    for issuer, tx_hash in txs.items():
-        logger.newline()
-        print(f"dispute against node {node.addresses[issuer]}")
-        log_tx(tx_hash, StateUpdate.WAITING_FOR_DISPUTE_CONFIRMATION)
+    logger.newline()
+    async for issuer, receipt in log_txs(txs, StateUpdate.WAITING_FOR_DISPUTE_CONFIRMATION):
+        logger.info(f"dispute against node {node.addresses[issuer]}")
+        log_tx_receipt(receipt)
 
     logger.info("all disputes submitted")
     StateUpdate.DISPUTES_COMPLETED()
 
 
-def dispute_verification():
+async def dispute_verification():
     logger.newline()
     logger.info("waiting for end of share dispute phase and consensus stabilization")
-    wait_until(node.T_DISPUTE_END + node.DELTA_CONFIRM)
+    await wait_until(node.T_DISPUTE_END + node.DELTA_CONFIRM)
     logger.newline()
     logger.info("dispute phase completed")
     StateUpdate.DISPUTE_PHASE_COMPLETED()
     logger.newline()
     logger.info("loading received disputes")
 
-    node.load_disputes()
+    await anode.load_disputes()
     StateUpdate.DISPUTES_LOADED()
     logger.newline(3)
 
 
-def key_derivation_submission():
+async def key_derivation_submission():
     logger.info(f"KEY DERIVATION PHASE")
     logger.newline()
     current_block_number = utils.block_number()
@@ -347,26 +478,26 @@ def key_derivation_submission():
 
     logger.newline()
     logger.info("deriving key share")
-    tx = node.submit_key_share()
+    tx = await anode.submit_key_share()
     logger.newline()
     logger.info("submitting transaction")
-    log_tx(tx, StateUpdate.WAITING_FOR_KEY_SHARE_CONFIRMATION)
+    await log_tx(tx, StateUpdate.WAITING_FOR_KEY_SHARE_CONFIRMATION)
 
 
-def key_derivation_verification():
+async def key_derivation_verification():
     logger.newline()
     logger.info("waiting for end of key submission and consensus stabilization")
-    wait_until(node.T_KEY_SHARE_SUBMISSION_END + node.DELTA_CONFIRM)
+    await wait_until(node.T_KEY_SHARE_SUBMISSION_END + node.DELTA_CONFIRM)
     logger.newline()
     logger.info("key submission completed")
     StateUpdate.KEY_SHARING_PHASE_COMPLETED()
     logger.newline()
     logger.info("loading key shares")
-    node.load_key_shares()
+    await anode.load_key_shares()
     StateUpdate.KEY_SHARES_LOADED()
 
 
-def key_derivation_recovery():
+async def key_derivation_recovery():
     if len(node.key_shares) == len(node.qualified_nodes):
         logger.info("no need to recover any key shares")
         StateUpdate.NO_KEY_SHARE_RECOVERY()
@@ -374,33 +505,53 @@ def key_derivation_recovery():
     logger.newline()
     logger.info(f"initiating recovery process for " f"{len(node.qualified_nodes) - len(node.key_shares)} node(s)")
     logger.newline()
-    log_tx(node.recover_key_shares(), StateUpdate.WAITING_FOR_KEY_SHARE_RECOVERY_CONFIRMATION)
+    await log_tx(await anode.recover_key_shares(), StateUpdate.WAITING_FOR_KEY_SHARE_RECOVERY_CONFIRMATION)
     logger.info("waiting for shares to recover all missing key shares")
     logger.newline()
-    node.load_recovered_key_shares()
-
-    logger.info("submitting recovered key shares")
-    txs = node.submit_recovered_key_shares()
-    logger.newline()
-    logger.info("submitting transactions")
-    logger.info("transaction hashes:")
-    for tx_hash in txs.values():
-        logger.info(f"    {tx_hash.hex()}")
+    # each recovered key share is submitted as soon as it is available, without waiting for the other recoveries
+    txs = {}
 
-    for issuer, tx_hash in txs.items():
+    def submit_recovered_key_share(recovered_node_idx):
+        logger.info(f"submitting recovered key share for node {node.addresses[recovered_node_idx]}")
+        txs[recovered_node_idx] = node.submit_key_share(recovered_node_idx)
+        logger.info(f"transaction hash: {txs[recovered_node_idx].hex()}")
         logger.newline()
+
+    if args.coordinated_submission:
+        await anode.load_recovered_key_shares()
+        logger.info(f"waiting for submission slot {node.submission_slot()}")
+        txs = await anode.submit_recovered_key_shares_coordinated()
+        for recovered_node_idx, tx_hash in txs.items():
+            logger.info(f"submitted recovered key share for node {node.addresses[recovered_node_idx]}: {tx_hash.hex()}")
+        if not txs:
+            logger.info("all recovered key shares already submitted by other nodes")
+            StateUpdate.NO_SUBMISSION_OF_RECOVERED_KEY_SHARE()
+            return
+    else:
+        await anode.load_recovered_key_shares(on_recovered=submit_recovered_key_share)
+
+    async for issuer, receipt in log_txs(txs, StateUpdate.WAITING_FOR_SUBMISSION_OF_RECOVERED_KEY_SHARE_CONFIRMATION):
         logger.info(f"recovered key share for node {node.addresses[issuer]}")
-        log_tx(tx_hash, StateUpdate.WAITING_FOR_SUBMISSION_OF_RECOVERED_KEY_SHARE_CONFIRMATION)
+        log_tx_receipt(receipt)
 
     logger.info("all recovered key shares submitted")
     StateUpdate.SUBMISSION_OF_RECOVERED_KEY_SHARES_COMPLETED()
 
 
-def key_derivation_result():
+async def key_derivation_result():
     logger.info("deriving master public key")
 
-    log_tx(node.submit_master_public_key(), StateUpdate.WAITING_FOR_MASTER_KEY_SUBMISSION_CONFIRMATION, may_fail=True)
-    node.derive_group_keys()
+    if args.coordinated_submission:
+        logger.info(f"waiting for submission slot {node.submission_slot()}")
+        tx_hash = await anode.submit_master_public_key_coordinated()
+    else:
+        tx_hash = await anode.submit_master_public_key()
+    if tx_hash is not None:
+        await log_tx(tx_hash, StateUpdate.WAITING_FOR_MASTER_KEY_SUBMISSION_CONFIRMATION, may_fail=True)
+    else:
+        StateUpdate.MASTER_KEY_DERIVED()
+        logger.info("master public key already submitted by another node")
+    await anode.derive_group_keys()
 
     logger.newline(3)
     logger.info("DKG protocol completed")
@@ -413,20 +564,57 @@ def key_derivation_result():
         f"correctness proof for group public key: "
         + str((point_to_eth(node.group_public_key_in_G1), node.group_public_key_correctness_proof))
     )
+    logger.newline()
+    logger.info("validation summary:")
+    for line in node.validator.summary():
+        logger.info(f"    {line}")
+    log_rpc_summary()
     StateUpdate.DKG_COMPLETED()
     logger.newline()
 
 
-def log_tx(tx_hash, state_update, may_fail=False):
+def log_rpc_summary():
+    rpc_counts = utils.rpc_summary()
+    logger.info(f"RPC requests: {sum(count for _, count in rpc_counts)}")
+    for method, count in rpc_counts:
+        logger.info(f"    {method:<32} {count}")
+    index = utils.get_event_index()
+    if index is not None:
+        logger.info(f"event index: {index.hits} hits, {index.misses} misses")
+    for fn_name, count, avg_latency, max_latency, min_slack in gas_pricing.summary():
+        logger.info(
+            f"inclusion of {fn_name} transactions ({count}): "
+            f"{avg_latency:.1f} blocks on average, {max_latency} blocks at most, {min_slack} blocks before deadline"
+        )
+
+
+async def log_tx(tx_hash, state_update, may_fail=False):
     logger.info(f"transaction hash: {tx_hash.hex()}")
     logger.newline()
     logger.info("waiting for confirmation")
     state_update()
     logger.newline()
-    tx_receipt = utils.wait_for_tx_receipt(tx_hash)
+    tx_receipt = await anode.wait_for_tx_receipt(tx_hash)
     log_tx_receipt(tx_receipt, StateUpdate(state_update + 1), may_fail=False)
 
 
+async def log_txs(txs, state_update):
+    """ Waits for the confirmation of all given transactions (dict key -> tx_hash) together,
+        yields the tuples (key, receipt) in the order of their confirmation.
+        Keys sharing the same transaction (e.g. batched disputes) are yielded with the same receipt.
+    """
+    logger.info("waiting for confirmation of all transactions")
+    state_update()
+    logger.newline()
+    keys = collections.defaultdict(list)
+    for key, tx_hash in txs.items():
+        keys[tx_hash].append(key)
+    async for tx_hash, receipt in anode.wait_for_receipts(keys):
+        for key in keys[tx_hash]:
+            yield key, receipt
+    StateUpdate(state_update + 1)()
+
+
 def log_tx_receipt(receipt, state_update=None, may_fail=False):
     global tx_receipt
     tx_receipt = receipt
@@ -446,17 +634,11 @@ def log_tx_receipt(receipt, state_update=None, may_fail=False):
         exit(1)
 
 
-def wait_until(block_number):
-    prev = None
-    while True:
-        current = utils.block_number()
-        if current != prev:
-            remaining = block_number - current
-            if remaining <= 0:
-                return
-            logger.info(f"current block: {current}; {remaining} blocks remaining")
-            prev = current
-        time.sleep(get_polling_interval())
+async def wait_until(block_number):
+    current = utils.block_number()
+    while current < block_number:
+        logger.info(f"current block: {current}; {block_number - current} blocks remaining")
+        current = await anode.wait_for_block(current + 1)
 
 
 main()
@@ -0,0 +1,203 @@
+""" asyncio interface of the Ethereum-based DKG client.
+
+    The AsyncEthNode wraps an EthNode (or any of the adversarial variants) and provides coroutines for all steps
+    of the protocol, so that a single event loop can drive many nodes or sessions and overlap their I/O and crypto work.
+    As web3 (v5) does not provide an asynchronous provider, the blocking JSON-RPC calls and the crypto operations are
+    dispatched to a thread pool (crypto operations which can be parallelized are in turn dispatched to the node's
+    executor, see Node._map). Waiting for blocks and transaction receipts does not occupy any thread, the waiting
+    tasks are woken up by the process-wide block watcher (see blocks.py).
+"""
+
+import asyncio
+import functools
+
+from typing import Optional
+
+from . import utils
+from .ethnode import EthNode, SUBMISSION_SLOT_BLOCKS
+from .utils import STATUS_OK
+
+
+class AsyncEthNode:
+    def __init__(self, node: EthNode, io_executor=None):
+        """ node: the wrapped node, its state (e.g. node.key_shares) is also accessible via the AsyncEthNode
+            io_executor: executor for blocking calls, by default the event loop's default executor is used
+        """
+        self.node = node
+        self.io_executor = io_executor
+
+    def __getattr__(self, name):
+        return getattr(self.node, name)
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.io_executor, functools.partial(func, *args, **kwargs))
+
+    async def wait_for_block(self, block_number: int, timeout: Optional[float] = None) -> int:
+        """ Waits until the given block number is reached, returns the current block number.
+        """
+        watcher = await self._run(utils.get_block_watcher)
+        loop = asyncio.get_event_loop()
+        reached = loop.create_future()
+
+        def on_block(current):
+            if current >= block_number:
+                loop.call_soon_threadsafe(lambda: reached.done() or reached.set_result(current))
+
+        watcher.add_listener(on_block)
+        try:
+            if watcher.block_number >= block_number:
+                return watcher.block_number
+            return await asyncio.wait_for(reached, timeout)
+        finally:
+            watcher.remove_listener(on_block)
+
+    async def wait_for_receipts(self, tx_hashes):
+        """ Yields the tuples (tx_hash, receipt) for all given transactions, in the order of their confirmation.
+        """
+        waiter = utils.ReceiptWaiter(tx_hashes)
+        for item in await self._run(waiter.poll):
+            yield item
+        while waiter.outstanding:
+            try:
+                current = await self.wait_for_block(waiter.checked_block + 1, timeout=utils.get_polling_interval())
+            except asyncio.TimeoutError:
+                current = waiter.checked_block  # safeguard in case the block watcher misses a block
+            await self._run(utils.resubmit_stuck_transactions)
+            for item in await self._run(waiter.poll, current):
+                yield item
+
+    async def wait_for_tx_receipt(self, tx_hash):
+        return (await self.wait_for_tx_receipts([tx_hash]))[0]
+
+    async def wait_for_tx_receipts(self, tx_hashes):
+        """ Waits for the receipts of all given transactions together, returns them in the given order.
+        """
+        tx_hashes = list(tx_hashes)
+        receipts = {tx_hash: receipt async for tx_hash, receipt in self.wait_for_receipts(tx_hashes)}
+        return [receipts[tx_hash] for tx_hash in tx_hashes]
+
+    async def wait_for_tx(self, tx_hash):
+        """ Waits for the receipt of the given transaction, raises a RuntimeError if the transaction failed.
+        """
+        tx_receipt = await self.wait_for_tx_receipt(tx_hash)
+        if tx_receipt.status != STATUS_OK:
+            raise RuntimeError(f"transaction {tx_hash.hex()} failed")
+        return tx_receipt
+
+    async def _process_events(self, stream, process, until=None):
+        """ Processes the events of the given stream (see events.EventStream) in batches as soon as they are confirmed,
+            until the end of the stream is reached or the given condition until() holds.
+        """
+        current = None
+        while not stream.done and not (until is not None and until()):
+            batch = await self._run(stream.poll, current)
+            if batch:
+                await self._run(process, batch)
+            elif not stream.done:
+                current = await self.wait_for_block(stream.next_confirmation)
+
+    async def register(self):
+        return await self._run(self.node.register, sync=False)
+
+    async def setup(self):
+        await self.wait_for_block(self.node.T_REGISTRATION_END + self.node.DELTA_CONFIRM)
+        await self._run(self.node.setup)
+
+    async def distribute_shares(self, encrypted_shares=None, commitments=None):
+        return await self._run(self.node.distribute_shares, encrypted_shares, commitments, sync=False)
+
+    async def load_shares(self):
+        await self._process_events(self.node.share_distribution_events, self.node.process_share_distributions)
+
+    async def compute_disputes(self):
+        return await self._run(self.node.compute_disputes)
+
+    async def submit_disputes(self, disputes=None):
+        return await self._run(self.node.submit_disputes, disputes, sync=False)
+
+    async def load_disputes(self):
+        await self._process_events(self.node.dispute_events, self.node.process_disputes)
+        self.node.disputes_loaded()
+
+    async def submit_key_share(self, recovered_node_idx=None):
+        return await self._run(self.node.submit_key_share, recovered_node_idx, sync=False)
+
+    async def load_key_shares(self):
+        await self._process_events(self.node.key_share_submission_events, self.node.process_key_share_submissions)
+        self.node.key_shares_loaded()
+
+    async def recover_key_shares(self):
+        return await self._run(self.node.recover_key_shares, sync=False)
+
+    async def load_recovered_key_shares(self, on_recovered=None):
+        """ The optional callback on_recovered(node_idx) is invoked from a worker thread,
+            as soon as the key share of the node is recovered.
+        """
+        await self._process_events(
+            self.node.key_share_recovery_events,
+            functools.partial(self.node.process_key_share_recoveries, on_recovered=on_recovered),
+            until=self.node.all_key_shares_recovered,
+        )
+        self.node.key_share_recoveries_loaded()
+
+    async def submit_recovered_key_shares(self):
+        return await self._run(self.node.submit_recovered_key_shares, sync=False)
+
+    async def submit_recovered_key_shares_coordinated(self, start_block: Optional[int] = None):
+        """ Coordinated submission mode: instead of all nodes submitting the same recovered key shares, each node waits
+            for its slot (see EthNode.submission_slot) and only submits the key shares still missing by then.
+            The slots are counted from the given block, by default from the block after which the recovery events are
+            confirmed (EthNode.recovered_key_shares_submission_start, i.e. the same block for all nodes).
+            Returns a dict {node_idx: tx_hash}.
+        """
+        if start_block is None:
+            start_block = self.node.recovered_key_shares_submission_start()
+        missing = await self._wait_for_submission_slot(lambda: (start_block, self.node.missing_recovered_key_shares()))
+        if not missing:
+            return {}
+        return await self._run(self.node.submit_recovered_key_shares, sync=False, node_indices=missing)
+
+    async def submit_master_public_key(self):
+        return await self._run(self.node.submit_master_public_key, sync=False)
+
+    async def submit_master_public_key_coordinated(self, start_block: Optional[int] = None):
+        """ Coordinated submission mode for the master public key, see submit_recovered_key_shares_coordinated.
+            The slots are counted from the given block, by default from the block after which the contract holds all
+            key shares (EthNode.master_public_key_submission_start); before, the node waits without submitting.
+            Returns the transaction hash, or None if the master public key was already submitted by another node
+            (the master public key is then only derived locally).
+        """
+
+        def check_missing():
+            missing = self.node.master_public_key_missing()
+            if missing is None:
+                return None, True  # key shares still pending
+            return start_block if start_block is not None else self.node.master_public_key_submission_start(), missing
+
+        missing = await self._wait_for_submission_slot(check_missing)
+        if not missing:
+            await self._run(self.node.derive_master_public_key)
+            return None
+        return await self.submit_master_public_key()
+
+    async def _wait_for_submission_slot(self, check_missing):
+        """ Waits until the submission slot of this node is reached, or there is nothing left to submit.
+            check_missing() returns (start_block, missing): the block from which the slots are counted (None if the
+            submission is not possible yet, the node then waits for the next block), and what is still missing
+            (checked once per slot). Returns the last result for missing.
+        """
+        slot = self.node.submission_slot()
+        current = await self._run(utils.block_number)
+        while True:
+            start_block, missing = await self._run(check_missing)
+            if start_block is None:
+                current = await self.wait_for_block(current + 1)
+                continue
+            slot_start = start_block + slot * SUBMISSION_SLOT_BLOCKS
+            if not missing or current >= slot_start:
+                return missing
+            current = await self.wait_for_block(min(current + SUBMISSION_SLOT_BLOCKS, slot_start))
+
+    async def derive_group_keys(self):
+        await self._run(self.node.derive_group_keys)
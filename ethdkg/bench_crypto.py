@@ -0,0 +1,151 @@
+""" Micro-benchmark of the cryptographic primitives (see crypto.py) used by the nodes.
+
+    For each n of the given grid (by default powers of two), the primitives are timed with the parameters of a
+    protocol run with n nodes (i.e. threshold t = ceil(n / 2) - 1, t + 1 commitments per share distribution).
+    Primitives whose costs do not depend on n (see INDEPENDENT_OF_N) are only timed once, their time is reported for
+    each n. The time per call of each primitive is written to a JSON file (together with metadata about the machine) and
+    compared against a stored baseline: the benchmark fails if any primitive is slower than the baseline by more than
+    the tolerance. As the timings depend on the machine, the baseline should be recorded on the same machine.
+    Without a stored baseline the benchmark fails, unless it is run with --update-baseline.
+
+    Usage:
+        python -m ethdkg.bench_crypto --n 4 8 16 32             # compare against the stored baseline
+        python -m ethdkg.bench_crypto --update-baseline
+"""
+
+import argparse
+import math
+import os
+import sys
+import timeit
+
+from typing import Callable, Dict
+
+from . import benchutils
+from . import crypto
+from .crypto import G1, H1, G2, H2
+
+DEFAULT_N = [2 ** i for i in range(2, 8)]
+DEFAULT_BASELINE = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "evaluation", "computation-costs", "bench_crypto_baseline.json")
+)
+
+# primitives operating on a constant number of points / scalars
+INDEPENDENT_OF_N = {
+    "keygen",
+    "shared_key",
+    "encrypt_share",
+    "decrypt_share",
+    "dleq",
+    "dleq_verify",
+    "pairing",
+    "multiply G2",
+}
+
+
+def primitives(n: int) -> Dict[str, Callable[[], object]]:
+    """ Returns the primitives to benchmark for n nodes, as functions without arguments (the inputs are prepared in
+        advance and not included in the timing).
+    """
+    t = math.ceil(n / 2) - 1
+    keys = [crypto.keygen() for _ in range(n)]
+    indices = [crypto.random_scalar() for _ in range(n)]
+    (sk_i, pk_i), (_, pk_j) = keys[0], keys[1]
+    j = indices[1]
+
+    shares, commitments = crypto.share_secret(crypto.random_scalar(), indices, t)
+    k_ij = crypto.shared_key(sk_i, pk_j)
+    encrypted_share = crypto.encrypt_share(shares[j], k_ij, j)
+    proof = crypto.dleq(G1, pk_i, pk_j, k_ij, sk_i)
+    recovery_shares = {x: shares[x] for x in indices[: t + 1]}
+    h1 = crypto.multiply(H1, sk_i)
+
+    return {
+        "keygen": crypto.keygen,
+        "shared_key": lambda: crypto.shared_key(sk_i, pk_j),
+        "share_secret": lambda: crypto.share_secret(sk_i, indices, t),
+        "evaluate_public_polynomial": lambda: crypto.evaluate_public_polynomial(j, commitments),
+        "verify_share": lambda: crypto.verify_share(j, shares[j], commitments),
+        "encrypt_share": lambda: crypto.encrypt_share(shares[j], k_ij, j),
+        "decrypt_share": lambda: crypto.decrypt_share(encrypted_share, k_ij, j),
+        "dleq": lambda: crypto.dleq(G1, pk_i, pk_j, k_ij, sk_i),
+        "dleq_verify": lambda: crypto.dleq_verify(G1, pk_i, pk_j, k_ij, *proof),
+        "recover_secret": lambda: crypto.recover_secret(recovery_shares),
+        "pairing": lambda: crypto.pairing(H2, h1),
+        "sum_points": lambda: crypto.sum_points(commitments),
+        "multiply G2": lambda: crypto.multiply(G2, sk_i),
+    }
+
+
+def measure_time(fn: Callable[[], object], repeat: int = 3) -> float:
+    """ Returns the time per call of fn in seconds, the best of `repeat` measurements of at least 0.2 seconds each.
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()  # also warms up e.g. the precomputed tables of crypto.multiply
+    return min(timer.repeat(repeat, number)) / number
+
+
+def measure(N, only=None) -> benchutils.Results:
+    """ Returns {n: {primitive: time per call in seconds}}, only: names of the primitives to benchmark (default: all)
+    """
+    results = {}
+    independent_of_n: Dict[str, float] = {}  # timed for the first n only
+    for n in N:
+        print(f"\nrunning benchmark for n={n}, t={math.ceil(n / 2) - 1}")
+        results[n] = {}
+        for name, fn in primitives(n).items():
+            if only and name not in only:
+                continue
+            if name in independent_of_n:
+                results[n][name] = independent_of_n[name]
+                continue
+            results[n][name] = measure_time(fn)
+            if name in INDEPENDENT_OF_N:
+                independent_of_n[name] = results[n][name]
+            print(f"    {name:<30} {results[n][name] * 1000:10.3f} ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark of the cryptographic primitives")
+    parser.add_argument("--n", type=int, nargs="+", default=DEFAULT_N, help="number of nodes (grid)")
+    parser.add_argument("--only", type=str, nargs="+", help="names of the primitives to benchmark (default: all)")
+    parser.add_argument("--output", type=str, default="bench_crypto.json", help="file for the results (JSON)")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE, help="file of the baseline (JSON)")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed relative slowdown over the baseline (default: 25%%)"
+    )
+    parser.add_argument(
+        "--update-baseline", default=False, action="store_true", help="store the results as new baseline"
+    )
+    args = parser.parse_args()
+
+    if not args.update_baseline and not os.path.exists(args.baseline):
+        print(f"no baseline found at {args.baseline}, run with --update-baseline to create one")
+        sys.exit(1)
+
+    crypto.precompute_fixed_base_tables()
+    results = measure(args.n, args.only)
+    meta = benchutils.metadata()
+    benchutils.save_results(args.output, results, meta)
+    print(f"\nresults written to {args.output}")
+
+    if args.update_baseline:
+        benchutils.save_results(args.baseline, results, meta)
+        print(f"baseline updated: {args.baseline}")
+        return
+
+    baseline_meta = benchutils.load_metadata(args.baseline)
+    if baseline_meta.get("processor") != meta["processor"] or baseline_meta.get("machine") != meta["machine"]:
+        print("warning: the baseline was recorded on a different machine")
+    regressions = benchutils.compare(results, benchutils.load_results(args.baseline), args.tolerance)
+    if regressions:
+        print(f"slower than the baseline by more than {args.tolerance:.0%}:")
+        for regression in regressions:
+            print(f"    {regression}")
+        sys.exit(1)
+    print(f"all primitives within {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
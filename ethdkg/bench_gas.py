@@ -0,0 +1,101 @@
+""" Gas regression benchmark of the ETHDKG contract.
+
+    Deploys the contract on an in-process EVM (eth-tester with the py-evm backend, see ethutils.connect_eth_tester),
+    so that no external Ethereum node is required, and runs the full protocol (see eval_gas_costs.run) for each n of
+    the given grid (with several adversaries, so that the batched dispute transaction is included). The maximal gas
+    consumption of each transaction type is written to a JSON file and compared against a stored baseline: the
+    benchmark fails if any value exceeds the baseline by more than the tolerance.
+
+    Usage:
+        python -m ethdkg.bench_gas --n 8 16 32                  # compare against the stored baseline
+        python -m ethdkg.bench_gas --n 8 16 32 --update-baseline
+
+    Requires the packages eth-tester[py-evm] and py-evm in the versions pinned in requirements.txt (the latest ones
+    compatible with web3 5.0.2) and the solidity compiler (see ethutils.compile_contract).
+    Without a stored baseline the benchmark fails, unless it is run with --update-baseline.
+"""
+
+import argparse
+import collections
+import os
+import sys
+
+from . import benchutils
+from . import eval_gas_costs
+from . import utils
+
+DEFAULT_N = [8, 16, 32]
+DEFAULT_ADVERSARIES = 3
+DEFAULT_BASELINE = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "evaluation", "gas-costs", "bench_gas_baseline.json")
+)
+
+# the gas costs of the precompiles used by the contract and of calldata differ between the forks (reduced with
+# istanbul, see EIP-1108 and EIP-2028), istanbul is used in the evaluation
+FORKS = ["istanbul", "petersburg"]
+
+
+def vm_configuration(fork: str):
+    from eth.vm import forks
+
+    return ((0, {"istanbul": forks.IstanbulVM, "petersburg": forks.PetersburgVM}[fork]),)
+
+
+def measure(N, fork="istanbul", adversaries=DEFAULT_ADVERSARIES) -> benchutils.Results:
+    """ Runs the protocol for each n, returns {n: {transaction type: maximal gas consumption}}.
+    """
+    utils.connect_eth_tester(num_accounts=max(N) + 1, vm_configuration=vm_configuration(fork))
+    results = {}
+    for n in N:
+        eval_gas_costs.stats = collections.defaultdict(list)
+        eval_gas_costs.run(n, adversaries=adversaries)
+        results[n] = {name: max(values) for name, values in eval_gas_costs.stats.items() if values}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="gas regression benchmark of the ETHDKG contract")
+    parser.add_argument("--n", type=int, nargs="+", default=DEFAULT_N, help="number of nodes (grid)")
+    parser.add_argument("--fork", choices=FORKS, default="istanbul", help="fork of the EVM")
+    parser.add_argument(
+        "--adversaries",
+        type=int,
+        default=DEFAULT_ADVERSARIES,
+        help="number of nodes sending invalid shares, disputed in one batch if more than one (default: %(default)s)",
+    )
+    parser.add_argument("--output", type=str, default="bench_gas.json", help="file for the results (JSON)")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE, help="file of the baseline (JSON)")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.02, help="allowed relative increase over the baseline (default: 2%%)"
+    )
+    parser.add_argument(
+        "--update-baseline", default=False, action="store_true", help="store the results as new baseline"
+    )
+    args = parser.parse_args()
+
+    if not args.update_baseline and not os.path.exists(args.baseline):
+        print(f"no baseline found at {args.baseline}, run with --update-baseline to create one")
+        sys.exit(1)
+
+    utils.compile_contract("ETHDKG")
+    results = measure(args.n, args.fork, args.adversaries)
+    meta = benchutils.metadata(fork=args.fork, adversaries=args.adversaries)
+    benchutils.save_results(args.output, results, meta)
+    print(f"results written to {args.output}")
+
+    if args.update_baseline:
+        benchutils.save_results(args.baseline, results, meta)
+        print(f"baseline updated: {args.baseline}")
+        return
+
+    regressions = benchutils.compare(results, benchutils.load_results(args.baseline), args.tolerance)
+    if regressions:
+        print(f"gas consumption exceeds the baseline by more than {args.tolerance:.1%}:")
+        for regression in regressions:
+            print(f"    {regression}")
+        sys.exit(1)
+    print(f"gas consumption within {args.tolerance:.1%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
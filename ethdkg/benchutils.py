@@ -0,0 +1,82 @@
+""" Helpers for the benchmark suites (see bench_gas.py and bench_crypto.py): storing the results as JSON together with
+    metadata about the machine and the software versions, and comparing them against a stored baseline.
+
+    Results are nested dicts {n: {name: value}}, where a larger value is worse (e.g. gas or time).
+    As JSON only supports string keys, n is stored as string and converted back when loading.
+"""
+
+import datetime
+import json
+import os
+import platform
+import subprocess
+
+from typing import Dict, List, NamedTuple, Optional
+
+Results = Dict[int, Dict[str, float]]
+
+
+class Regression(NamedTuple):
+    n: int
+    name: str
+    baseline: float
+    value: float
+
+    @property
+    def change(self) -> float:
+        return self.value / self.baseline - 1 if self.baseline else float("inf")
+
+    def __str__(self):
+        return f"n={self.n}, {self.name}: {self.baseline} -> {self.value} ({self.change:+.2%})"
+
+
+def metadata(**extra) -> dict:
+    """ Returns information about the machine and the software versions, to be stored along with the results.
+    """
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        **extra,
+    }
+
+
+def save_results(path: str, results: Results, meta: Optional[dict] = None):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"metadata": meta or {}, "results": results}, f, indent=4, sort_keys=True)
+        f.write("\n")
+
+
+def load_results(path: str) -> Results:
+    with open(path) as f:
+        data = json.load(f)
+    return {int(n): values for n, values in data["results"].items()}
+
+
+def load_metadata(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)["metadata"]
+
+
+def compare(results: Results, baseline: Results, tolerance: float) -> List[Regression]:
+    """ Returns all values which exceed the baseline by more than the given (relative) tolerance.
+        Values missing in the baseline (e.g. a new n or function) are not compared.
+    """
+    regressions = []
+    for n, values in sorted(results.items()):
+        for name, value in sorted(values.items()):
+            reference = baseline.get(n, {}).get(name)
+            if reference is not None and value > reference * (1 + tolerance):
+                regressions.append(Regression(n, name, reference, value))
+    return regressions
@@ -0,0 +1,178 @@
+""" A single source of new-block events shared by all waiters within a process.
+
+    The BlockWatcher subscribes to newHeads notifications of the Ethereum client via WebSocket or IPC.
+    If no subscription is possible (e.g. plain HTTP endpoint), it falls back to polling eth_blockNumber,
+    where the polling interval adapts to the observed block time (bounded by the configured maximum).
+    Threads waiting for a block (or a transaction receipt) block on a shared condition variable and are all
+    woken up by the watcher's background thread whenever a new block is observed, asyncio tasks are woken up
+    via listener callbacks.
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+from typing import Callable, Optional
+
+import websockets
+
+MIN_POLLING_INTERVAL = 0.05
+RESUBSCRIBE_INTERVAL = 60.0
+
+SUBSCRIBE_REQUEST = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]})
+
+
+class BlockWatcher:
+    def __init__(
+        self,
+        get_block_number: Callable[[], int],
+        subscription_uri: Optional[str] = None,
+        max_polling_interval: Callable[[], float] = lambda: 15.0,
+    ):
+        """ get_block_number: callable to query the current block number (used for polling)
+            subscription_uri: WebSocket (ws://, wss://) or IPC (path) endpoint used for newHeads subscriptions
+            max_polling_interval: callable returning the upper bound of the polling interval in seconds
+        """
+        self.get_block_number = get_block_number
+        self.subscription_uri = subscription_uri
+        self.max_polling_interval = max_polling_interval
+        self.block_number = None
+        self.mode = None  # "subscription" or "polling" once started
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self._block_time = None  # moving average of the observed time between blocks
+        self._last_block_time = None
+        self._listeners = []
+
+    def start(self):
+        with self._condition:
+            if self._thread is None:
+                self._on_block(self.get_block_number())
+                self._thread = threading.Thread(target=self._run, name="ethdkg-block-watcher", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped = True
+        with self._condition:
+            self._condition.notify_all()
+
+    def wait_for_block(self, target_block_number: int, timeout: Optional[float] = None) -> int:
+        """ Blocks until the given block number is reached, returns the current block number.
+            If a timeout is given, the function returns after at most timeout seconds (potentially earlier).
+        """
+        self.start()
+        with self._condition:
+            self._condition.wait_for(lambda: self.block_number >= target_block_number or self._stopped, timeout)
+            return self.block_number
+
+    def wait_for_new_block(self, block_number: Optional[int] = None, timeout: Optional[float] = None) -> int:
+        """ Blocks until a block after the given one (by default the current one) is observed.
+        """
+        self.start()
+        with self._condition:
+            if block_number is None:
+                block_number = self.block_number
+        return self.wait_for_block(block_number + 1, timeout)
+
+    def add_listener(self, callback: Callable[[int], None]):
+        """ Registers a callback, invoked (from the watcher's thread) with the block number of each new block.
+            Used e.g. to wake up asyncio tasks, see async_ethnode.py.
+        """
+        with self._condition:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[int], None]):
+        with self._condition:
+            self._listeners.remove(callback)
+
+    def _on_block(self, block_number: int):
+        with self._condition:
+            if self.block_number is not None and block_number <= self.block_number:
+                return
+            now = time.monotonic()
+            if self._last_block_time is not None:
+                dt = (now - self._last_block_time) / (block_number - self.block_number)
+                self._block_time = dt if self._block_time is None else 0.8 * self._block_time + 0.2 * dt
+            self._last_block_time = now
+            self.block_number = block_number
+            self._condition.notify_all()
+            for callback in self._listeners:
+                callback(block_number)
+
+    def _run(self):
+        while not self._stopped:
+            if self.subscription_uri:
+                try:
+                    asyncio.new_event_loop().run_until_complete(self._subscribe())
+                except Exception:
+                    pass
+            # subscription not available (or connection lost), poll until the next attempt to subscribe
+            self.mode = "polling"
+            self._poll(time.monotonic() + RESUBSCRIBE_INTERVAL if self.subscription_uri else float("inf"))
+
+    def _poll(self, until: float):
+        while not self._stopped and time.monotonic() < until:
+            try:
+                self._on_block(self.get_block_number())
+            except Exception:
+                pass  # connection issues, simply retry after the next interval
+            time.sleep(self._polling_interval())
+
+    def _polling_interval(self) -> float:
+        # poll a few times per (estimated) block interval to react quickly without wasting requests
+        max_interval = self.max_polling_interval()
+        if self._block_time is None:
+            return min(1.0, max_interval)
+        return max(MIN_POLLING_INTERVAL, min(self._block_time / 4, max_interval))
+
+    async def _subscribe(self):
+        if self.subscription_uri.startswith(("ws://", "wss://")):
+            async with websockets.connect(self.subscription_uri, max_size=None) as ws:
+                await ws.send(SUBSCRIBE_REQUEST)
+                while not self._stopped:
+                    message = await self._receive(ws.recv())
+                    if message is not None:
+                        self._handle_message(json.loads(message))
+        else:
+            reader, writer = await asyncio.open_unix_connection(self.subscription_uri)
+            try:
+                writer.write(SUBSCRIBE_REQUEST.encode())
+                decoder = json.JSONDecoder()
+                buffer = ""
+                while not self._stopped:
+                    data = await self._receive(reader.read(65536))
+                    if data is None:
+                        continue
+                    if not data:
+                        raise ConnectionError("IPC connection closed")
+                    buffer += data.decode()
+                    while buffer:
+                        try:
+                            message, end = decoder.raw_decode(buffer)
+                        except ValueError:
+                            break  # incomplete message
+                        buffer = buffer[end:].lstrip()
+                        self._handle_message(message)
+            finally:
+                writer.close()
+
+    async def _receive(self, receive):
+        """ Awaits the next message. If no message arrives within the maximal polling interval,
+            the block number is queried directly, as a safeguard against silently stalled subscriptions.
+        """
+        try:
+            return await asyncio.wait_for(receive, self.max_polling_interval())
+        except asyncio.TimeoutError:
+            self._on_block(self.get_block_number())
+            return None
+
+    def _handle_message(self, message):
+        if "error" in message:
+            raise ConnectionError(f"newHeads subscription failed: {message['error']}")
+        if message.get("id") == 1:
+            self.mode = "subscription"  # subscription confirmed
+        elif message.get("method") == "eth_subscription":
+            self._on_block(int(message["params"]["result"]["number"], 16))
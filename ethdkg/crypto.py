@@ -1,10 +1,12 @@
 import secrets
+import threading
 import sympy  # consider removing this dependency, only needed for mod_inverse
 import web3
 
 from typing import Tuple, Dict, List, Iterable, Union
 from py_ecc.optimized_bn128 import G1, G2
-from py_ecc.optimized_bn128 import add, multiply, neg, normalize, pairing, is_on_curve
+from py_ecc.optimized_bn128 import add, double, neg, normalize, pairing, is_on_curve
+from py_ecc.optimized_bn128 import multiply as _multiply
 from py_ecc.optimized_bn128 import curve_order as CURVE_ORDER
 from py_ecc.optimized_bn128 import field_modulus as FIELD_MODULUS
 
@@ -42,6 +44,97 @@ H2 = (
 # fmt: on
 
 
+# Precomputed tables for the fixed generators G1, H1, G2 and H2.
+# For each window j, the table holds the multiples k * 2^(w*j) * P for k = 1, ..., 2^w - 1,
+# so that a scalar multiplication with a generator is reduced to (at most) 256 / w additions.
+# The tables are built lazily on first use and are shared by all nodes within a process.
+_FIXED_BASE_WINDOW = 4
+_FIXED_BASES = {id(G1): G1, id(H1): H1, id(G2): G2, id(H2): H2}
+_fixed_base_tables: Dict[int, List[List[Optimized_Point3D]]] = {}
+_fixed_base_tables_lock = threading.Lock()
+
+
+def _build_fixed_base_table(P: Optimized_Point3D) -> List[List[Optimized_Point3D]]:
+    table = []
+    base = P
+    for _ in range(0, 256, _FIXED_BASE_WINDOW):
+        window = [base]
+        for _ in range(2, 2 ** _FIXED_BASE_WINDOW):
+            window.append(add(window[-1], base))
+        table.append(window)
+        base = add(window[-1], base)  # 2^w * base
+    return table
+
+
+def precompute_fixed_base_tables():
+    """ Builds the tables for all fixed generators ahead of time, e.g. before forking worker processes.
+    """
+    for key, P in _FIXED_BASES.items():
+        _get_fixed_base_table(key, P)
+
+
+def _get_fixed_base_table(key: int, P: Optimized_Point3D) -> List[List[Optimized_Point3D]]:
+    table = _fixed_base_tables.get(key)
+    if table is None:
+        with _fixed_base_tables_lock:
+            table = _fixed_base_tables.get(key)
+            if table is None:
+                table = _fixed_base_tables[key] = _build_fixed_base_table(P)
+    return table
+
+
+def multiply(pt: Optimized_Point3D, n: int) -> Optimized_Point3D:
+    """ Scalar multiplication, using the precomputed tables if pt is one of the fixed generators.
+    """
+    if id(pt) not in _FIXED_BASES:
+        return _multiply(pt, n)
+
+    table = _get_fixed_base_table(id(pt), pt)
+    n %= CURVE_ORDER
+    mask = 2 ** _FIXED_BASE_WINDOW - 1
+    result = None
+    for window in table:
+        k = n & mask
+        if k:
+            result = window[k - 1] if result is None else add(result, window[k - 1])
+        n >>= _FIXED_BASE_WINDOW
+        if not n:
+            break
+    if result is None:
+        return (pt[0].one(), pt[0].one(), pt[0].zero())
+    return result
+
+
+def multi_multiply(points: List[Optimized_Point3D], scalars: List[int]) -> Optimized_Point3D:
+    """ Computes the sum of points[k] * scalars[k] (multi-scalar multiplication).
+        Uses Pippenger's bucket method, which requires considerably fewer point additions
+        than computing and summing up the individual products.
+    """
+    zero = (points[0][0].one(), points[0][0].one(), points[0][0].zero())
+    if len(points) < 8:
+        return sum_points(multiply(P, x) for P, x in zip(points, scalars)) or zero
+
+    c = max(2, len(points).bit_length() - 3)  # window size
+    mask = 2 ** c - 1
+    scalars = [x % CURVE_ORDER for x in scalars]
+    result = zero
+    for w in reversed(range(0, CURVE_ORDER.bit_length(), c)):
+        for _ in range(c):
+            result = double(result)
+        buckets = [zero] * mask
+        for P, x in zip(points, scalars):
+            k = (x >> w) & mask
+            if k:
+                buckets[k - 1] = add(buckets[k - 1], P)
+        # computes sum(k * buckets[k - 1]) using running sums
+        running_sum = window_sum = zero
+        for bucket in reversed(buckets):
+            running_sum = add(running_sum, bucket)
+            window_sum = add(window_sum, running_sum)
+        result = add(result, window_sum)
+    return result
+
+
 def random_scalar() -> int:
     """ Returns a random exponent for the BN128 curve, i.e. a random element from Zq.
     """
@@ -69,11 +162,12 @@ def share_secret(
     coefficients = [secret] + [random_scalar() for j in range(threshold)]
 
     def f(x: int) -> int:
-        """ evaluation function for secret polynomial
+        """ evaluation function for secret polynomial (using Horner's method)
         """
-        return (
-            sum(coef * pow(x, j, CURVE_ORDER) for j, coef in enumerate(coefficients)) % CURVE_ORDER
-        )
+        result = 0
+        for coef in reversed(coefficients):
+            result = (result * x + coef) % CURVE_ORDER
+        return result
 
     shares = {x: f(x) for x in indices}
     commitments = [multiply(G1, coef) for coef in coefficients]
@@ -105,18 +199,13 @@ def _share_secret_int_indices(s_i: int, n: int, t: int) -> Tuple[Dict[int, int],
 
 
 def evaluate_public_polynomial(x: int, commitments: List[PointG1]):
-    result = commitments[0]
-    for k in range(1, len(commitments)):
-        result = add(result, multiply(commitments[k], pow(x, k, CURVE_ORDER)))
-    return result
+    return multi_multiply(commitments, [pow(x, k, CURVE_ORDER) for k in range(len(commitments))])
 
 
 def verify_share(j: int, s_ij: int, Cik: List[PointG1]) -> bool:
     """ check share validity and return True if the share is valid, False otherwise
     """
-    r = Cik[0]
-    for k, c in enumerate(Cik[1:]):
-        r = add(r, multiply(c, pow(j, k + 1, CURVE_ORDER)))
+    r = evaluate_public_polynomial(j, Cik)
     return normalize(multiply(G1, s_ij)) == normalize(r)
 
 
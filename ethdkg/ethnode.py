@@ -1,15 +1,21 @@
 import math
-import time
-from typing import List, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
+from eth_utils import keccak, to_bytes
 
 from .node import Node
 from .crypto import PointG1, PointG2, FQ, FQ2, G1, H1, normalize
 from . import utils
 from . import crypto
+from . import events
 from . import logging
+from . import validation
 from .state_updates import StateUpdate
 
+# number of blocks between the submission slots of the nodes in coordinated submission mode, within a slot the
+# submission of the previous node (if any) is expected to be included
+SUBMISSION_SLOT_BLOCKS = 5
+
 
 def point_to_eth(p: PointG1) -> Tuple[int, int]:
     pn = normalize(p)
@@ -21,6 +27,27 @@ def point_from_eth(p) -> PointG1:
     return (FQ(x), FQ(y), FQ(1))
 
 
+def point_to_eth_compressed(p: PointG1) -> int:
+    """ Compressed representation of a point as used by the contract (see bn128_decompress in ETHDKG.sol):
+        the x-coordinate, with the parity of the y-coordinate stored in the highest bit.
+    """
+    x, y = point_to_eth(p)
+    return x | (y & 1) << 255
+
+
+def point_from_eth_compressed(c: int) -> PointG1:
+    x = c & ((1 << 255) - 1)
+    if x >= crypto.FIELD_MODULUS:
+        raise ValueError("invalid compressed point (x-coordinate out of range)")
+    y_squared = (pow(x, 3, crypto.FIELD_MODULUS) + 3) % crypto.FIELD_MODULUS
+    y = pow(y_squared, (crypto.FIELD_MODULUS + 1) // 4, crypto.FIELD_MODULUS)
+    if y * y % crypto.FIELD_MODULUS != y_squared:
+        raise ValueError("invalid compressed point (not on elliptic curve)")
+    if y & 1 != c >> 255:
+        y = crypto.FIELD_MODULUS - y
+    return point_from_eth((x, y))
+
+
 def point_G2_to_eth(p: PointG2) -> Tuple[int, int, int, int]:
     x, y = normalize(p)
     a, ai = x.coeffs[0], x.coeffs[1]  # ordering: real, imag
@@ -33,19 +60,102 @@ def point_G2_from_eth(p) -> PointG2:
     return (FQ2([a, ai]), FQ2([b, bi]), FQ2((1, 0)))
 
 
+def get_registrations(contract) -> Tuple[Dict[int, str], Dict[int, PointG1]]:
+    """ Fetches the addresses and public keys of all registered nodes from the contract using a single call.
+        Returns two dicts, both indexed by the integer representation of the nodes' addresses (in registration order).
+    """
+    addresses, public_keys = contract.caller.get_registrations()
+    return (
+        {int(addr, 16): addr for addr in addresses},
+        {int(addr, 16): point_from_eth(pk) for addr, pk in zip(addresses, public_keys)},
+    )
+
+
+class ContractParameters(NamedTuple):
+    DELTA_CONFIRM: int
+    DELTA_INCLUDE: int
+    T_CONTRACT_CREATION: int
+    T_REGISTRATION_END: int
+    T_SHARE_DISTRIBUTION_END: int
+    T_DISPUTE_END: int
+    T_KEY_SHARE_SUBMISSION_END: int
+    num_nodes: Optional[int]  # None if fetched before the registrations were confirmed
+
+
+_contract_parameters: Dict[str, ContractParameters] = {}  # contract address -> parameters
+
+
+def get_parameters(contract, refresh=False) -> ContractParameters:
+    """ Fetches the parameters of the protocol execution from the contract using a single call.
+        The parameters are cached per contract address, i.e. creating many nodes for the same contract requires a
+        single call. The number of nodes may still change during the registration phase, it is only set if the
+        parameters are fetched after the registrations are confirmed (use refresh=True to fetch them again).
+    """
+    params = _contract_parameters.get(contract.address)
+    if params is None or refresh:
+        *values, num_nodes, current_block_number = contract.caller.parameters()
+        params = ContractParameters(*values, num_nodes=None)
+        if current_block_number > params.T_REGISTRATION_END + params.DELTA_CONFIRM:
+            params = params._replace(num_nodes=num_nodes)
+        _contract_parameters[contract.address] = params
+    return params
+
+
 class EthNode(Node):
     def __init__(self, address, contract, logger=logging.NullLogger):
         super().__init__()
+        # points emitted by the contract are already checked to be on the curve
+        self.validator = validation.Validator(check_curve=False)
         self.address = address
         self.contract = contract
-        self.DELTA_CONFIRM = contract.caller.DELTA_CONFIRM()
-        self.DELTA_INCLUDE = contract.caller.DELTA_INCLUDE()
-        self.T_REGISTRATION_END = contract.caller.T_REGISTRATION_END()
-        self.T_SHARE_DISTRIBUTION_END = contract.caller.T_SHARE_DISTRIBUTION_END()
-        self.T_DISPUTE_END = contract.caller.T_DISPUTE_END()
-        self.T_KEY_SHARE_SUBMISSION_END = self.T_DISPUTE_END + self.DELTA_CONFIRM + self.DELTA_INCLUDE
+        params = get_parameters(contract)
+        self.DELTA_CONFIRM = params.DELTA_CONFIRM
+        self.DELTA_INCLUDE = params.DELTA_INCLUDE
+        self.T_REGISTRATION_END = params.T_REGISTRATION_END
+        self.T_SHARE_DISTRIBUTION_END = params.T_SHARE_DISTRIBUTION_END
+        self.T_DISPUTE_END = params.T_DISPUTE_END
+        self.T_KEY_SHARE_SUBMISSION_END = params.T_KEY_SHARE_SUBMISSION_END
+        # block of the contract deployment, no events can be emitted before
+        self.T_CONTRACT_CREATION = params.T_CONTRACT_CREATION
         self.logger = logger
 
+        # if set, commitments are sent in compressed form (32 instead of 64 bytes of calldata per point, but an
+        # additional modular exponentiation in the contract), see distribute_shares_compressed in ETHDKG.sol
+        self.compressed_commitments = False
+
+        # if set, disputes against several issuers are submitted in a single submit_disputes transaction (opt-in, its
+        # gas consumption is measured by eval_gas_costs.run_all, see submit_disputes)
+        self.batch_disputes = False
+
+        # confirmed events of each phase, processed incrementally by the load_* methods
+        self.share_distribution_events = events.EventStream(
+            contract.events.ShareDistribution,
+            self.T_REGISTRATION_END + 1,
+            self.T_SHARE_DISTRIBUTION_END,
+            self.DELTA_CONFIRM,
+            events.decode_share_distribution,
+        )
+        self.dispute_events = events.EventStream(
+            contract.events.Dispute, self.T_SHARE_DISTRIBUTION_END + 1, self.T_DISPUTE_END, self.DELTA_CONFIRM
+        )
+        self.key_share_submission_events = events.EventStream(
+            contract.events.KeyShareSubmission,
+            self.T_DISPUTE_END + 1,
+            self.T_KEY_SHARE_SUBMISSION_END,
+            self.DELTA_CONFIRM,
+        )
+        self.key_share_recovery_events = events.EventStream(
+            contract.events.KeyShareRecovery, self.T_KEY_SHARE_SUBMISSION_END + 1, None, self.DELTA_CONFIRM
+        )
+
+        # block of the last KeyShareRecovery event required to recover the missing key shares, i.e. the same block
+        # for all nodes (the first t + 1 valid shares in the order of the events are used for each recovered node)
+        self.key_share_recovery_block: Optional[int] = None
+        self._recovery_share_blocks: Dict[Tuple[int, int], int] = {}  # (recovered node, recoverer) -> block
+        # block of the KeyShareSubmission event which completed the key shares in the contract, see
+        # master_public_key_submission_start
+        self._key_shares_completed_block: Optional[int] = None
+
     @property
     def tx_registration_receipt(self):
         if self._tx_registration_receipt:
@@ -54,25 +164,21 @@ class EthNode(Node):
 
     def register(self, sync=False):
         public_key = point_to_eth(self.public_key)
-        return self.contract.register(public_key).call(self.address, sync)
+        return (
+            self.contract.register(public_key)
+            .with_gas_model()
+            .with_deadline(self.T_REGISTRATION_END, self.T_CONTRACT_CREATION)
+            .call(self.address, sync)
+        )
 
     def setup(self):
         # wait until the registration phase ended and all registration are confirmed for sure
         utils.wait_for_block(self.T_REGISTRATION_END + self.DELTA_CONFIRM)
 
-        self.n = self.contract.caller.num_nodes()
+        self.addresses, public_keys = get_registrations(self.contract)
+        self.n = len(self.addresses)
         self.t = math.ceil(self.n / 2) - 1
 
-        addresses = [self.contract.caller.addresses(i) for i in range(self.n)]
-        public_keys = {
-            int(addr, 16): point_from_eth(
-                (self.contract.caller.public_keys(addr, 0), self.contract.caller.public_keys(addr, 1))
-            )
-            for addr in addresses
-        }
-
-        self.addresses = {int(addr, 16): addr for addr in addresses}
-
         idx = int(self.address, 16)
         super().setup(self.n, self.t, idx, public_keys)
 
@@ -83,27 +189,84 @@ class EthNode(Node):
         encrypted_shares = list(encrypted_shares.values())
         self.logger.info(f"encrypted shares: {encrypted_shares}")
         self.logger.info(f"commitments:      {commitments}")
-        commitments = [point_to_eth(c) for c in commitments]
-        return self.contract.distribute_shares(encrypted_shares, commitments).call(self.address, sync)
+        return self._share_distribution_call(encrypted_shares, commitments).call(self.address, sync)
+
+    def _share_distribution_call(self, encrypted_shares, commitments, compressed=None):
+        """ compressed: overrides self.compressed_commitments
+        """
+        if compressed is None:
+            compressed = self.compressed_commitments
+        if compressed:
+            call = self.contract.distribute_shares_compressed(
+                encrypted_shares, [point_to_eth_compressed(c) for c in commitments]
+            )
+        else:
+            call = self.contract.distribute_shares(encrypted_shares, [point_to_eth(c) for c in commitments])
+        call.with_gas_model(self.n, self.t).with_deadline(self.T_SHARE_DISTRIBUTION_END, self.T_REGISTRATION_END + 1)
+        return call
 
     def load_shares(self):
-        utils.wait_for_block(self.T_SHARE_DISTRIBUTION_END + self.DELTA_CONFIRM)
-        events = self.contract.events.ShareDistribution.createFilter(fromBlock=0).get_all_entries()
-        # TODO: limit lookup to time of contract creation (or beginning of share distribution phase)
-        #       to the end of the share distribution phase.
-        for e in events:
-            issuer = int(e.args.issuer, 16)
+        for distributions in self.share_distribution_events.batches():
+            self.process_share_distributions(distributions)
+
+    def process_share_distributions(self, distributions: List[events.ShareDistribution]):
+        for d in distributions:
+            issuer = d.issuer
             if issuer == self.idx:
                 continue
+            if issuer in self.encrypted_shares:
+                # a node may distribute its shares multiple times, the contract only keeps the last distribution
+                del self.encrypted_shares[issuer], self.commitments[issuer]
+                self.decrypted_shares.pop(issuer, None)
+            issuer_address = self.addresses.get(issuer, hex(issuer))
+            if not self.validator.validate_eth_points(validation.SHARES, d.commitments):
+                self.logger.error(f"share distribution of node {issuer_address} rejected: {self.validator.last_error}")
+                continue
             receivers = (node for node in self.nodes if node != issuer)
-            encrypted_shares = dict(zip(receivers, e.args.encrypted_shares))
-            commitments = [point_from_eth(p) for p in e.args.commitments]
-            super().load_shares(issuer, encrypted_shares, commitments)
-
-    def submit_disputes(self, disputes=None, sync=False):
+            encrypted_shares = dict(zip(receivers, d.encrypted_shares))
+            commitments = [point_from_eth(p) for p in d.commitments]
+            if not super().load_shares(issuer, encrypted_shares, commitments) and issuer not in self.encrypted_shares:
+                self.logger.error(f"share distribution of node {issuer_address} rejected: {self.validator.last_error}")
+
+    def submit_disputes(self, disputes=None, sync=False, batch=None):
+        """ Sends the transactions for all disputes at once (without waiting for the inclusion of the previous ones).
+            If batch is set (by default self.batch_disputes), disputes against several issuers are submitted in a
+            single submit_disputes transaction (which always uses uncompressed commitments).
+            Returns a dict {issuer: tx_hash}, or {issuer: tx_receipt} if sync is set; for a batch, all issuers share
+            the same transaction.
+        """
         if disputes is None:
             disputes = super().compute_disputes()
-        txs = {}
+        arguments = self._dispute_arguments(disputes)
+        if batch is None:
+            batch = self.batch_disputes
+        if batch and len(arguments) > 1:
+            result = self._disputes_call(list(arguments.values())).call(self.address, sync)
+            return {issuer: result for issuer in arguments}
+
+        calls = {issuer: self._dispute_call(args) for issuer, args in arguments.items()}
+        return utils.transact_all(calls, self.address, sync)
+
+    def _dispute_call(self, arguments, compressed=None):
+        """ Returns the submit_dispute call for the given arguments (see _dispute_arguments),
+            compressed: overrides self.compressed_commitments
+        """
+        if compressed is None:
+            compressed = self.compressed_commitments
+        if compressed:
+            *args, commitments, shared_key, shared_key_correctness_proof = arguments
+            compressed_commitments = [point_to_eth_compressed(point_from_eth(c)) for c in commitments]
+            call = self.contract.submit_dispute_compressed(
+                *args, compressed_commitments, shared_key, shared_key_correctness_proof
+            )
+        else:
+            call = self.contract.submit_dispute(*arguments)
+        return call.with_gas_model(self.n, self.t).with_deadline(self.T_DISPUTE_END, self.T_SHARE_DISTRIBUTION_END + 1)
+
+    def _dispute_arguments(self, disputes):
+        """ Returns a dict {issuer: arguments of submit_dispute} for the given disputes.
+        """
+        arguments = {}
         for issuer, dispute in disputes.items():
             shared_key = point_to_eth(dispute[0])
             shared_key_correctness_proof = dispute[1]
@@ -118,7 +281,7 @@ class EthNode(Node):
             self.logger.info(f"    shared key:        {shared_key}")
             self.logger.info(f"    correctness proof: {shared_key_correctness_proof}")
 
-            txs[issuer] = self.contract.submit_dispute(
+            arguments[issuer] = (
                 self.addresses[issuer],
                 list(self.addresses.keys()).index(issuer),
                 list(self.addresses.keys()).index(self.idx),
@@ -126,22 +289,33 @@ class EthNode(Node):
                 commitments,
                 shared_key,
                 shared_key_correctness_proof,
-            ).call(self.address, sync)
-        return txs
+            )
+        return arguments
 
-    def load_disputes(self):
-        utils.wait_for_block(self.T_DISPUTE_END + self.DELTA_CONFIRM)
-        # TODO: limit lookup to time of contract creation (or beginning of share distribution phase)
-        #       to the end of the share distribution phase.
-        events = self.contract.events.Dispute.createFilter(fromBlock=0).get_all_entries()
+    def _disputes_call(self, disputes):
+        """ Returns the submit_disputes call for the given list of submit_dispute arguments.
+            The gas of the batch is estimated, as the gas model only covers single disputes.
+        """
+        issuers, issuer_list_indices, disputer_list_indices, encrypted_shares, commitments, shared_keys, proofs = zip(
+            *disputes
+        )
+        return self.contract.submit_disputes(
+            list(issuers),
+            list(issuer_list_indices),
+            disputer_list_indices[0],
+            [share for shares in encrypted_shares for share in shares],
+            [commitment for issuer_commitments in commitments for commitment in issuer_commitments],
+            list(shared_keys),
+            list(proofs),
+        ).with_deadline(self.T_DISPUTE_END, self.T_SHARE_DISTRIBUTION_END + 1)
 
-        if events:
-            self.logger.error(f"{len(events)} dispute events detected")
-            self.logger.newline()
-        else:
-            self.logger.info(f"no dispute events detected")
+    def load_disputes(self):
+        for disputes in self.dispute_events.batches():
+            self.process_disputes(disputes)
+        self.disputes_loaded()
 
-        for e in events:
+    def process_disputes(self, disputes):
+        for e in disputes:
             issuer_idx = int(e.args.issuer, 16)
             disputer_idx = int(e.args.disputer, 16)
             shared_key = point_from_eth(e.args.shared_key)
@@ -156,11 +330,22 @@ class EthNode(Node):
                 )
                 exit(1)
 
+    def disputes_loaded(self):
+        num_events = self.dispute_events.num_events
+        if num_events:
+            self.logger.error(f"{num_events} dispute events detected")
+            self.logger.newline()
+        else:
+            self.logger.info(f"no dispute events detected")
+
     def submit_key_share(self, recovered_node_idx=None, sync=False):
         """ Sends the key share h^(s_i) with the corresponding proof to the smart contracts.
             If a recovered_node_idx is given, instead the recovered values for this node are 
             uploaded.
         """
+        return self._key_share_call(recovered_node_idx).call(self.address, sync)
+
+    def _key_share_call(self, recovered_node_idx=None):
         if recovered_node_idx is None:
             issuer = self.address
             key_share_G1, key_share_G1_correctness_proof, key_share_G2 = super().compute_key_share()
@@ -182,26 +367,21 @@ class EthNode(Node):
         self.logger.info(f"    keyshare (G2):    {key_share_G2}")
         self.logger.info(f"    correctess proof: {key_share_G1_correctness_proof}")
 
-        return self.contract.submit_key_share(issuer, key_share_G1, key_share_G1_correctness_proof, key_share_G2).call(
-            self.address, sync
-        )
+        call = self.contract.submit_key_share(
+            issuer, key_share_G1, key_share_G1_correctness_proof, key_share_G2
+        ).with_gas_model(self.n, self.t)
+        if recovered_node_idx is None:
+            # the key shares of nodes which miss this deadline are recovered by all other nodes
+            call.with_deadline(self.T_KEY_SHARE_SUBMISSION_END, self.T_DISPUTE_END + 1)
+        return call
 
     def load_key_shares(self):
-        utils.wait_for_block(self.T_KEY_SHARE_SUBMISSION_END + self.DELTA_CONFIRM)
-        # TODO: limit lookup to time of contract creation (or beginning of share distribution phase)
-        events = self.contract.events.KeyShareSubmission.createFilter(fromBlock=0).get_all_entries()
-
-        if len(events) > self.t:
-            logfunc = self.logger.info if len(events) == len(self.qualified_nodes) else self.logger.warning
-            logfunc(
-                f"{len(events)} key share submission events detected; " f"{len(self.qualified_nodes)} events expected"
-            )
-            self.logger.newline()
-        else:
-            self.logger.critical(f"only {len(events)} event(s) received; at least t + 1 ({self.t + 1}) events required")
-            exit(1)
+        for submissions in self.key_share_submission_events.batches():
+            self.process_key_share_submissions(submissions)
+        self.key_shares_loaded()
 
-        for e in events:
+    def process_key_share_submissions(self, submissions):
+        for e in submissions:
             self.logger.info(f"key share from node {e.args.issuer}")
             self.logger.info(f"    keyshare (G1):    {e.args.key_share_G1}")
             self.logger.info(f"    keyshare (G2):    {e.args.key_share_G2}")
@@ -218,6 +398,16 @@ class EthNode(Node):
                 )
                 exit(1)
 
+    def key_shares_loaded(self):
+        num_events = self.key_share_submission_events.num_events
+        if num_events > self.t:
+            logfunc = self.logger.info if num_events == len(self.qualified_nodes) else self.logger.warning
+            logfunc(f"{num_events} key share submission events detected; {len(self.qualified_nodes)} events expected")
+            self.logger.newline()
+        else:
+            self.logger.critical(f"only {num_events} event(s) received; at least t + 1 ({self.t + 1}) events required")
+            exit(1)
+
     def recover_key_shares(self, sync=False):
         recovered_nodes = []
         shared_keys = []
@@ -239,72 +429,99 @@ class EthNode(Node):
                 self.address, sync
             )
 
-    def load_recovered_key_shares(self, poll_timeout=1.0):
-        eventFilter = None
-        # will terminate as soon as key_shares for
-        while len(self.key_shares) < len(self.qualified_nodes):
-            if eventFilter is None:
-                eventFilter = self.contract.events.KeyShareRecovery.createFilter(fromBlock=0)
-                events = eventFilter.get_all_entries()
-            else:
-                time.sleep(poll_timeout)
-                events = eventFilter.get_new_entries()
-
-            for e in events:
-                recoverer_idx = int(e.args.recoverer, 16)
-                recovered_nodes = [int(node, 16) for node in e.args.recovered_nodes]
-                shared_keys = [point_from_eth(p) for p in e.args.shared_keys]
-                shared_key_correctness_proofs = e.args.shared_key_correctness_proofs
-
-                self.logger.info(f"recovery event received from node {self.addresses[recoverer_idx]}")
-                self.logger.info(f"    recovered nodes:    {e.args.recovered_nodes}")
-                self.logger.info(f"    shared keys:        {e.args.shared_keys}")
-                self.logger.info(f"    correctness proofs: {e.args.shared_key_correctness_proofs}")
+    def load_recovered_key_shares(self, on_recovered=None):
+        """ Loads the shares for recovery from the KeyShareRecovery events until all missing key shares are recovered.
+            The shares of each batch of confirmed events are verified in parallel (Node.load_recovered_key_share_batch).
+            The optional callback on_recovered(node_idx) is invoked as soon as a node's key share is recovered,
+            e.g. to submit the recovered key share without waiting for the recovery of the remaining nodes.
+        """
+        for recoveries in self.key_share_recovery_events.batches(until=self.all_key_shares_recovered):
+            self.process_key_share_recoveries(recoveries, on_recovered)
+        self.key_share_recoveries_loaded()
+
+    def all_key_shares_recovered(self) -> bool:
+        return len(self.key_shares) >= len(self.qualified_nodes)
+
+    def process_key_share_recoveries(self, recoveries, on_recovered=None):
+        def recovered(node_idx):
+            self.logger.info(f"key share of node {self.addresses[node_idx]} recovered: {self.key_shares[node_idx]}")
+            self.logger.newline()
+            if on_recovered is not None:
+                on_recovered(node_idx)
+
+        recovery_shares = []
+        for e in recoveries:
+            recoverer_idx = int(e.args.recoverer, 16)
+            recovered_nodes = [int(node, 16) for node in e.args.recovered_nodes]
+            shared_keys = [point_from_eth(p) for p in e.args.shared_keys]
+            shared_key_correctness_proofs = e.args.shared_key_correctness_proofs
+
+            self.logger.info(f"recovery event received from node {self.addresses[recoverer_idx]}")
+            self.logger.info(f"    recovered nodes:    {e.args.recovered_nodes}")
+            self.logger.info(f"    shared keys:        {e.args.shared_keys}")
+            self.logger.info(f"    correctness proofs: {e.args.shared_key_correctness_proofs}")
+            self.logger.newline()
+
+            for recovered_node, shared_key, shared_key_correctness_proof in zip(
+                recovered_nodes, shared_keys, shared_key_correctness_proofs
+            ):
+                recovery_shares.append((recovered_node, recoverer_idx, shared_key, shared_key_correctness_proof))
+                self._recovery_share_blocks.setdefault((recovered_node, recoverer_idx), e.blockNumber)
+
+        if recovery_shares:
+            for node_idx in super().load_recovered_key_share_batch(recovery_shares, on_recovered=recovered):
+                recoverers = self.decrypted_shares_for_recovery[node_idx]
+                block = max(self._recovery_share_blocks[node_idx, recoverer] for recoverer in recoverers)
+                self.key_share_recovery_block = max(block, self.key_share_recovery_block or block)
+
+            for node_idx in {node_idx for node_idx, *_ in recovery_shares if node_idx not in self.key_shares}:
+                x = len(self.decrypted_shares_for_recovery[node_idx])
+                self.logger.info(
+                    f"recovery of node {self.addresses[node_idx]} not yet possible; "
+                    f"{self.t + 1 - x} additional valid shares required"
+                )
                 self.logger.newline()
 
-                for recovered_node, shared_key, shared_key_correctness_proofs in zip(
-                    recovered_nodes, shared_keys, shared_key_correctness_proofs
-                ):
-                    if recovered_node in self.key_shares:
-                        continue
-
-                    success = super().load_recovered_key_share(
-                        recovered_node, recoverer_idx, shared_key, shared_key_correctness_proofs
-                    )
-                    if success:
-                        self.logger.info(
-                            f"share for recovery of node {self.addresses[recovered_node]}" " successfully verified"
-                        )
-                        if recovered_node in self.key_shares:
-                            self.logger.info("node already recovered")
-                        else:
-                            if super().recover_key_share(recovered_node):
-                                self.logger.info(f"key share recovered: {self.key_shares[recovered_node]}")
-                            else:
-                                x = len(self.decrypted_shares_for_recovery[recovered_node])
-                                self.logger.info(
-                                    f"recovery not yet possible; " f"{self.t + 1 - x} additional shares required"
-                                )
-                    else:
-                        self.logger.error(
-                            "invalid share for recovery of node " f"{self.addresses[recovered_node]} received"
-                        )
-                    self.logger.newline()
+    def key_share_recoveries_loaded(self):
         self.logger.info("all key shares recovered successfully")
         StateUpdate.KEY_SHARE_RECOVERIES_LOADED()
         self.logger.newline()
 
-    def submit_recovered_key_shares(self, sync=False):
-        # TODO: One could implement randomized timings for the submission of the recovered key
-        # shares to save gas costs, as each key share only has to be provided by one party.
-        return {
-            recovered_node_idx: self.submit_key_share(recovered_node_idx, sync)
-            for recovered_node_idx in self.recovered_key_share_secrets
-        }
+    def submission_slot(self) -> int:
+        """ The slot of this node for the coordinated submission of recovered key shares and the master public key.
+            The qualified nodes are ordered by the hash of the contract address and their address, i.e. the order is
+            the same for all nodes, but differs between protocol runs.
+        """
+        contract_address = to_bytes(hexstr=self.contract.address)
+        order = sorted(
+            self.qualified_nodes, key=lambda node: keccak(contract_address + to_bytes(hexstr=self.addresses[node]))
+        )
+        return order.index(self.idx)
+
+    def submit_recovered_key_shares(self, sync=False, node_indices=None):
+        """ Submits the recovered key shares of the given nodes (by default of all nodes recovered by this node).
+        """
+        if node_indices is None:
+            node_indices = self.recovered_key_share_secrets
+        calls = {recovered_node_idx: self._key_share_call(recovered_node_idx) for recovered_node_idx in node_indices}
+        return utils.transact_all(calls, self.address, sync)
+
+    def recovered_key_shares_submission_start(self) -> int:
+        """ The block from which the slots for the coordinated submission of recovered key shares are counted:
+            the block after which the recovery events required to recover the key shares are confirmed.
+        """
+        return self.key_share_recovery_block + self.DELTA_CONFIRM
+
+    def missing_recovered_key_shares(self) -> List[int]:
+        """ Returns the recovered nodes whose key shares are not yet submitted to the contract.
+        """
+        return [
+            node_idx
+            for node_idx in self.recovered_key_share_secrets
+            if self.contract.caller.key_shares(self.addresses[node_idx], 0) == 0
+        ]
 
     def submit_master_public_key(self, sync=False):
-        # TODO: as in submit_recovered_key_shares, randomized timings for submission of the master
-        # public key are possible.
         pk_G2 = super().derive_master_public_key()
         pk_G2 = point_G2_to_eth(pk_G2)
 
@@ -314,5 +531,28 @@ class EthNode(Node):
         self.logger.newline()
 
         self.logger.info("submitting master public key")
-        return self.contract.submit_master_public_key(pk_G2).call(self.address, sync)
+        return self.contract.submit_master_public_key(pk_G2).with_gas_model(self.n, self.t).call(self.address, sync)
 
+    def master_public_key_missing(self) -> Optional[bool]:
+        """ Returns None if the contract does not hold all key shares yet (e.g. recovered key shares are still pending,
+            submitting the master public key would fail), otherwise whether the master public key is not yet submitted.
+        """
+        caller = self.contract.caller
+        if caller.num_key_shares() != caller.num_qualified_nodes():
+            return None
+        return caller.master_public_key(0) == 0
+
+    def master_public_key_submission_start(self) -> int:
+        """ The block from which the slots for the coordinated submission of the master public key are counted:
+            the block after which the key share submission which completed the key shares in the contract is confirmed
+            (by default the end of the key share submission phase). Must only be called once the contract holds all
+            key shares, see master_public_key_missing.
+        """
+        if self._key_shares_completed_block is None:
+            late_submissions = utils.get_events(
+                self.contract.events.KeyShareSubmission, self.T_KEY_SHARE_SUBMISSION_END + 1
+            )
+            self._key_shares_completed_block = max(
+                (e.blockNumber for e in late_submissions), default=self.T_KEY_SHARE_SUBMISSION_END
+            )
+        return self._key_shares_completed_block + self.DELTA_CONFIRM
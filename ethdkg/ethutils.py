@@ -1,5 +1,10 @@
+import collections
+import json
+import shutil
+import tempfile
 import web3
-import time
+import web3._utils.request
+import requests.adapters
 import threading
 import hashlib
 import os
@@ -7,12 +12,42 @@ import subprocess
 import types
 import web3.auto.gethdev
 import web3.gas_strategies.time_based as gas_strategies
+from eth_utils import event_abi_to_log_topic
+from web3._utils.events import get_event_data
+from web3.datastructures import AttributeDict
 from web3.middleware import geth_poa_middleware
 
+try:
+    from web3.middleware.pythonic import receipt_formatter
+except ImportError:  # moved in later versions of web3 5.x
+    from web3._utils.method_formatters import receipt_formatter
+
+from . import blocks
+from . import event_index
+from . import gas_model
+from . import gas_pricing
+from . import signing
+
 SOLC_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "bin", "solc"))
 
 CONTRACTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "contracts"))
 CONTRACTS_DIR_BIN = os.path.join(CONTRACTS_DIR, "bin")
+CONTRACTS_DIR_CACHE = os.path.join(CONTRACTS_DIR_BIN, "cache")
+
+SOLC_FLAGS = ["--abi", "--bin", "--bin-runtime", "--optimize"]
+
+# maximal size (in bytes) of the code of a deployed contract, see EIP-170
+MAX_CONTRACT_SIZE = 24_576
+
+# applied to the estimated gas of a contract deployment
+DEPLOYMENT_GAS_MARGIN = 1.1
+
+# contract name -> directory with the compilation output (abi, bin) used by this process
+_contract_artifacts = {}
+# path of abi file -> parsed abi
+_abi_cache = {}
+# (path, size, mtime) of the compiler -> hash of the compiler binary
+_solc_hashes = {}
 
 w3 = None
 _buffered_accounts = None
@@ -22,10 +57,30 @@ STATUS_ERROR = 0
 
 send_rpc_mine_block_commands = True
 
+# endpoint of the Ethereum node (or e.g. of scripts/rpc-proxy.py), by default the local ports 7545 and 8545 are tried
+_rpc_url = os.environ.get("ETHDKG_RPC_URL")
+
 _polling_interval = 0.5  # set to e.g. 15 seconds in production / testing with a high number of nodes
 
 _poa = None
 
+# connection state and cached facts about the connected Ethereum node (e.g. client version, chain id)
+_connection_failed = False
+_node_info = {}
+
+# number of RPC requests issued, by method
+rpc_counts = collections.Counter()
+
+# accounts for which transactions are signed locally (see signing.py), by address
+_local_signers = {}
+
+# optional index of confirmed events shared by all processes on this host (see event_index.py)
+_event_index = None
+
+_subscription_uri = os.environ.get("ETHDKG_SUBSCRIPTION_URI")
+_block_watcher = None
+_block_watcher_lock = threading.Lock()
+
 
 def set_polling_interval(interval):
     global _polling_interval
@@ -37,17 +92,27 @@ def get_polling_interval():
 
 
 def connect(port=None, dev=None, poa=None):
-    global w3, _buffered_accounts, send_rpc_mine_block_commands, _poa
+    """ Returns the web3 instance, connects to the local Ethereum node if required.
+        Once connected, the connection (with its pool of keep-alive HTTP connections) is reused without further
+        checks, the liveness of the Ethereum node is only checked again after a request has failed.
+    """
+    global w3, _buffered_accounts, send_rpc_mine_block_commands, _poa, _connection_failed, _node_info
 
     if port is None:
         ports = [7545, 8545]
     else:
         ports = port
 
-    if w3 is None or not w3.isConnected():
+    if _rpc_url is not None and port is None:
+        endpoints = [_rpc_url]
+    else:
+        endpoints = [f"http://127.0.0.1:{p}" for p in ports]
+
+    if w3 is None or (_connection_failed and not _is_connected()):
         # large request timeout required for performance tests
-        for p in ports:
-            w3 = web3.Web3(web3.HTTPProvider(f"http://127.0.0.1:{p}", request_kwargs={"timeout": 60 * 1000}))
+        connected = False
+        for endpoint in endpoints:
+            w3 = web3.Web3(web3.HTTPProvider(endpoint, request_kwargs={"timeout": 60 * 1000}))
 
             if (_poa in [None, False]) and (poa or _poa):
                 # print("using poa mode")
@@ -55,19 +120,108 @@ def connect(port=None, dev=None, poa=None):
                 # w3.middleware_onion.inject(geth_poa_middleware, layer=0)
                 _poa = True
 
-            if w3.isConnected():
+            if _is_connected():
+                connected = True
                 if port is None:
-                    send_rpc_mine_block_commands = p == 7545
+                    send_rpc_mine_block_commands = endpoint == "http://127.0.0.1:7545"
                 break
+        assert connected, "Connecting to local Ethereum node failed!"
+
+        if "ethdkg_rpc_accounting" not in w3.middleware_onion:
+            w3.middleware_onion.add(_rpc_accounting_middleware, "ethdkg_rpc_accounting")
         _buffered_accounts = None
+        _node_info = {}
+    _connection_failed = False
 
     if dev:
         send_rpc_mine_block_commands = True
 
-    assert w3.isConnected(), "Connecting to local Ethereum node failed!"
     return w3
 
 
+def connect_eth_tester(num_accounts=10, gas_limit=12_000_000, vm_configuration=None):
+    """ Connects to an in-process EVM (eth-tester with the py-evm backend) instead of an Ethereum node, e.g. for
+        reproducible gas measurements without an external node. Requires the package eth-tester[py-evm], in the
+        version pinned in requirements.txt (later versions are incompatible with web3 5.0.2).
+        As with ganache, each transaction is mined in a block of its own and empty blocks are mined via evm_mine.
+        vm_configuration: the fork schedule of py-evm, e.g. ((0, IstanbulVM),), by default its latest fork is used
+    """
+    global w3, _buffered_accounts, send_rpc_mine_block_commands, _connection_failed, _node_info
+    from eth_tester import EthereumTester, PyEVMBackend
+
+    backend = PyEVMBackend(
+        PyEVMBackend._generate_genesis_params(overrides={"gas_limit": gas_limit}),
+        PyEVMBackend._generate_genesis_state(num_accounts=num_accounts),
+        vm_configuration=vm_configuration,
+    )
+    w3 = web3.Web3(web3.EthereumTesterProvider(EthereumTester(backend)))
+    w3.middleware_onion.add(_rpc_accounting_middleware, "ethdkg_rpc_accounting")
+    send_rpc_mine_block_commands = True
+    _buffered_accounts = None
+    _node_info = {}
+    _connection_failed = False
+    return w3
+
+
+def _is_connected():
+    rpc_counts["web3_clientVersion"] += 1  # used by web3's isConnected
+    return w3.isConnected()
+
+
+def _rpc_accounting_middleware(make_request, w3):
+    """ Counts the RPC requests by method and flags failed requests, so that the next call to connect()
+        checks the connection.
+    """
+
+    def middleware(method, params):
+        global _connection_failed
+        rpc_counts[method] += 1
+        try:
+            return make_request(method, params)
+        except (ConnectionError, requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            _connection_failed = True
+            raise
+
+    return middleware
+
+
+def rpc_summary():
+    """ Returns the number of RPC requests issued so far by this process, by method (most frequent first).
+    """
+    return rpc_counts.most_common()
+
+
+def client_version():
+    """ Returns the (cached) client version of the connected Ethereum node.
+    """
+    connect()
+    if "client_version" not in _node_info:
+        _node_info["client_version"] = w3.clientVersion
+    return _node_info["client_version"]
+
+
+def chain_id():
+    """ Returns the (cached) chain id of the connected Ethereum node.
+    """
+    connect()
+    if "chain_id" not in _node_info:
+        _node_info["chain_id"] = w3.eth.chainId
+    return _node_info["chain_id"]
+
+
+def set_connection_pool_size(pool_size):
+    """ Resizes the pool of keep-alive HTTP connections shared by all users of the web3 instance,
+        e.g. all sessions hosted within a single process.
+    """
+    w3 = connect()
+    if not isinstance(w3.provider, web3.HTTPProvider):
+        return
+    session = web3._utils.request._get_session(w3.provider.endpoint_uri)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+
 def get_account_address(account_idx=-1):
     global _buffered_accounts
     connect()
@@ -76,50 +230,149 @@ def get_account_address(account_idx=-1):
     return _buffered_accounts[account_idx]
 
 
+def add_local_account(private_key):
+    """ Registers an account (given by its private key) for which all transactions are signed locally,
+        using a locally managed nonce. Returns the address of the account.
+    """
+    signer = signing.LocalSigner(connect(), private_key, chain_id())
+    _local_signers[signer.address] = signer
+    return signer.address
+
+
+def get_local_signer(address):
+    return _local_signers.get(address)
+
+
+def resubmit_stuck_transactions():
+    """ Resubmits the pending transactions of locally signed accounts which are not included within a few blocks.
+    """
+    if _local_signers:
+        current = get_block_watcher().block_number
+        for signer in list(_local_signers.values()):
+            signer.resubmit_stuck_transactions(current)
+
+
 def compile_contract(contract_name: str):
-    return subprocess.check_output(
-        [
-            SOLC_PATH,
-            "--abi",
-            "--bin",
-            "--optimize",
-            "--overwrite",
-            "--output-dir",
-            CONTRACTS_DIR_BIN,
-            os.path.join(CONTRACTS_DIR, contract_name + ".sol"),
-        ]
-    ).decode()
-
-
-def load_contract(contract_name, str):
-    with open(os.path.join(CONTRACTS_DIR_BIN, contract_name + ".bin"), "r") as f:
-        contract_bin = f.read()
-    with open(os.path.join(CONTRACTS_DIR_BIN, contract_name + ".abi"), "r") as f:
-        contract_abi = f.read()
-    return contract_abi, contract_bin
+    """ Compiles the contract (from the contracts folder) unless the compilation output is already cached.
+        The cache key is derived from the source code, the compiler binary and the compiler flags, i.e. the compiler
+        is only invoked if any of them has changed. The output is also available in contracts/bin (as before).
+        Returns the output of the compiler (or a note that the cached output is used).
+        Raises a ValueError if the code of the contract exceeds the maximal contract size (see MAX_CONTRACT_SIZE).
+    """
+    key = _compilation_cache_key(contract_name)
+    cache_dir = os.path.join(CONTRACTS_DIR_CACHE, key)
+    compiler_output = f"using cached compilation output {os.path.relpath(cache_dir, CONTRACTS_DIR)}"
+    if not os.path.isdir(cache_dir):
+        os.makedirs(CONTRACTS_DIR_CACHE, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=CONTRACTS_DIR_CACHE)
+        try:
+            compiler_output = subprocess.check_output(
+                [SOLC_PATH, *SOLC_FLAGS, "--overwrite", "--output-dir", tmp_dir, _contract_source_path(contract_name)]
+            ).decode()
+            try:
+                os.rename(tmp_dir, cache_dir)
+            except OSError:
+                pass  # compiled concurrently by another process
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # keep the (latest) compilation output in contracts/bin, as used by scripts and other processes
+    for ext in [".abi", ".bin", ".bin-runtime"]:
+        src = os.path.join(cache_dir, contract_name + ext)
+        dst = os.path.join(CONTRACTS_DIR_BIN, contract_name + ext)
+        if not (os.path.exists(dst) and _read_file(dst) == _read_file(src)):
+            shutil.copyfile(src, dst)
+
+    _contract_artifacts[contract_name] = cache_dir
+    size = contract_size(contract_name)
+    if size > MAX_CONTRACT_SIZE:
+        raise ValueError(
+            f"the code of contract {contract_name} ({size} bytes) exceeds the maximal contract size "
+            f"({MAX_CONTRACT_SIZE} bytes, see EIP-170), it cannot be deployed"
+        )
+    return compiler_output
+
+
+def contract_size(contract_name: str) -> int:
+    """ Returns the size (in bytes) of the code of the compiled contract once it is deployed (i.e. without the code
+        of the constructor).
+    """
+    artifacts_dir = _contract_artifacts.get(contract_name, CONTRACTS_DIR_BIN)
+    return len(_read_file(os.path.join(artifacts_dir, contract_name + ".bin-runtime")).strip()) // 2
+
+
+def _compilation_cache_key(contract_name: str):
+    h = hashlib.sha256()
+    h.update(_read_file(_contract_source_path(contract_name)).encode())
+    h.update(_solc_hash().encode())
+    h.update(" ".join(SOLC_FLAGS).encode())
+    return f"{contract_name}-{h.hexdigest()[:16]}"
+
+
+def _solc_hash():
+    """ Hash of the compiler binary (instead of its version, which would require to invoke the compiler).
+    """
+    stat = os.stat(SOLC_PATH)
+    key = (SOLC_PATH, stat.st_size, stat.st_mtime)
+    if key not in _solc_hashes:
+        with open(SOLC_PATH, "rb") as f:
+            _solc_hashes[key] = hashlib.sha256(f.read()).hexdigest()
+    return _solc_hashes[key]
+
+
+def _contract_source_path(contract_name: str):
+    return os.path.join(CONTRACTS_DIR, contract_name + ".sol")
+
+
+def _read_file(path):
+    with open(path, "r") as f:
+        return f.read()
+
+
+def load_contract(contract_name):
+    """ Returns the (parsed) abi and the bytecode of the compiled contract.
+        Uses the compilation output of compile_contract if called by this process, otherwise the one in contracts/bin.
+    """
+    artifacts_dir = _contract_artifacts.get(contract_name, CONTRACTS_DIR_BIN)
+    return _load_contract_abi(contract_name), _read_file(os.path.join(artifacts_dir, contract_name + ".bin"))
+
+
+def _load_contract_abi(contract_name):
+    """ The parsed abi is kept in memory, e.g. for repeated calls to get_contract.
+    """
+    artifacts_dir = _contract_artifacts.get(contract_name, CONTRACTS_DIR_BIN)
+    abi_path = os.path.join(artifacts_dir, contract_name + ".abi")
+    if abi_path not in _abi_cache:
+        _abi_cache[abi_path] = json.loads(_read_file(abi_path))
+    return _abi_cache[abi_path]
 
 
 def deploy_contract(
     contract_name,
     deploying_account_address=None,
-    gas=6_000_000,
+    gas=None,
     should_add_simplified_call_interfaces=True,
     return_tx_receipt=False,
 ):  # , patch_api=True, return_tx_receipt=False):
     """ Deploys the compiled contract (from the ethdkg/contracts/bin folder) and
         returns the contract instance.
+        By default, the gas of the deployment is estimated (with a margin of DEPLOYMENT_GAS_MARGIN on top).
+        Raises a ValueError if the deployment fails (e.g. if it runs out of gas).
     """
     connect()
     if deploying_account_address is None:
         deploying_account_address = w3.eth.accounts[-1]
 
-    with open(os.path.join(CONTRACTS_DIR_BIN, contract_name + ".abi"), "r") as f_abi:
-        with open(os.path.join(CONTRACTS_DIR_BIN, contract_name + ".bin"), "r") as f_bin:
-            contract = w3.eth.contract(abi=f_abi.read(), bytecode=f_bin.read())
+    contract_abi, contract_bin = load_contract(contract_name)
+    contract = w3.eth.contract(abi=contract_abi, bytecode=contract_bin)
 
+    if gas is None:
+        gas = int(contract.constructor().estimateGas({"from": deploying_account_address}) * DEPLOYMENT_GAS_MARGIN)
     tx_hash = contract.constructor().transact({"from": deploying_account_address, "gas": gas})
     mine_block()
     tx_receipt = wait_for_tx_receipt(tx_hash)
+    if tx_receipt["status"] != STATUS_OK:
+        raise ValueError(f"deployment of contract {contract_name} failed (gas used: {tx_receipt['gasUsed']} of {gas})")
     contract = get_contract(contract_name, tx_receipt["contractAddress"], should_add_simplified_call_interfaces)
     if return_tx_receipt:
         return contract, tx_receipt
@@ -131,8 +384,8 @@ def get_contract(contract_name, contract_address, should_add_simplified_call_int
         if patch_api is set, all transactions are automatically syncronized, unless wait=False is specified in the tx
     """
     connect()
-    with open(os.path.join(CONTRACTS_DIR_BIN, contract_name + ".abi"), "r") as f_abi:
-        contract = w3.eth.contract(address=contract_address, abi=f_abi.read())
+    contract_abi = _load_contract_abi(contract_name)
+    contract = w3.eth.contract(address=contract_address, abi=contract_abi)
 
     if should_add_simplified_call_interfaces:
         add_simplified_call_interfaces(contract)
@@ -141,21 +394,187 @@ def get_contract(contract_name, contract_address, should_add_simplified_call_int
 
 
 def wait_for_tx_receipt(tx_hash):
-    while True:
-        try:
-            return get_tx_receipt(tx_hash)
-        except web3.exceptions.TransactionNotFound:
-            time.sleep(_polling_interval)
+    return wait_for_tx_receipts([tx_hash])[0]
+
+
+def wait_for_tx_receipts(tx_hashes):
+    """ Waits for the receipts of all given transactions and returns them (in the given order).
+    """
+    tx_hashes = list(tx_hashes)
+    receipts = dict(wait_for_receipts(tx_hashes))
+    return [receipts[tx_hash] for tx_hash in tx_hashes]
+
+
+def wait_for_receipts(tx_hashes):
+    """ Yields the tuples (tx_hash, receipt) for all given transactions, in the order of their confirmation.
+        See ReceiptWaiter, an asyncio variant is provided by AsyncEthNode.wait_for_receipts.
+    """
+    waiter = ReceiptWaiter(tx_hashes)
+    yield from waiter.poll()
+    watcher = get_block_watcher()
+    while waiter.outstanding:
+        # the timeout serves as safeguard in case the block watcher misses a block
+        current = watcher.wait_for_new_block(waiter.checked_block, timeout=_polling_interval)
+        resubmit_stuck_transactions()
+        yield from waiter.poll(current)
+
+
+# maximal number of new blocks which are searched for the outstanding transactions,
+# if more blocks were mined since the last check, all outstanding receipts are queried directly
+RECEIPTS_MAX_BLOCKS_TO_SCAN = 8
+
+
+class ReceiptWaiter:
+    """ Keeps track of the outstanding receipts of a set of transactions.
+        With each new block, only the transactions included in the new blocks (according to the block bodies) are
+        queried, all other receipts are queried at once using a single JSON-RPC batch request (for HTTP providers).
+    """
+
+    def __init__(self, tx_hashes):
+        self.outstanding = list(dict.fromkeys(tx_hashes))
+        self.checked_block = None  # all blocks up to this one were checked for outstanding transactions
+
+    def poll(self, current_block_number=None):
+        """ Returns the tuples (tx_hash, receipt) for all transactions confirmed since the last call.
+            If the current block number is given and only a few blocks were added since the last call,
+            only the transactions included in these blocks are queried.
+        """
+        if current_block_number is None:
+            current_block_number = get_block_watcher().block_number
+        candidates = self.outstanding
+        new_blocks = current_block_number - self.checked_block if self.checked_block is not None else None
+        if new_blocks is not None and 0 < new_blocks <= RECEIPTS_MAX_BLOCKS_TO_SCAN:
+            included = set()
+            for b in range(self.checked_block + 1, current_block_number + 1):
+                included.update(bytes(tx_hash) for tx_hash in w3.eth.getBlock(b).transactions)
+            candidates = [h for h in self.outstanding if any(bytes(c) in included for c in _tx_hash_candidates(h))]
+        self.checked_block = current_block_number
+
+        receipts = get_tx_receipts(candidates) if candidates else {}
+        self.outstanding = [h for h in self.outstanding if h not in receipts]
+        return [(h, receipts[h]) for h in candidates if h in receipts]
+
+
+def _tx_hash_candidates(tx_hash):
+    """ The hashes under which the given transaction may be included (resubmissions of locally signed transactions).
+    """
+    for signer in _local_signers.values():
+        if signer.is_tracked(tx_hash):
+            return signer.get_tx_hashes(tx_hash)
+    return [tx_hash]
+
+
+def get_tx_receipts(tx_hashes):
+    """ Returns the receipts of all given transactions which are already included as dict tx_hash -> receipt.
+        For HTTP providers, all receipts are requested with a single JSON-RPC batch request.
+    """
+    connect()
+    receipts = {}
+    batch = []
+    use_batch = len(tx_hashes) > 1 and isinstance(w3.provider, web3.HTTPProvider)
+    for tx_hash in tx_hashes:
+        if use_batch and _tx_hash_candidates(tx_hash) == [tx_hash]:
+            batch.append(tx_hash)
+        else:
+            try:
+                receipts[tx_hash] = get_tx_receipt(tx_hash)
+            except web3.exceptions.TransactionNotFound:
+                pass
+
+    if batch:
+        results = _batch_request("eth_getTransactionReceipt", [[web3.Web3.toHex(h)] for h in batch])
+        for tx_hash, result in zip(batch, results):
+            if result is not None:
+                receipts[tx_hash] = AttributeDict.recursive(receipt_formatter(result))
+                _observe_receipt(tx_hash, receipts[tx_hash])
+    return receipts
+
+
+def _batch_request(method, params_list):
+    """ Sends a JSON-RPC batch request (HTTP providers only) invoking the given method once for each list of params,
+        returns the results in the same order.
+    """
+    global _connection_failed
+    payload = json.dumps(
+        [{"jsonrpc": "2.0", "id": i, "method": method, "params": params} for i, params in enumerate(params_list)]
+    )
+    rpc_counts[method] += len(params_list)
+    rpc_counts["(batch requests)"] += 1
+    try:
+        response = web3._utils.request.make_post_request(
+            w3.provider.endpoint_uri, payload, **w3.provider.get_request_kwargs()
+        )
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+        _connection_failed = True
+        raise
+    responses = {r["id"]: r for r in json.loads(response)}
+    results = []
+    for i in range(len(params_list)):
+        if "error" in responses[i]:
+            raise ValueError(responses[i]["error"])
+        results.append(responses[i]["result"])
+    return results
 
 
 def get_tx_receipt(tx_hash):
     connect()
-    return w3.eth.getTransactionReceipt(tx_hash)
+    signer = next((s for s in _local_signers.values() if s.is_tracked(tx_hash)), None)
+    if signer is not None:
+        tx_receipt = signer.get_tx_receipt(tx_hash)
+    else:
+        tx_receipt = w3.eth.getTransactionReceipt(tx_hash)
+    _observe_receipt(tx_hash, tx_receipt)
+    return tx_receipt
+
+
+def _observe_receipt(tx_hash, tx_receipt):
+    gas_model.observe_receipt(tx_hash, tx_receipt)
+    gas_pricing.observe_receipt(tx_hash, tx_receipt)
 
 
 def wait_for_block(target_block_number):
-    while block_number() < target_block_number:
-        time.sleep(_polling_interval)
+    if block_number() < target_block_number:
+        get_block_watcher().wait_for_block(target_block_number)
+
+
+def wait_for_new_block(current_block_number=None):
+    """ Waits until a block after the given (by default the latest) block is available,
+        returns the new block number.
+    """
+    return get_block_watcher().wait_for_new_block(current_block_number)
+
+
+def set_subscription_uri(uri):
+    """ Sets the WebSocket or IPC endpoint used to subscribe to new blocks, must be called before the first wait.
+        By default, the endpoint is derived from the provider (for HTTP, the WebSocket endpoint on the same port).
+    """
+    global _subscription_uri
+    _subscription_uri = uri
+
+
+def get_block_watcher():
+    """ Returns the (single) block watcher of this process, which notifies all waiters about new blocks.
+    """
+    global _block_watcher
+    with _block_watcher_lock:
+        if _block_watcher is None:
+            connect()
+            _block_watcher = blocks.BlockWatcher(block_number, _get_subscription_uri(), get_polling_interval)
+            _block_watcher.start()
+        return _block_watcher
+
+
+def _get_subscription_uri():
+    if _subscription_uri is not None:
+        return _subscription_uri
+    if isinstance(w3.provider, web3.IPCProvider):
+        return str(w3.provider.ipc_path)
+    if isinstance(w3.provider, web3.WebsocketProvider):
+        return w3.provider.endpoint_uri
+    if isinstance(w3.provider, web3.HTTPProvider) and w3.provider.endpoint_uri.startswith("http"):
+        # e.g. ganache serves HTTP and WebSocket requests on the same port
+        return "ws" + w3.provider.endpoint_uri[len("http") :]
+    return None
 
 
 class FailedTxReceipt:
@@ -176,6 +595,26 @@ class SimplifiedCallInterfaceCall:
         self._func = _func
         self.args = args
         self.kwargs = kwargs
+        self.gas_model_key = None
+        self.deadline = None
+        self.phase_start = None
+
+    def with_gas_model(self, n=None, t=None):
+        """ Uses the gas limit predicted by the gas model (see gas_model.py) for the given number of nodes and
+            threshold instead of estimating the gas, the gas consumption of the transaction refines the model.
+        """
+        self.gas_model_key = (self._func.fn_name, n, t)
+        return self
+
+    def with_deadline(self, deadline, phase_start=None):
+        """ The transaction must be included until the given block number (inclusive), its gas price is raised as the
+            deadline approaches, counted from the first block of the phase (by default from the submission), see
+            gas_pricing.py. Only locally signed transactions are resubmitted with a higher price while they are pending.
+            The inclusion latency is recorded for the called function.
+        """
+        self.deadline = deadline
+        self.phase_start = phase_start
+        return self
 
     def call_sync(self, caller_account_address=None):
         if caller_account_address is None:
@@ -185,14 +624,38 @@ class SimplifiedCallInterfaceCall:
             mine_block()
             return wait_for_tx_receipt(tx_hash)
         except ValueError as e:
-            if "revert" in e.args[0]["message"]:
+            if _is_revert_error(e):
                 return FailedTxReceipt()
             raise e
 
     def call_async(self, caller_account_address=None):
         if caller_account_address is None:
             caller_account_address = get_account_address()
-        tx_hash = self._func(*self.args, **self.kwargs).transact({"from": caller_account_address})
+        tx_params = {"from": caller_account_address}
+        if self.gas_model_key is not None:
+            gas = gas_model.gas_limit(*self.gas_model_key)
+            if gas is not None:
+                tx_params["gas"] = gas  # no eth_estimateGas required
+        signer = _local_signers.get(caller_account_address)
+        submitted_at = None
+        if self.deadline is not None or signer is not None:
+            submitted_at = get_block_watcher().block_number
+        if self.deadline is not None:
+            start = submitted_at if self.phase_start is None else min(self.phase_start, submitted_at)
+            suggested_price = w3.eth.generateGasPrice() or w3.eth.gasPrice
+            tx_params["gasPrice"] = gas_pricing.gas_price(suggested_price, start, self.deadline, submitted_at)
+
+        if signer is None:
+            tx_hash = self._func(*self.args, **self.kwargs).transact(tx_params)
+        else:
+            # the nonce is assigned by the signer, gas limit and gas price are determined as for eth_sendTransaction
+            tx = self._func(*self.args, **self.kwargs).buildTransaction(dict(tx_params, chainId=signer.chain_id))
+            tx_hash = signer.send_transaction(tx, submitted_at, self.deadline, self.phase_start)
+
+        if self.gas_model_key is not None:
+            gas_model.track(tx_hash, *self.gas_model_key)
+        if self.deadline is not None:
+            gas_pricing.track(tx_hash, self._func.fn_name, submitted_at, self.deadline)
         return tx_hash
 
     def call(self, caller_account_address=None, sync=True):
@@ -200,6 +663,38 @@ class SimplifiedCallInterfaceCall:
             return self.call_sync(caller_account_address)
         return self.call_async(caller_account_address)
 
+    def estimate_gas(self, caller_account_address=None):
+        """ Returns the gas consumption of the call (eth_estimateGas) without sending a transaction.
+        """
+        if caller_account_address is None:
+            caller_account_address = get_account_address()
+        return self._func(*self.args, **self.kwargs).estimateGas({"from": caller_account_address})
+
+
+def transact_all(calls, caller_account_address=None, sync=True):
+    """ Sends the transactions for all given calls (a dict of SimplifiedCallInterfaceCalls) at once.
+        If sync is set, waits for all receipts together and returns them, otherwise returns the transaction hashes
+        (both as dict with the keys of the given calls).
+    """
+    results = {}
+    for key, call in calls.items():
+        try:
+            results[key] = call.call_async(caller_account_address)
+        except ValueError as e:
+            if not (sync and _is_revert_error(e)):
+                raise e
+            results[key] = FailedTxReceipt()
+    if sync:
+        tx_hashes = {key: tx_hash for key, tx_hash in results.items() if not isinstance(tx_hash, FailedTxReceipt)}
+        mine_block()
+        results.update(zip(tx_hashes.keys(), wait_for_tx_receipts(tx_hashes.values())))
+    return results
+
+
+def _is_revert_error(e: ValueError):
+    error = e.args[0] if e.args else None
+    return isinstance(error, dict) and "revert" in error.get("message", "")
+
 
 def add_simplified_call_interfaces(contract):
     fn_names = []
@@ -214,10 +709,97 @@ def add_simplified_call_interfaces(contract):
         setattr(contract, fn_name, SimplifiedCallInterface(contract, fn_name))
 
 
+# initial / maximal number of blocks covered by a single eth_getLogs request
+LOGS_CHUNK_SIZE = 2_000
+LOGS_MAX_CHUNK_SIZE = 100_000
+
+# error messages used by different clients and providers if a eth_getLogs request covers too many blocks or logs
+# (kept specific, as e.g. rate limit errors "rate limit exceeded" or "too many requests" must not shrink the chunks)
+_LOGS_RESULT_TOO_LARGE_ERRORS = [
+    "query returned more than",  # geth, infura: "query returned more than 10000 results"
+    "response size exceeded",  # alchemy: "log response size exceeded"
+    "block range",  # e.g. "exceed maximum block range: 5000", "block range is too wide", "block range too large"
+    "too many logs",
+    "too many results",
+]
+
+
+def set_event_index(path, confirmations=0):
+    """ Uses the event index at the given path (shared with other processes on this host) for all logs which are
+        at least the given number of blocks below the latest block, see event_index.py.
+    """
+    global _event_index
+    _event_index = event_index.EventIndex(path, confirmations) if path else None
+
+
+def get_event_index():
+    return _event_index
+
+
+def get_events(event, from_block, to_block=None, chunk_size=LOGS_CHUNK_SIZE):
+    """ Yields the decoded events of the given type (e.g. contract.events.ShareDistribution),
+        emitted within the blocks from_block to to_block (inclusive; by default the latest block).
+    """
+    event_abi = event._get_event_abi()
+    for log in get_logs(event, from_block, to_block, chunk_size):
+        yield get_event_data(event_abi, log)
+
+
+def get_logs(event, from_block, to_block=None, chunk_size=LOGS_CHUNK_SIZE):
+    """ Yields the raw (undecoded) logs of the given event type, see get_events.
+        If an event index is set (see set_event_index), confirmed logs are read from the index.
+    """
+    connect()
+    latest = block_number() if to_block is None or _event_index is not None else None
+    if to_block is None:
+        to_block = latest
+
+    if _event_index is None:
+        yield from _fetch_logs(event, from_block, to_block, chunk_size)
+    else:
+        yield from _event_index.get_logs(
+            event.address,
+            event_abi_to_log_topic(event._get_event_abi()).hex(),
+            from_block,
+            to_block,
+            latest,
+            get_block_hash,
+            lambda start, end: _fetch_logs(event, start, end, chunk_size),
+        )
+
+
+def _fetch_logs(event, from_block, to_block, chunk_size=LOGS_CHUNK_SIZE):
+    """ Queries the logs from the Ethereum node in chunks of adaptive size: a chunk is split in half if the provider
+        rejects the request as too large, and the chunk size grows again after each successful request, but not beyond
+        half of the smallest rejected size.
+    """
+    topic = event_abi_to_log_topic(event._get_event_abi())
+    start = max(from_block, 0)
+    max_chunk_size = LOGS_MAX_CHUNK_SIZE
+    while start <= to_block:
+        end = min(start + chunk_size - 1, to_block)
+        try:
+            logs = w3.eth.getLogs({"address": event.address, "topics": [topic], "fromBlock": start, "toBlock": end})
+        except ValueError as e:
+            if end > start and _is_logs_result_too_large_error(e):
+                chunk_size = max_chunk_size = (end - start + 1) // 2
+                continue
+            raise
+        yield from logs
+        start = end + 1
+        chunk_size = min(chunk_size * 2, max_chunk_size)
+
+
+def _is_logs_result_too_large_error(e: ValueError):
+    error = e.args[0] if e.args else None
+    message = error.get("message", "") if isinstance(error, dict) else str(error)
+    return any(m in message.lower() for m in _LOGS_RESULT_TOO_LARGE_ERRORS)
+
+
 def mine_block():
     connect()
     if send_rpc_mine_block_commands:
-        if "parity" in w3.clientVersion.lower():
+        if "parity" in client_version().lower():
             w3.eth.sendTransaction({"to": w3.eth.accounts[-1], "from": w3.eth.accounts[-1], "value": 1})
         else:
             w3.provider.make_request("evm_mine", params="")
@@ -240,6 +822,13 @@ def block_number():
     return w3.eth.blockNumber
 
 
+def get_block_hash(block_number):
+    """ Returns the hash (as hex string) of the block with the given number in the current chain.
+    """
+    connect()
+    return w3.eth.getBlock(block_number).hash.hex()
+
+
 def set_gas_price_strategy(strategy_or_price_in_gwei):
     connect()
     if isinstance(strategy_or_price_in_gwei, int) or isinstance(strategy_or_price_in_gwei, float):
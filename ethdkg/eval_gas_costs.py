@@ -1,10 +1,11 @@
-import time
 import math
 import collections
 
 from .node import Node, INVALID_SHARE
-from .ethnode import EthNode, point_to_eth, point_G2_to_eth, point_from_eth, point_G2_from_eth
+from .ethnode import EthNode, get_parameters, get_registrations
+from .ethnode import point_to_eth, point_G2_to_eth, point_from_eth, point_G2_from_eth
 from .adversary import Adversary_SendInvalidShares
+from . import events
 from . import utils
 from .utils import STATUS_OK, STATUS_ERROR
 
@@ -21,6 +22,7 @@ contract = None
 nodes = None
 stats = None
 num_nodes = None
+num_adversaries = None
 
 
 def print_stats(name, label, txs, min_for_duplicate=False):
@@ -40,35 +42,39 @@ def print_stats(name, label, txs, min_for_duplicate=False):
         stats[name + ", duplicate"].append(gas_min)
 
 
-def init(n=5):
-    global contract, nodes, num_nodes
+def init(n=5, adversaries=1, compressed=False):
+    """ adversaries: number of nodes sending invalid shares, the first three nodes dispute all of them
+        compressed: commitments are sent in compressed form, see EthNode.compressed_commitments
+    """
+    global contract, nodes, num_nodes, num_adversaries
     num_nodes = n
+    num_adversaries = adversaries
 
     utils.compile_contract("ETHDKG")
     contract = utils.deploy_contract("ETHDKG")
 
     print(f"contract deployed at: {contract.address}")
-    assert contract.caller.DELTA_INCLUDE() > n
+    params = get_parameters(contract)
+    assert params.DELTA_INCLUDE > n
 
     print(f"initializing nodes (0/{n})...")
 
     nodes = []
-    for i in range(n - 1):
+    for i in range(n - adversaries):
         nodes.append(EthNode(utils.get_account_address(i), contract))
         print_replace(f"initializing nodes ({i+1}/{n})...")
 
-    # last node sends invalid shares
-    nodes.append(
-        Adversary_SendInvalidShares(
-            utils.get_account_address(n - 1), contract, targets=[node.address for node in nodes[:3]]
-        )
-    )
-    print_replace(f"initializing nodes ({n}/{n})...")
+    # last node(s) send invalid shares
+    targets = [node.address for node in nodes[:3]]
+    for i in range(n - adversaries, n):
+        nodes.append(Adversary_SendInvalidShares(utils.get_account_address(i), contract, targets=targets))
+        print_replace(f"initializing nodes ({i+1}/{n})...")
 
     for node in nodes[3:]:
         node._disable_share_verification = True
 
     for node in nodes:
+        node.compressed_commitments = compressed
         node._disable_dispute_verification = True
         node._disable_key_share_verification = True
         node._disable_recovery_share_verification = True
@@ -78,6 +84,18 @@ def print_replace(text):
     print(f"\033[F{text}")
 
 
+def estimate_commitment_formats(label, call):
+    """ Records the gas consumption of the call returned by call(compressed) for both formats of the commitments
+        (estimated, as only one of them can be executed).
+    """
+    print()
+    for compressed, fmt in [(False, "uncompressed"), (True, "compressed")]:
+        gas = call(compressed).estimate_gas(nodes[0].address)
+        print(f"gas consumption for {label} with {fmt} commitments (estimated): {gas}")
+        stats[f"{label}, {fmt} commitments (estimated)"].append(gas)
+    print()
+
+
 def registration(batch_size=25):
     print(f"running registration (0/{len(nodes)})...")
 
@@ -85,12 +103,10 @@ def registration(batch_size=25):
     for i in range(0, len(nodes), batch_size):
         batch = nodes[i : i + batch_size]
         batch_txs = [node.register(sync=False) for node in batch]
-        time.sleep(1)
         utils.mine_block()
-        batch_tx_receipts = [utils.get_tx_receipt(tx) for tx in batch_txs]
-        assert None not in batch_tx_receipts
-        txs += batch_tx_receipts
-        print_replace(f"running registration ({i + len(batch)}/{len(nodes)})...")
+        for _, tx_receipt in utils.wait_for_receipts(batch_txs):
+            txs.append(tx_receipt)
+            print_replace(f"running registration ({len(txs)}/{len(nodes)})...")
 
     print_stats("registration", f"gas consumption for registration transaction", txs)
     utils.mine_until_registrations_confirmed(contract)
@@ -99,16 +115,10 @@ def registration(batch_size=25):
 def setup():
     print(f"running setup (0/{len(nodes)})...")
 
-    n = len(nodes)
+    addresses, public_keys = get_registrations(contract)
+    n = len(addresses)
     t = math.ceil(n / 2) - 1
 
-    addresses = [contract.caller.addresses(i) for i in range(n)]
-    public_keys = {
-        int(addr, 16): point_from_eth((contract.caller.public_keys(addr, 0), contract.caller.public_keys(addr, 1)))
-        for addr in addresses
-    }
-    addresses = {int(addr, 16): addr for addr in addresses}
-
     for i, node in enumerate(nodes):
         node.n = n
         node.t = t
@@ -121,6 +131,14 @@ def setup():
 def share_distribution():
     global nodes
 
+    encrypted_shares, commitments = nodes[0].compute_shares()
+    estimate_commitment_formats(
+        "share distribution",
+        lambda compressed: nodes[0]._share_distribution_call(
+            list(encrypted_shares.values()), commitments, compressed
+        ),
+    )
+
     txs = []
     print(f"running share distribution (0/{len(nodes)})...")
     for i, node in enumerate(nodes):
@@ -133,40 +151,72 @@ def share_distribution():
     utils.mine_until_share_distribution_confirmed(contract)
 
     print(f"processing incomming shares (0/{len(nodes)})...")
-    events = contract.events.ShareDistribution.createFilter(fromBlock=0).get_all_entries()
-    for i, e in enumerate(events):
-        issuer = int(e.args.issuer, 16)
+    distributions = list(
+        events.get_share_distributions(
+            contract.events.ShareDistribution,
+            get_parameters(contract).T_REGISTRATION_END + 1,
+            get_parameters(contract).T_SHARE_DISTRIBUTION_END,
+        )
+    )
+    for i, d in enumerate(distributions):
+        issuer = d.issuer
         receivers = (node for node in nodes[0].nodes if node != issuer)
-        encrypted_shares = dict(zip(receivers, e.args.encrypted_shares))
-        commitments = [point_from_eth(p) for p in e.args.commitments]
+        encrypted_shares = dict(zip(receivers, d.encrypted_shares))
+        commitments = [point_from_eth(p) for p in d.commitments]
         for node in nodes:
             if issuer == node.idx:
                 continue
             super(EthNode, node).load_shares(issuer, encrypted_shares, commitments)
         print_replace(f"processing incomming shares ({i + 1}/{len(nodes)})...")
 
-    assert nodes[0].decrypted_shares[nodes[-1].idx] == INVALID_SHARE
-    nodes = nodes[:-1]
-    print(f"\nstopping adversary node which sent invalid shares, {len(nodes)} nodes remaining\n")
+    for adversary in nodes[-num_adversaries:]:
+        assert nodes[0].decrypted_shares[adversary.idx] == INVALID_SHARE
+    nodes = nodes[:-num_adversaries]
+    print(f"\nstopping adversary node(s) which sent invalid shares, {len(nodes)} nodes remaining\n")
+
 
+def disputes(batch=True):
+    dispute_arguments = next(iter(nodes[0]._dispute_arguments(nodes[0].compute_disputes()).values()))
+    estimate_commitment_formats("dispute", lambda compressed: nodes[0]._dispute_call(dispute_arguments, compressed))
+
+    if num_adversaries > 1:
+        # only one of both variants can be executed, the gas for individual disputes is estimated
+        node = nodes[0]
+        gas = [
+            node.contract.submit_dispute(*args).estimate_gas(node.address)
+            for args in node._dispute_arguments(node.compute_disputes()).values()
+        ]
+        print(f"\ngas consumption for {len(gas)} individual dispute transactions (estimated): {sum(gas)}\n")
+        stats[f"dispute, {len(gas)} individual transactions"].append(sum(gas))
 
-def disputes(batch_size=1):
     txs = []
     print(f"running disputes (0/{len(nodes)})...")
     for i, node in enumerate(nodes):
-        tx_receipts = list(node.submit_disputes(sync=True).values())
+        tx_receipts = {r.transactionHash: r for r in node.submit_disputes(sync=True, batch=batch).values()}
+        tx_receipts = list(tx_receipts.values())  # a batch of disputes shares a single receipt
         for tx_receipt in tx_receipts:
             assert tx_receipt.status == STATUS_OK
         txs += tx_receipts
         print_replace(f"running disputes ({i + 1}/{len(nodes)})...")
 
-    print_stats("dispute", f"gas consumption for dispute transaction", txs)
+    if batch and num_adversaries > 1:
+        print_stats(
+            f"dispute, batch of {num_adversaries}", f"gas consumption for batched dispute transaction", txs, True
+        )
+    else:
+        print_stats("dispute", f"gas consumption for dispute transaction", txs)
     utils.mine_until_disputes_confirmed(contract)
 
     for tx_receipt in txs:
         assert tx_receipt.status == STATUS_OK
 
-    events = contract.events.Dispute.createFilter(fromBlock=0).get_all_entries()
+    events = list(
+        utils.get_events(
+            contract.events.Dispute,
+            get_parameters(contract).T_SHARE_DISTRIBUTION_END + 1,
+            get_parameters(contract).T_DISPUTE_END,
+        )
+    )
     print(f"processing incomming disputes (0/{len(events)})...")
     for i, e in enumerate(events):
         issuer_idx = int(e.args.issuer, 16)
@@ -199,7 +249,7 @@ def key_derivation(stop_max=False):
     print_stats("key share submission", f"gas consumption for key share submission", txs)
     utils.mine_until_key_share_submission_confirmed(contract)
 
-    events = contract.events.KeyShareSubmission.createFilter(fromBlock=0).get_all_entries()
+    events = list(utils.get_events(contract.events.KeyShareSubmission, get_parameters(contract).T_DISPUTE_END + 1))
     print(f"processing incomming key share submission (0/{len(events)})...")
     for i, e in enumerate(events):
         issuer = int(e.args.issuer, 16)
@@ -224,6 +274,7 @@ def key_derivation_recovery():
     print_stats("key share recovery", f"gas consumption for key share recovery", txs)
 
     print("loading and executing eventual key share recovery...")
+    utils.mine_blocks(get_parameters(contract).DELTA_CONFIRM + 1)
     nodes[0].load_recovered_key_shares()
     nodes[1].load_recovered_key_shares()
     txs0 = nodes[0].submit_recovered_key_shares(sync=True)
@@ -246,17 +297,17 @@ def key_derivation_recovery():
     stats["master key submission, duplicate"].append(tx1.gasUsed)
 
 
-def run(n=5, stop_max=False):
+def run(n=5, stop_max=False, adversaries=1, batch_disputes=True, compressed=False):
     global stats
     if stats is None:
         stats = collections.defaultdict(list)
 
     print(f"\n\n{'='*80}\nRUNNING EVALUATION FOR N={n}\n")
-    init(n)
+    init(n, adversaries, compressed)
     registration()
     setup()
     share_distribution()
-    disputes()
+    disputes(batch_disputes)
     key_derivation(stop_max=stop_max)
     key_derivation_recovery()
 
@@ -268,14 +319,51 @@ def run(n=5, stop_max=False):
     print()
 
 
-def run_all(N=[8, 16, 32, 64, 128, 192, 256, 384, 512], stop_max=True):
-
+def run_all(N=[8, 16, 32, 64, 128, 192, 256, 384, 512], stop_max=True, adversaries=3):
+    """ adversaries: number of nodes sending invalid shares in each run, with more than one of them the disputes are
+        submitted as a single batched transaction, which is compared against individual dispute transactions
+    """
     for n in N:
-        run(n, stop_max)
+        run(n, stop_max, adversaries)
 
     print("=" * 80)
     print("=" * 80)
     print()
     print(N)
     print(stats)
-
+    print()
+    print_scaling(N, ["key share submission", "recovered key share submission", "master key submission"])
+    print_commitment_formats(N, ["share distribution", "dispute"])
+    if adversaries > 1:
+        print_scaling(N, [f"dispute, batch of {adversaries}", f"dispute, {adversaries} individual transactions"])
+
+
+def print_scaling(N, names):
+    """ Prints the gas consumption of the given transactions for each evaluated n,
+        and the average increase per additional node between the smallest and largest n.
+    """
+    for name in names:
+        gas = stats[name]
+        print(f"{name}:")
+        for n, gas_used in zip(N, gas):
+            print(f"    n={n:<5} {gas_used}")
+        if len(gas) > 1:
+            print(f"    per additional node: {(gas[-1] - gas[0]) / (N[len(gas) - 1] - N[0]):.1f}")
+        print()
+
+
+def print_commitment_formats(N, labels):
+    """ Prints the (estimated) gas consumption of the given transactions with uncompressed and compressed commitments
+        for each evaluated n, i.e. the tradeoff between calldata and decompression in the contract.
+    """
+    for label in labels:
+        print(f"{label}:")
+        uncompressed = stats[f"{label}, uncompressed commitments (estimated)"]
+        compressed = stats[f"{label}, compressed commitments (estimated)"]
+        for n, gas_uncompressed, gas_compressed in zip(N, uncompressed, compressed):
+            cheaper = "compressed" if gas_compressed < gas_uncompressed else "uncompressed"
+            print(
+                f"    n={n:<5} uncompressed: {gas_uncompressed}, compressed: {gas_compressed} "
+                f"(difference: {gas_compressed - gas_uncompressed:+}, {cheaper} is cheaper)"
+            )
+        print()
@@ -0,0 +1,173 @@
+""" Local on-disk index of contract events, shared by all node processes running on the same host.
+
+    Without the index, each node process downloads the same logs (e.g. all n ShareDistribution events of O(n) size
+    each) from the Ethereum node. With the index (an SQLite database), the first process querying a block range
+    fetches the logs and stores them, all other processes read them from the index. The processes coordinate via the
+    database's write lock: a process which does not find the range in the index takes the lock, checks again (another
+    process may have filled it in the meantime) and only then fetches the logs.
+
+    Only ranges which are confirmed (at least `confirmations` blocks below the latest block) are indexed.
+    As a safeguard against deeper reorgs, the hash of the last block of an indexed range is stored and compared
+    against the current chain on each read: if it differs, the range is removed from the index and fetched again.
+"""
+
+import json
+import sqlite3
+import threading
+
+from typing import Callable, Iterator, List, Optional
+
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+
+# the fetching process holds the write lock while downloading the logs, the other processes wait for it
+LOCK_TIMEOUT = 600.0
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS ranges (
+        contract TEXT NOT NULL,
+        topic TEXT NOT NULL,
+        from_block INTEGER NOT NULL,
+        to_block INTEGER NOT NULL,
+        to_block_hash TEXT NOT NULL,
+        PRIMARY KEY (contract, topic, from_block, to_block)
+    );
+    CREATE TABLE IF NOT EXISTS logs (
+        contract TEXT NOT NULL,
+        topic TEXT NOT NULL,
+        block_number INTEGER NOT NULL,
+        log_index INTEGER NOT NULL,
+        log TEXT NOT NULL,
+        PRIMARY KEY (contract, topic, block_number, log_index)
+    );
+"""
+
+
+class EventIndex:
+    def __init__(self, path: str, confirmations: int = 0):
+        """ path: file of the SQLite database (created if required)
+            confirmations: number of blocks a range must be below the latest block to be indexed
+        """
+        self.path = path
+        self.confirmations = confirmations
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # the connection is shared by all threads (e.g. sessions) of the process
+        self._db = sqlite3.connect(path, timeout=LOCK_TIMEOUT, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def get_logs(
+        self,
+        contract: str,
+        topic: str,
+        from_block: int,
+        to_block: int,
+        latest_block: int,
+        get_block_hash: Callable[[int], str],
+        fetch_logs: Callable[[int, int], Iterator[dict]],
+    ) -> List[dict]:
+        """ Returns the logs of the given contract and topic within from_block and to_block (inclusive).
+            get_block_hash(block_number) and fetch_logs(from_block, to_block) query the Ethereum node.
+        """
+        if to_block > latest_block - self.confirmations:
+            # not yet confirmed, subject to reorgs
+            return list(fetch_logs(from_block, to_block))
+        with self._lock:
+            return self._get_logs(contract, topic, from_block, to_block, get_block_hash, fetch_logs)
+
+    def _get_logs(self, contract, topic, from_block, to_block, get_block_hash, fetch_logs):
+        logs = self._lookup(contract, topic, from_block, to_block, get_block_hash)
+        if logs is not None:
+            self.hits += 1
+            return logs
+
+        self._db.execute("BEGIN IMMEDIATE")  # blocks until other processes have completed their updates
+        try:
+            logs = self._lookup(contract, topic, from_block, to_block, get_block_hash)
+            if logs is None:
+                self.misses += 1
+                logs = list(fetch_logs(from_block, to_block))
+                self._store(contract, topic, from_block, to_block, get_block_hash(to_block), logs)
+            else:
+                self.hits += 1
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return logs
+
+    def _lookup(self, contract, topic, from_block, to_block, get_block_hash) -> Optional[List[dict]]:
+        row = self._db.execute(
+            "SELECT from_block, to_block, to_block_hash FROM ranges "
+            "WHERE contract = ? AND topic = ? AND from_block <= ? AND to_block >= ? LIMIT 1",
+            (contract, topic, from_block, to_block),
+        ).fetchone()
+        if row is None:
+            return None
+        range_from, range_to, range_hash = row
+        if get_block_hash(range_to) != range_hash:
+            self._invalidate(contract, topic, range_from, range_to)
+            return None
+        rows = self._db.execute(
+            "SELECT log FROM logs WHERE contract = ? AND topic = ? AND block_number BETWEEN ? AND ? "
+            "ORDER BY block_number, log_index",
+            (contract, topic, from_block, to_block),
+        )
+        return [_deserialize_log(log) for log, in rows]
+
+    def _store(self, contract, topic, from_block, to_block, to_block_hash, logs):
+        # logs of an overlapping (e.g. invalidated) range may be outdated
+        self._db.execute(
+            "DELETE FROM logs WHERE contract = ? AND topic = ? AND block_number BETWEEN ? AND ?",
+            (contract, topic, from_block, to_block),
+        )
+        self._db.execute(
+            "INSERT OR REPLACE INTO ranges VALUES (?, ?, ?, ?, ?)",
+            (contract, topic, from_block, to_block, to_block_hash),
+        )
+        self._db.executemany(
+            "INSERT OR REPLACE INTO logs VALUES (?, ?, ?, ?, ?)",
+            [(contract, topic, log["blockNumber"], log["logIndex"], _serialize_log(log)) for log in logs],
+        )
+
+    def _invalidate(self, contract, topic, from_block, to_block):
+        """ Removes a range (and its logs) which is no longer part of the chain.
+        """
+        in_transaction = self._db.in_transaction
+        if not in_transaction:
+            self._db.execute("BEGIN IMMEDIATE")
+        self._db.execute(
+            "DELETE FROM ranges WHERE contract = ? AND topic = ? AND to_block >= ?", (contract, topic, from_block)
+        )
+        self._db.execute(
+            "DELETE FROM logs WHERE contract = ? AND topic = ? AND block_number >= ?", (contract, topic, from_block)
+        )
+        if not in_transaction:
+            self._db.execute("COMMIT")
+
+    def close(self):
+        self._db.close()
+
+
+def _serialize_log(log) -> str:
+    return json.dumps(
+        {
+            "address": log["address"],
+            "blockHash": HexBytes(log["blockHash"]).hex(),
+            "blockNumber": log["blockNumber"],
+            "data": log["data"] if isinstance(log["data"], str) else HexBytes(log["data"]).hex(),
+            "logIndex": log["logIndex"],
+            "topics": [HexBytes(t).hex() for t in log["topics"]],
+            "transactionHash": HexBytes(log["transactionHash"]).hex(),
+            "transactionIndex": log["transactionIndex"],
+        }
+    )
+
+
+def _deserialize_log(s: str):
+    log = json.loads(s)
+    log["blockHash"] = HexBytes(log["blockHash"])
+    log["topics"] = [HexBytes(t) for t in log["topics"]]
+    log["transactionHash"] = HexBytes(log["transactionHash"])
+    return AttributeDict(log)
@@ -0,0 +1,186 @@
+""" Fast decoding of the ShareDistribution events.
+
+    The ShareDistribution events are by far the largest events of the protocol (n - 1 encrypted shares and t + 1
+    commitments each). Decoding them via web3 converts each value through the generic ABI decoder and builds nested
+    AttributeDicts. Instead, the data of the raw logs is sliced directly, according to the ABI encoding of
+    (address issuer, uint256[] encrypted_shares, uint256[2][] commitments):
+
+        word 0:                 issuer
+        word 1:                 offset of encrypted_shares (in bytes)
+        word 2:                 offset of commitments (in bytes)
+        at offset 1:            number of encrypted shares, followed by the encrypted shares
+        at offset 2:            number of commitments, followed by the commitments (x, y)
+
+    Logs which do not match this layout (or logs of other events) are decoded using the generic decoder.
+
+    The EventStream yields the events of a given type incrementally, as soon as they are confirmed.
+"""
+
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+from hexbytes import HexBytes
+from web3._utils.events import get_event_data
+
+from . import utils
+
+WORD_SIZE = 32
+
+
+class ShareDistribution:
+    __slots__ = ["issuer", "encrypted_shares", "commitments", "block_number"]
+
+    def __init__(self, issuer: int, encrypted_shares: List[int], commitments: List[Tuple[int, int]], block_number):
+        self.issuer = issuer  # integer representation of the issuer's address (as used for the node indices)
+        self.encrypted_shares = encrypted_shares
+        self.commitments = commitments  # in the format used by the smart contract, see ethnode.point_from_eth
+        self.block_number = block_number
+
+
+def get_share_distributions(event, from_block, to_block=None) -> Iterator[ShareDistribution]:
+    """ Yields the ShareDistribution events (given as contract.events.ShareDistribution)
+        emitted within the blocks from_block to to_block (inclusive; by default the latest block).
+    """
+    event_abi = event._get_event_abi()
+    for log in utils.get_logs(event, from_block, to_block):
+        yield decode_share_distribution(event_abi, log)
+
+
+def decode_share_distribution(event_abi, log) -> ShareDistribution:
+    data = log["data"]
+    data = bytes.fromhex(data[2:]) if isinstance(data, str) else bytes(data)
+    try:
+        issuer, encrypted_shares, commitments = parse_share_distribution_data(data)
+    except ValueError:
+        e = get_event_data(event_abi, log)
+        issuer = int(e.args.issuer, 16)
+        encrypted_shares = list(e.args.encrypted_shares)
+        commitments = [tuple(c) for c in e.args.commitments]
+    return ShareDistribution(issuer, encrypted_shares, commitments, log["blockNumber"])
+
+
+def parse_share_distribution_data(data: bytes) -> Tuple[int, List[int], List[Tuple[int, int]]]:
+    """ Slices the ABI encoded data of a ShareDistribution event,
+        raises a ValueError if the data does not match the expected layout.
+    """
+    mv = memoryview(data)
+    size = len(mv)
+    if size < 3 * WORD_SIZE or size % WORD_SIZE:
+        raise ValueError("invalid data size")
+
+    def word(offset: int) -> int:
+        return int.from_bytes(mv[offset : offset + WORD_SIZE], "big")
+
+    def words(offset: int, count: int) -> List[int]:
+        return [word(i) for i in range(offset, offset + count * WORD_SIZE, WORD_SIZE)]
+
+    issuer = word(0)
+    if issuer >> 160:
+        raise ValueError("invalid address")
+
+    shares_offset, commitments_offset = word(WORD_SIZE), word(2 * WORD_SIZE)
+    if shares_offset + WORD_SIZE > size or commitments_offset + WORD_SIZE > size:
+        raise ValueError("invalid offset")
+    num_shares, num_commitments = word(shares_offset), word(commitments_offset)
+    shares_start = shares_offset + WORD_SIZE
+    commitments_start = commitments_offset + WORD_SIZE
+    if shares_start + num_shares * WORD_SIZE > size or commitments_start + num_commitments * 2 * WORD_SIZE > size:
+        raise ValueError("invalid length")
+
+    encrypted_shares = words(shares_start, num_shares)
+    coordinates = words(commitments_start, 2 * num_commitments)
+    commitments = list(zip(coordinates[0::2], coordinates[1::2]))
+    return issuer, encrypted_shares, commitments
+
+
+class ChainReorganization(Exception):
+    """ Raised if a block, whose events have already been processed, is no longer part of the chain.
+    """
+
+
+class Cursor(NamedTuple):
+    block_number: int  # last block whose events have been processed
+    block_hash: str
+
+
+class EventStream:
+    """ Yields the events of the given type (e.g. contract.events.Dispute) emitted within from_block and to_block
+        (inclusive; None for an unbounded stream), as soon as they are `confirmations` blocks deep.
+
+        The position of the stream is given by its cursor (the last processed block and its hash), a stream can be
+        resumed from a cursor. Before new events are returned, the hash of the cursor's block is compared against
+        the current chain: if a reorg removed the block (i.e. a reorg deeper than `confirmations` blocks), the events
+        already processed may be invalid and a ChainReorganization is raised. The stream cannot recover on its own:
+        the caller has to discard the state derived from the processed events and resume from an earlier cursor (or
+        give up, as the nodes do).
+    """
+
+    def __init__(
+        self,
+        event,
+        from_block: int,
+        to_block: Optional[int] = None,
+        confirmations: int = 0,
+        decode: Callable = get_event_data,
+        cursor: Optional[Cursor] = None,
+    ):
+        """ decode(event_abi, log) is applied to each raw log, e.g. decode_share_distribution.
+        """
+        self.event = event
+        self.from_block = from_block
+        self.to_block = to_block
+        self.confirmations = confirmations
+        self.decode = decode
+        self.cursor = cursor
+        self.num_events = 0
+        self._event_abi = event._get_event_abi()
+
+    @property
+    def next_block(self) -> int:
+        """ The first block whose events have not yet been processed.
+        """
+        return self.from_block if self.cursor is None else self.cursor.block_number + 1
+
+    @property
+    def next_confirmation(self) -> int:
+        """ The block number at which the next block of the stream is confirmed.
+        """
+        return self.next_block + self.confirmations
+
+    @property
+    def done(self) -> bool:
+        return self.to_block is not None and self.next_block > self.to_block
+
+    def poll(self, current_block_number: Optional[int] = None) -> list:
+        """ Returns the (decoded) events of all blocks confirmed since the last poll, in the order of their emission.
+        """
+        if current_block_number is None:
+            current_block_number = utils.block_number()
+        end = current_block_number - self.confirmations
+        if self.to_block is not None:
+            end = min(end, self.to_block)
+        if end < self.next_block:
+            return []
+
+        if self.cursor is not None and utils.get_block_hash(self.cursor.block_number) != self.cursor.block_hash:
+            raise ChainReorganization(f"block {self.cursor.block_number} is no longer part of the chain")
+        # the hash is read before the logs: if a reorg replaces the block in between, the stale hash is detected by
+        # the next poll (or by the logs of the block itself) instead of being stored for logs of the old chain
+        end_hash = utils.get_block_hash(end)
+        logs = list(utils.get_logs(self.event, self.next_block, end))
+        for log in logs:
+            if log["blockNumber"] == end and HexBytes(log["blockHash"]).hex() != end_hash:
+                raise ChainReorganization(f"block {end} was replaced while fetching its events")
+        self.cursor = Cursor(end, end_hash)
+        self.num_events += len(logs)
+        return [self.decode(self._event_abi, log) for log in logs]
+
+    def batches(self, until: Optional[Callable[[], bool]] = None) -> Iterator[list]:
+        """ Yields the events in batches as they are confirmed (waiting for new blocks in between),
+            until the end of the stream is reached or the given condition until() holds.
+        """
+        while not self.done and not (until is not None and until()):
+            batch = self.poll()
+            if batch:
+                yield batch
+            elif not self.done:
+                utils.wait_for_block(self.next_confirmation)
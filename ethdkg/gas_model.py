@@ -0,0 +1,90 @@
+""" Gas limits for the transactions of the protocol, predicted without eth_estimateGas.
+
+    Estimating the gas of e.g. a share distribution or a dispute executes the whole transaction (including O(t)
+    elliptic curve operations) on the Ethereum node, just to determine the gas limit. Instead, the gas limit is
+    predicted by a linear model in the number of registered nodes n (the threshold t is derived from n by the
+    contract), with a safety margin on top.
+
+    The coefficients are fitted to the maximal gas consumption observed in the evaluation for n = 256 and n = 512,
+    see evaluation/gas-costs/raw_eval_output_istanbul.txt. Once a transaction for a given function, n and t is
+    included, its actual gas consumption is used instead of the model (with a smaller margin).
+
+    Functions whose costs changed since the evaluation (see UNMEASURED) are not predicted by the model: their gas is
+    estimated (eth_estimateGas) until a transaction for the same n and t is included, as a too low limit would let a
+    transaction with a deadline run out of gas.
+"""
+
+import threading
+
+from typing import Dict, Optional, Set, Tuple
+
+# applied to the gas predicted by the model, covers e.g. differences in the calldata (zero vs. non-zero bytes)
+SAFETY_MARGIN = 1.25
+
+# applied to the maximal gas consumption observed for the same function, n and t
+OBSERVED_SAFETY_MARGIN = 1.1
+
+# fn_name -> (base, per_node), gas consumption = base + per_node * n
+# The master public key is verified against the aggregate of the key shares, which the contract updates with each
+# key share submission. The costs of these storage updates (for the first submission, according to the gas schedule
+# of EIP-2200) are added to the measured values of submit_key_share and distribute_shares, the costs of
+# submit_master_public_key are dominated by the pairing check and independent of n.
+GAS_MODELS: Dict[str, Tuple[int, int]] = {
+    "register": (109_921, 0),
+    "distribute_shares": (97_504, 5_556),
+    "submit_dispute": (42_205, 9_055),
+    "submit_key_share": (298_070, 0),
+    "submit_master_public_key": (225_000, 0),
+}
+
+# functions whose model is derived from the gas schedule instead of being fitted to measured gas consumption,
+# to be removed once the model is refitted to the output of eval_gas_costs.run_all
+UNMEASURED: Set[str] = {"distribute_shares", "submit_key_share", "submit_master_public_key"}
+
+enabled = True
+
+_observed: Dict[Tuple[str, Optional[int], Optional[int]], int] = {}  # (fn_name, n, t) -> maximal gas used
+_tracked: Dict[bytes, Tuple[str, Optional[int], Optional[int]]] = {}  # tx hash -> (fn_name, n, t)
+_lock = threading.Lock()
+
+
+def gas_limit(fn_name: str, n: Optional[int] = None, t: Optional[int] = None) -> Optional[int]:
+    """ Returns the gas limit for a transaction calling the given function of the contract,
+        or None if no prediction is possible (i.e. the gas must be estimated).
+        n and t are the number of registered nodes and the threshold (None if not yet known, e.g. for registration).
+    """
+    if not enabled:
+        return None
+    observed = _observed.get((fn_name, n, t))
+    if observed is not None:
+        return int(observed * OBSERVED_SAFETY_MARGIN)
+    if fn_name not in GAS_MODELS or fn_name in UNMEASURED:
+        return None
+    base, per_node = GAS_MODELS[fn_name]
+    if per_node and n is None:
+        return None
+    return int((base + per_node * (n or 0)) * SAFETY_MARGIN)
+
+
+def observe(fn_name: str, n: Optional[int], t: Optional[int], gas_used: int):
+    """ Refines the prediction for the given function, n and t with the actual gas consumption of a transaction.
+    """
+    with _lock:
+        key = (fn_name, n, t)
+        _observed[key] = max(_observed.get(key, 0), gas_used)
+
+
+def track(tx_hash, fn_name: str, n: Optional[int], t: Optional[int]):
+    """ Remembers a sent transaction, its gas consumption is observed once its receipt is fetched.
+    """
+    with _lock:
+        _tracked[bytes(tx_hash)] = (fn_name, n, t)
+
+
+def observe_receipt(tx_hash, tx_receipt):
+    """ Called with each fetched receipt, observes the gas consumption of tracked (successful) transactions.
+    """
+    with _lock:
+        key = _tracked.pop(bytes(tx_hash), None)
+    if key is not None and tx_receipt.status == 1:
+        observe(*key, tx_receipt.gasUsed)
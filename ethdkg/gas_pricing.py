@@ -0,0 +1,82 @@
+""" Deadline-aware gas prices for the transactions of the protocol.
+
+    Each protocol transaction must be included before the end of its phase (e.g. a share distribution before
+    T_SHARE_DISTRIBUTION_END), otherwise the node is excluded (or other nodes have to recover its key share).
+    The gas price of a transaction with a deadline increases linearly with the fraction of the blocks of its phase
+    which have already passed: at the start of the phase, the price suggested by the Ethereum node is paid, up to
+    MAX_FACTOR times the suggested price, which is used for the last URGENT_BLOCKS blocks before the deadline.
+    The first submission is priced accordingly, i.e. a transaction sent late in its phase pays more from the start.
+    The price of a pending transaction can only be raised if it is signed locally: such transactions are replaced (same
+    nonce, higher gas price, see signing.py) as soon as the price for the current block exceeds the paid price by the
+    replacement bump. Transactions sent via eth_sendTransaction keep the price of their first submission.
+
+    For each phase (i.e. contract function), the inclusion latency (number of blocks from the first submission until
+    the inclusion) and the remaining slack until the deadline is recorded, see summary.
+"""
+
+import collections
+import threading
+
+from typing import Dict, List, Tuple
+
+# multiples of the gas price suggested by the Ethereum node, used for the first submission / close to the deadline
+START_FACTOR = 1.0
+MAX_FACTOR = 4.0
+
+# number of blocks before the deadline from which on the maximal gas price is used
+URGENT_BLOCKS = 10
+
+enabled = True
+
+_tracked: Dict[bytes, Tuple[str, int, int]] = {}  # tx hash -> (fn_name, submission block, deadline)
+_inclusions: Dict[str, List[Tuple[int, int]]] = collections.defaultdict(list)  # fn_name -> [(latency, slack)]
+_lock = threading.Lock()
+
+
+def gas_price(suggested_price: int, start: int, deadline: int, block_number: int) -> int:
+    """ Returns the gas price for a transaction which must be included until the given deadline (inclusive), for the
+        given (current) block number. The price increases from the given start block on (the first block of the
+        transaction's phase, or its first submission if the start of the phase is not known).
+    """
+    if not enabled:
+        return suggested_price
+    window = deadline - URGENT_BLOCKS - start
+    if window <= 0 or block_number >= deadline - URGENT_BLOCKS:
+        urgency = 1.0
+    else:
+        urgency = max(block_number - start, 0) / window
+    return int(suggested_price * (START_FACTOR + (MAX_FACTOR - START_FACTOR) * urgency))
+
+
+def track(tx_hash, fn_name: str, submitted_at: int, deadline: int):
+    """ Remembers a sent transaction, its inclusion latency is recorded once its receipt is fetched.
+    """
+    with _lock:
+        _tracked[bytes(tx_hash)] = (fn_name, submitted_at, deadline)
+
+
+def observe_receipt(tx_hash, tx_receipt):
+    """ Called with each fetched receipt, records the inclusion latency of tracked transactions.
+    """
+    with _lock:
+        tracked = _tracked.pop(bytes(tx_hash), None)
+        if tracked is not None:
+            fn_name, submitted_at, deadline = tracked
+            _inclusions[fn_name].append((tx_receipt.blockNumber - submitted_at, deadline - tx_receipt.blockNumber))
+
+
+def summary() -> List[Tuple[str, int, float, int, int]]:
+    """ Returns the tuples (fn_name, number of transactions, average latency, maximal latency, minimal slack)
+        for all phases with included transactions, latencies and slack are given in blocks.
+    """
+    with _lock:
+        return [
+            (
+                fn_name,
+                len(inclusions),
+                sum(latency for latency, _ in inclusions) / len(inclusions),
+                max(latency for latency, _ in inclusions),
+                min(slack for _, slack in inclusions),
+            )
+            for fn_name, inclusions in _inclusions.items()
+        ]
@@ -35,13 +35,13 @@ class CustomCLIFormatter(logging.Formatter):
         return msg
 
 
-def create_logger(filename, cli_linewidth="auto", log_timestamps=False):
-    if cli_linewidth == "auto":
+def create_logger(filename, cli_linewidth="auto", log_timestamps=False, name="ethdkg-logger", cli_output=True):
+    if cli_linewidth == "auto" and cli_output:
         cli_linewidth = int(subprocess.check_output(["tput", "cols"]).decode())
 
     filepath = os.path.join(LOG_DIR, filename)
 
-    cli_handler = logging.StreamHandler()
+    cli_handler = logging.StreamHandler() if cli_output else logging.NullHandler()
     cli_handler.setLevel(logging.DEBUG)
     cli_formatter = CustomCLIFormatter(line_length=cli_linewidth)
     cli_handler.setFormatter(cli_formatter)
@@ -65,7 +65,7 @@ def create_logger(filename, cli_linewidth="auto", log_timestamps=False):
         cli_handler.setFormatter(cli_formatter)
         file_handler.setFormatter(file_formatter)
 
-    logger = logging.getLogger("ethdkg-logger")
+    logger = logging.getLogger(name)
     logger.addHandler(cli_handler)
     logger.addHandler(file_handler)
     logger.setLevel(logging.DEBUG)
@@ -4,10 +4,44 @@ from collections import defaultdict
 from . import crypto
 from .crypto import G1, H1, G2, H2, add, multiply, pairing, normalize
 from .crypto import PointG1, PointG2
+from .validation import Validator
 
 INVALID_SHARE = -1
 
 
+def verify_recovery_share(
+    recoverer_idx: int,
+    recoverer_public_key: PointG1,
+    node_public_key: PointG1,
+    encrypted_share: int,
+    commitments: List[PointG1],
+    shared_key: PointG1,
+    shared_key_correctness_proof: Tuple[int, int],
+    check_share: bool = True,
+) -> Optional[int]:
+    """ Verifies the shared key published by the recoverer for the recovery of a node's key share.
+        Returns the recoverer's decrypted share (from the node to be recovered) if it is valid, None otherwise.
+    """
+    challenge, response = shared_key_correctness_proof
+    if not crypto.dleq_verify(G1, recoverer_public_key, node_public_key, shared_key, challenge, response):
+        return None
+    decrypted_share = crypto.decrypt_share(encrypted_share, shared_key, recoverer_idx)
+    if check_share and not crypto.verify_share(recoverer_idx, decrypted_share, commitments):
+        return None
+    return decrypted_share
+
+
+def verify_key_share(h1: PointG1, h1_proof: Tuple[int, int], h2: PointG2, commitment_0: PointG1) -> bool:
+    """ Verifies the key share h1 = H1^s_i (with proof of correctness w.r.t. the commitment g^s_i)
+        and its counterpart h2 = H2^s_i.
+        Does not depend on the state of any node, hence the verification can be shared between nodes.
+    """
+    challenge, response = h1_proof
+    if not crypto.dleq_verify(H1, h1, G1, commitment_0, challenge, response):
+        return False
+    return pairing(H2, h1) == pairing(h2, H1)
+
+
 class Node:
 
     n: int
@@ -46,10 +80,15 @@ class Node:
     _disable_key_share_verification = False
     _disable_recovery_share_verification = False
 
+    # optional concurrent.futures executor used for independent crypto operations,
+    # e.g. shared by all sessions hosted in a single process (see sessions.py)
+    executor = None
+
     def __init__(self):
         self.secret = crypto.random_scalar()
         self.secret_key, self.public_key = crypto.keygen()
         self.decrypted_shares_for_recovery = defaultdict(dict)
+        self.validator = Validator()
 
     def setup(self, n: int, t: int, assigned_idx_for_this_node: int, public_keys: Dict[int, PointG1]):
         """ Initialization step of the DKG protocol.
@@ -62,11 +101,21 @@ class Node:
         self.nodes = list(public_keys)  # the indices or addresses
         self.other_nodes = [i for i in self.nodes if i != self.idx]
         self.public_keys = public_keys
-        self.shared_keys = {j: crypto.shared_key(self.secret_key, public_keys[j]) for j in self.other_nodes}
+        shared_keys = self._map(
+            crypto.shared_key, [self.secret_key] * len(self.other_nodes), [public_keys[j] for j in self.other_nodes]
+        )
+        self.shared_keys = dict(zip(self.other_nodes, shared_keys))
         self.disputed_nodes = set()
         self.key_shares = {}
         self.recovered_key_share_secrets = {}
 
+    def _map(self, func, *iterables) -> list:
+        """ Applies func to all given arguments, using the node's executor if available.
+        """
+        if self.executor is None:
+            return list(map(func, *iterables))
+        return list(self.executor.map(func, *iterables, chunksize=16))
+
     def compute_shares(self) -> Tuple[Dict[int, int], List[PointG1]]:
         """ Performs the share distribution step of the protocol. 
             Returns: 
@@ -88,11 +137,10 @@ class Node:
         """ Stores the given encrypted shares.
             Also decrypt and verfify the share for this node.
             If it is found invalid, this fact is also stored for later dispute.
+            Malformed share distributions (see validation.py) are rejected without being stored.
         """
-        assert len(encrypted_shares) == self.n - 1
-        assert issuer_idx not in encrypted_shares
-        assert all([i in encrypted_shares for i in self.nodes if i != issuer_idx])
-        assert issuer_idx != self.idx
+        if not self.validator.validate_shares(self, issuer_idx, encrypted_shares, commitments):
+            return False
 
         self.encrypted_shares[issuer_idx] = encrypted_shares
         self.commitments[issuer_idx] = commitments
@@ -131,6 +179,11 @@ class Node:
             self.disputed_nodes.add(issuer_idx)
             return True
 
+        if not self.validator.validate_dispute(
+            self, issuer_idx, disputer_idx, shared_key, shared_key_correctness_proof
+        ):
+            return False
+
         challenge, response = shared_key_correctness_proof
         if not crypto.dleq_verify(
             G1, self.public_keys[disputer_idx], self.public_keys[issuer_idx], shared_key, challenge, response
@@ -162,12 +215,10 @@ class Node:
             self.key_shares[issuer_idx] = h1, h2
             return True
 
-        assert issuer_idx in self.qualified_nodes
-
-        challenge, response = h1_proof
-        if not crypto.dleq_verify(H1, h1, G1, self.commitments[issuer_idx][0], challenge, response):
+        if not self.validator.validate_key_share(self, issuer_idx, h1, h1_proof, h2):
             return False
-        if pairing(H2, h1) != pairing(h2, H1):
+
+        if not verify_key_share(h1, h1_proof, h2, self.commitments[issuer_idx][0]):
             return False
 
         self.key_shares[issuer_idx] = h1, h2
@@ -185,18 +236,11 @@ class Node:
     def load_recovered_key_share(
         self, node_idx: int, recoverer_idx: int, shared_key: PointG1, shared_key_correctness_proof: Tuple[int, int]
     ) -> bool:
-        challenge, response = shared_key_correctness_proof
-        if not crypto.dleq_verify(
-            G1, self.public_keys[recoverer_idx], self.public_keys[node_idx], shared_key, challenge, response
-        ):
-            return False
-
-        decrypted_share = crypto.decrypt_share(
-            self.encrypted_shares[node_idx][recoverer_idx], shared_key, recoverer_idx
+        decrypted_share = verify_recovery_share(
+            *self._recovery_share_verification_args(node_idx, recoverer_idx, shared_key, shared_key_correctness_proof)
         )
-        if not self._disable_recovery_share_verification:
-            if not crypto.verify_share(recoverer_idx, decrypted_share, self.commitments[node_idx]):
-                return False
+        if decrypted_share is None:
+            return False
 
         # only store the share if we do not already have t + 1 valid shares
         if len(self.decrypted_shares_for_recovery[node_idx]) < self.t + 1:
@@ -204,6 +248,64 @@ class Node:
 
         return True
 
+    def load_recovered_key_share_batch(
+        self, recovery_shares: List[Tuple[int, int, PointG1, Tuple[int, int]]], on_recovered=None
+    ) -> List[int]:
+        """ Loads a batch of shares for recovery, given as tuples (node_idx, recoverer_idx, shared_key, proof).
+            The shares are verified in parallel (using the node's executor), but for each node only as many shares
+            as required to reach t + 1 valid shares are verified.
+            The key share of a node is recovered as soon as t + 1 valid shares are available; the optional
+            callback on_recovered(node_idx) is invoked immediately afterwards.
+            Returns the nodes recovered from this batch, in order of their recovery.
+        """
+        pending = defaultdict(list)
+        for node_idx, recoverer_idx, shared_key, proof in recovery_shares:
+            if node_idx in self.key_shares or recoverer_idx in self.decrypted_shares_for_recovery[node_idx]:
+                continue
+            if any(recoverer_idx == r for r, _, _ in pending[node_idx]):
+                continue
+            pending[node_idx].append((recoverer_idx, shared_key, proof))
+
+        recovered = []
+        while pending:
+            # for each node, verify the number of shares still missing (or all remaining shares)
+            batch = []
+            for node_idx, candidates in pending.items():
+                missing = self.t + 1 - len(self.decrypted_shares_for_recovery[node_idx])
+                batch += [(node_idx, *candidate) for candidate in candidates[:missing]]
+                del candidates[:missing]
+
+            args = [self._recovery_share_verification_args(*item) for item in batch]
+            decrypted_shares = self._map(verify_recovery_share, *zip(*args))
+
+            for (node_idx, recoverer_idx, _, _), decrypted_share in zip(batch, decrypted_shares):
+                if decrypted_share is not None:
+                    self.decrypted_shares_for_recovery[node_idx][recoverer_idx] = decrypted_share
+
+            for node_idx in {node_idx for node_idx, *_ in batch}:
+                if self.recover_key_share(node_idx):
+                    recovered.append(node_idx)
+                    if on_recovered is not None:
+                        on_recovered(node_idx)
+                    del pending[node_idx]
+                elif not pending[node_idx]:
+                    del pending[node_idx]
+        return recovered
+
+    def _recovery_share_verification_args(
+        self, node_idx: int, recoverer_idx: int, shared_key: PointG1, shared_key_correctness_proof: Tuple[int, int]
+    ) -> tuple:
+        return (
+            recoverer_idx,
+            self.public_keys[recoverer_idx],
+            self.public_keys[node_idx],
+            self.encrypted_shares[node_idx][recoverer_idx],
+            self.commitments[node_idx],
+            shared_key,
+            shared_key_correctness_proof,
+            not self._disable_recovery_share_verification,
+        )
+
     def recover_key_share(self, node_idx: int) -> bool:
         """ Tries to compute the key_shares from the stored recovered shares. 
             Returns False if the process failed as not enough shares are available.
@@ -0,0 +1,191 @@
+""" Hosts many independent ETHDKG protocol instances (sessions) within a single process.
+
+    Each session runs the protocol for its own contract and follows the contract's phase schedule.
+    All sessions are tasks of a single event loop (see async_ethnode.py) and share the web3 connection (and its pool of
+    keep-alive HTTP connections), the precomputed generator tables from crypto.py and a pool of worker processes for
+    crypto work.
+    Therefore, resource usage grows with the number of active sessions instead of the number of
+    processes.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+
+from typing import Dict, List, Optional
+
+from . import crypto
+from . import logging
+from . import utils
+from .async_ethnode import AsyncEthNode
+from .events import ChainReorganization
+from .ethnode import EthNode
+from .utils import STATUS_OK
+
+
+class Session:
+    """ A single run of the DKG protocol for the given contract.
+    """
+
+    def __init__(self, manager, contract, account, node_cls=EthNode, logger=logging.NullLogger, **kwargs):
+        self.manager = manager
+        self.contract = contract
+        self.account = account
+        self.logger = logger
+        self.node = node_cls(account, contract, logger, **kwargs)
+        self.node.executor = manager.executor
+        self.anode = AsyncEthNode(self.node, manager.io_executor)
+        self.phase = "queued"
+        self.error = None
+        self.future = None
+
+    @property
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    async def run(self):
+        try:
+            await self._run()
+            self.phase = "completed"
+        except (Exception, SystemExit) as e:
+            # nodes call exit() if the protocol cannot be completed, this must not stop other sessions
+            # after a chain reorganization deeper than the confirmation blocks, the state derived from the processed
+            # events is invalid and the session is not continued either (see events.EventStream)
+            self.error = e
+            reason = repr(e)
+            if isinstance(e, ChainReorganization):
+                reason = f"chain reorganization deeper than the confirmation blocks ({e})"
+            self.logger.critical(f"session for contract {self.contract.address} failed in {self.phase} phase: {reason}")
+            self.phase = "failed"
+        return self
+
+    async def _run(self):
+        node = self.anode
+
+        self.phase = "registration"
+        await self._wait_for_tx(await node.register())
+        await node.setup()
+
+        self.phase = "share distribution"
+        await self._wait_for_tx(await node.distribute_shares())
+        await node.load_shares()
+
+        self.phase = "dispute"
+        disputes = await node.submit_disputes()
+        await asyncio.gather(*(self._wait_for_tx(tx_hash) for tx_hash in set(disputes.values())))
+        await node.load_disputes()
+
+        self.phase = "key derivation"
+        node.compute_qualified_nodes()
+        if len(node.qualified_nodes) <= node.t:
+            raise RuntimeError("insufficient qualified nodes remaining")
+        await self._wait_for_tx(await node.submit_key_share())
+        await node.load_key_shares()
+
+        if len(node.key_shares) < len(node.qualified_nodes):
+            self.phase = "key share recovery"
+            await self._wait_for_tx(await node.recover_key_shares())
+            if self.manager.coordinated_submission:
+                await node.load_recovered_key_shares()
+                tx_hashes = list((await node.submit_recovered_key_shares_coordinated()).values())
+            else:
+                # submit each recovered key share as soon as it is available
+                tx_hashes = []
+                await node.load_recovered_key_shares(
+                    on_recovered=lambda i: tx_hashes.append(self.node.submit_key_share(i))
+                )
+            await asyncio.gather(*(self._wait_for_tx(tx_hash) for tx_hash in tx_hashes))
+
+        self.phase = "master key submission"
+        if self.manager.coordinated_submission:
+            tx_hash = await node.submit_master_public_key_coordinated()
+        else:
+            tx_hash = await node.submit_master_public_key()
+        if tx_hash is not None:
+            await node.wait_for_tx_receipt(tx_hash)
+        await node.derive_group_keys()
+
+    async def _wait_for_tx(self, tx_hash):
+        tx_receipt = await self.anode.wait_for_tx_receipt(tx_hash)
+        if tx_receipt.status != STATUS_OK:
+            raise RuntimeError(f"transaction {tx_hash.hex()} failed in {self.phase} phase")
+        return tx_receipt
+
+
+class SessionManager:
+    """ Runs many sessions concurrently as tasks of a single event loop (running in a background thread).
+        Blocking I/O is performed on a shared thread pool, crypto work which can be parallelized is dispatched to
+        a shared pool of worker processes.
+    """
+
+    def __init__(self, max_sessions: int = 64, crypto_workers: Optional[int] = None, coordinated_submission=False):
+        """ max_sessions: maximum number of concurrently running sessions (further sessions are queued until a running
+            session finishes), also the size of the thread pool for blocking I/O and of the HTTP connection pool
+            coordinated_submission: recovered key shares and the master public key are submitted by a single node
+            (in coordinated slots, see AsyncEthNode.submit_recovered_key_shares_coordinated) instead of all nodes
+        """
+        utils.connect()
+        utils.set_connection_pool_size(max_sessions)
+
+        # build the tables before forking the worker processes, so the workers inherit them
+        crypto.precompute_fixed_base_tables()
+        if crypto_workers == 0:
+            self.executor = None
+        else:
+            self.executor = concurrent.futures.ProcessPoolExecutor(crypto_workers)
+
+        self.max_sessions = max_sessions
+        self.coordinated_submission = coordinated_submission
+        self.sessions: List[Session] = []
+        self.io_executor = concurrent.futures.ThreadPoolExecutor(max_sessions, thread_name_prefix="ethdkg-session-io")
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name="ethdkg-sessions", daemon=True)
+        self._loop_thread.start()
+        self._contracts: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._running: Optional[asyncio.Semaphore] = None  # created on the event loop, see _run_session
+
+    def get_contract(self, contract_address):
+        with self._lock:
+            if contract_address not in self._contracts:
+                self._contracts[contract_address] = utils.get_contract("ETHDKG", contract_address)
+            return self._contracts[contract_address]
+
+    def start_session(self, contract_address, account, node_cls=EthNode, logger=logging.NullLogger, **kwargs):
+        """ Creates a new session for the given contract and starts running the protocol, as soon as less than
+            max_sessions sessions are running.
+        """
+        session = Session(self, self.get_contract(contract_address), account, node_cls, logger, **kwargs)
+        session.future = asyncio.run_coroutine_threadsafe(self._run_session(session), self._loop)
+        self.sessions.append(session)
+        return session
+
+    async def _run_session(self, session: Session) -> Session:
+        if self._running is None:
+            self._running = asyncio.Semaphore(self.max_sessions)
+        async with self._running:
+            return await session.run()
+
+    @property
+    def active_sessions(self) -> List[Session]:
+        return [s for s in self.sessions if not s.done]
+
+    def wait(self, timeout=None) -> List[Session]:
+        """ Waits until all sessions have finished, returns the list of failed sessions.
+        """
+        concurrent.futures.wait([s.future for s in self.sessions], timeout)
+        return [s for s in self.sessions if s.error is not None]
+
+    def shutdown(self):
+        concurrent.futures.wait([s.future for s in self.sessions])
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+        self.io_executor.shutdown(wait=True)
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
@@ -0,0 +1,224 @@
+""" Local signing of transactions with a locally managed nonce.
+
+    By default, transactions are sent via eth_sendTransaction, i.e. the Ethereum node signs them with one of its
+    (unlocked) accounts and assigns the nonce. A LocalSigner instead signs the transactions locally and sends them via
+    eth_sendRawTransaction. As the nonces are assigned locally, multiple transactions (e.g. all disputes of a node)
+    can be sent at once without waiting for the inclusion of the previous ones.
+
+    Assigning nonces locally requires some care:
+        - nonces which were reserved but not used (the transaction was rejected) are reused for the next transaction,
+          if no further transaction follows, the gap is filled with an empty transaction (see fill_nonce_gaps),
+          as otherwise all transactions with higher nonces would never be included
+        - transactions which are not included within a few blocks (e.g. due to a too low gas price) are resubmitted
+          with the same nonce and an increased gas price, see resubmit_stuck_transactions
+        - transactions with a deadline are resubmitted whenever the gas price for their deadline (see gas_pricing.py)
+          exceeds the paid price by the replacement bump
+"""
+
+import heapq
+import threading
+
+from typing import Dict, List, Optional
+
+import web3
+
+from . import gas_pricing
+
+# number of blocks after which a pending transaction is resubmitted with a higher gas price
+STUCK_AFTER_BLOCKS = 5
+
+# clients only accept a replacement transaction if the gas price is increased by a minimal bump, i.e. by at least 10%
+# (geth) or 12.5% (parity / openethereum), the larger one is used
+GAS_PRICE_BUMP = 1.125
+
+
+class PendingTransaction:
+    def __init__(
+        self, tx: dict, tx_hash, block_number: int, deadline: Optional[int] = None, phase_start: Optional[int] = None
+    ):
+        self.tx = tx
+        self.hashes = [tx_hash]  # the original transaction, followed by the resubmitted ones (if any)
+        self.submitted_at = block_number  # block number at the time of the first submission
+        self.block_number = block_number  # block number at the time of the last (re)submission
+        self.deadline = deadline  # last block in which the transaction can be included (if any)
+        # block from which on the gas price for the deadline increases (see gas_pricing.gas_price)
+        self.price_start = block_number if phase_start is None else min(phase_start, block_number)
+
+    @property
+    def nonce(self) -> int:
+        return self.tx["nonce"]
+
+
+class LocalSigner:
+    def __init__(self, w3, private_key, chain_id: Optional[int] = None, stuck_after_blocks=STUCK_AFTER_BLOCKS):
+        self.w3 = w3
+        self.account = w3.eth.account.privateKeyToAccount(private_key)
+        self.address = self.account.address
+        self.chain_id = chain_id
+        self.stuck_after_blocks = stuck_after_blocks
+        self.num_resubmissions = 0
+        self._lock = threading.Lock()
+        self._resubmission_lock = threading.Lock()
+        self._next_nonce = None
+        self._free_nonces: List[int] = []  # heap of reserved but unused nonces
+        self._pending: Dict[int, PendingTransaction] = {}  # nonce -> transaction not yet included
+        self._transactions: Dict[bytes, PendingTransaction] = {}  # tx hash (incl. resubmissions) -> transaction
+        self._last_checked_block = None
+
+    def send_transaction(
+        self, tx: dict, block_number: int, deadline: Optional[int] = None, phase_start: Optional[int] = None
+    ):
+        """ Assigns the next nonce to the given transaction (with all other fields set, e.g. via buildTransaction),
+            signs and sends it. Returns the hash of the transaction.
+            If a deadline is given, the gas price is raised as the deadline approaches (counted from the given start of
+            the transaction's phase, by default from the submission), see resubmit_stuck_transactions.
+        """
+        tx = dict(tx, nonce=self._reserve_nonce())
+        if self.chain_id is not None:
+            tx.setdefault("chainId", self.chain_id)
+        try:
+            tx_hash = self._send(tx)
+        except ValueError as e:
+            if "nonce too low" not in _error_message(e):
+                self._release_nonce(tx["nonce"])
+                raise
+            # the account was also used by someone else, continue with the nonce expected by the Ethereum node
+            tx["nonce"] = self._resync_nonce()
+            try:
+                tx_hash = self._send(tx)
+            except ValueError:
+                self._release_nonce(tx["nonce"])
+                raise
+
+        pending = PendingTransaction(tx, tx_hash, block_number, deadline, phase_start)
+        with self._lock:
+            self._pending[pending.nonce] = pending
+            self._transactions[bytes(tx_hash)] = pending
+        return tx_hash
+
+    def is_tracked(self, tx_hash) -> bool:
+        return bytes(tx_hash) in self._transactions
+
+    def get_tx_hashes(self, tx_hash) -> List[bytes]:
+        """ Returns the hashes of the given transaction and of all its resubmissions.
+        """
+        return list(self._transactions[bytes(tx_hash)].hashes)
+
+    def get_tx_receipt(self, tx_hash):
+        """ Returns the receipt of the given transaction or of one of its resubmissions,
+            raises web3.exceptions.TransactionNotFound if none of them is included yet.
+        """
+        pending = self._transactions[bytes(tx_hash)]
+        for h in reversed(pending.hashes):
+            try:
+                return self.w3.eth.getTransactionReceipt(h)
+            except web3.exceptions.TransactionNotFound:
+                pass
+        raise web3.exceptions.TransactionNotFound(f"Transaction with hash: {tx_hash} not found.")
+
+    def resubmit_stuck_transactions(self, block_number: int):
+        """ Resubmits all transactions which are pending for at least stuck_after_blocks blocks (or whose deadline
+            requires a higher gas price) with an increased gas price and fills gaps in the sequence of used nonces.
+            Checked at most once per block.
+        """
+        if not self._resubmission_lock.acquire(blocking=False):
+            return  # already in progress (e.g. triggered by another thread waiting for a receipt)
+        try:
+            with self._lock:
+                if not self._pending or block_number == self._last_checked_block:
+                    return
+                self._last_checked_block = block_number
+                pending = sorted(self._pending.values(), key=lambda p: p.nonce)
+
+            # all transactions with a nonce below the confirmed transaction count are included
+            confirmed = self.w3.eth.getTransactionCount(self.address)
+            with self._lock:
+                for p in pending:
+                    if p.nonce < confirmed:
+                        del self._pending[p.nonce]
+            pending = [p for p in pending if p.nonce >= confirmed]
+
+            suggested_price = None
+            for p in pending:
+                stuck = block_number - p.block_number >= self.stuck_after_blocks
+                if not stuck and p.deadline is None:
+                    continue
+                if suggested_price is None:
+                    suggested_price = self.w3.eth.gasPrice
+                # the minimal price accepted for a replacement
+                price = int(p.tx["gasPrice"] * GAS_PRICE_BUMP) + 1
+                if p.deadline is not None:
+                    target_price = gas_pricing.gas_price(suggested_price, p.price_start, p.deadline, block_number)
+                    if not stuck and target_price < price:
+                        continue
+                    price = max(price, target_price)
+                else:
+                    price = max(price, suggested_price)
+                tx = dict(p.tx, gasPrice=price)
+                try:
+                    tx_hash = self._send(tx)
+                except ValueError:
+                    continue  # e.g. included in the meantime, checked again with the next block
+                with self._lock:
+                    p.tx = tx
+                    p.hashes.append(tx_hash)
+                    p.block_number = block_number
+                    self._transactions[bytes(tx_hash)] = p
+                self.num_resubmissions += 1
+
+            if pending:
+                self.fill_nonce_gaps(pending[-1].nonce, block_number)
+        finally:
+            self._resubmission_lock.release()
+
+    def fill_nonce_gaps(self, max_nonce: int, block_number: int):
+        """ Uses all unused nonces below max_nonce for empty transactions,
+            as otherwise the pending transactions with higher nonces are never included.
+        """
+        with self._lock:
+            gaps = [n for n in self._free_nonces if n < max_nonce]
+            self._free_nonces = [n for n in self._free_nonces if n >= max_nonce]
+            heapq.heapify(self._free_nonces)
+
+        for nonce in gaps:
+            tx = {"to": self.address, "value": 0, "gas": 21000, "gasPrice": self.w3.eth.gasPrice, "nonce": nonce}
+            if self.chain_id is not None:
+                tx["chainId"] = self.chain_id
+            try:
+                tx_hash = self._send(tx)
+            except ValueError:
+                self._release_nonce(nonce)
+                continue
+            with self._lock:
+                self._pending[nonce] = PendingTransaction(tx, tx_hash, block_number)
+
+    def _send(self, tx: dict):
+        signed_tx = self.w3.eth.account.signTransaction(tx, self.account.privateKey)
+        return self.w3.eth.sendRawTransaction(signed_tx.rawTransaction)
+
+    def _reserve_nonce(self) -> int:
+        with self._lock:
+            if self._free_nonces:
+                return heapq.heappop(self._free_nonces)
+            if self._next_nonce is None:
+                self._next_nonce = self.w3.eth.getTransactionCount(self.address, "pending")
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    def _release_nonce(self, nonce: int):
+        with self._lock:
+            heapq.heappush(self._free_nonces, nonce)
+
+    def _resync_nonce(self) -> int:
+        count = self.w3.eth.getTransactionCount(self.address, "pending")
+        with self._lock:
+            self._free_nonces = [n for n in self._free_nonces if n >= count]
+            heapq.heapify(self._free_nonces)
+            self._next_nonce = max(count, self._next_nonce or 0) + 1
+            return self._next_nonce - 1
+
+
+def _error_message(e: ValueError) -> str:
+    error = e.args[0] if e.args else None
+    return error.get("message", "") if isinstance(error, dict) else str(error)
@@ -0,0 +1,323 @@
+""" In-process network simulator for the evaluation of the DKG protocol with a large number of nodes.
+
+    All n nodes are modelled within a single process and share the public state of the protocol, i.e.
+    the encrypted shares, the decoded commitments, the disputed nodes and the verified key shares.
+    Work which does not depend on a specific node is performed only once instead of by every node:
+    the commitments of each dealer are decoded once, and disputes, key shares and shares for recovery
+    are verified once for all nodes.
+    Node-specific work, i.e. deriving the shared keys, computing the shares and decrypting the shares
+    received by each node, is dispatched to a pool of worker processes.
+
+    The decrypted shares of each dealer are verified using a single randomized batch check
+    (a random linear combination of the shares is checked against the commitments),
+    and likewise the pairing checks for all key shares are combined into a single check.
+    Only if such a check fails, the items are checked in halves to identify the invalid ones.
+
+    Example:
+        python -c 'from ethdkg import sim; sim.run(1024)'
+"""
+
+import concurrent.futures
+import contextlib
+import math
+import secrets
+import time
+
+from typing import Dict, List, Optional, Set, Tuple
+
+from . import crypto
+from .crypto import G1, H1, H2, CURVE_ORDER, PointG1, PointG2, multiply, normalize, pairing
+from .ethnode import point_to_eth, point_from_eth
+from .node import Node, INVALID_SHARE
+
+
+def _compact(p: PointG1) -> PointG1:
+    """ Returns the point in normalized form (z = 1), which is cheap to transfer to and from worker processes.
+    """
+    return point_from_eth(point_to_eth(p))
+
+
+def _derive_shared_keys(sk_i: int, other_secret_keys: List[int]) -> List[PointG1]:
+    # k_ij = pk_j^sk_i = g^(sk_i * sk_j); as all secret keys are known within the simulation,
+    # the precomputed table for the generator can be used instead of a generic scalar multiplication
+    return [_compact(multiply(G1, sk_i * sk_j % CURVE_ORDER)) for sk_j in other_secret_keys]
+
+
+def _distribute_shares(
+    issuer: int, secret: int, t: int, nodes: List[int], shared_keys: Dict[int, PointG1], manipulated: Set[int]
+) -> Tuple[int, List[int], List[Tuple[int, int]]]:
+    """ Computes the issuer's shares and returns the issuer's own share, the encrypted shares and the commitments
+        (the latter two as published in the ShareDistribution event).
+    """
+    shares, commitments = crypto.share_secret(secret, nodes, t)
+    encrypted_shares = []
+    for j in nodes:
+        if j != issuer:
+            encrypted_share = crypto.encrypt_share(shares[j], shared_keys[j], j)
+            if j in manipulated:
+                encrypted_share += 1
+            encrypted_shares.append(encrypted_share)
+    return shares[issuer], encrypted_shares, [point_to_eth(c) for c in commitments]
+
+
+def _find_invalid(items: list, batch_check) -> list:
+    """ Returns all items which fail the check, the check is applied to batches of items.
+        If a batch fails, the items are checked in halves, i.e. only few checks are required if (almost) all
+        items are valid.
+    """
+    if batch_check(items):
+        return []
+    if len(items) == 1:
+        return items
+    m = len(items) // 2
+    return _find_invalid(items[:m], batch_check) + _find_invalid(items[m:], batch_check)
+
+
+def _batch_verify_shares(commitments: List[PointG1], shares: List[Tuple[int, int]]) -> bool:
+    """ Verifies all shares (j, s_j) at once by checking a random linear combination:
+        g^(sum_j w_j * s_j) == prod_k C_k^(sum_j w_j * j^k)
+    """
+    weights = [secrets.randbits(128) for _ in shares]
+    lhs = multiply(G1, sum(w * s for w, (_, s) in zip(weights, shares)))
+    exponents = [0] * len(commitments)
+    for w, (j, _) in zip(weights, shares):
+        for k in range(len(commitments)):
+            exponents[k] += w
+            w = w * j % CURVE_ORDER
+    rhs = crypto.multi_multiply(commitments, exponents)
+    return normalize(lhs) == normalize(rhs)
+
+
+def _decrypt_and_verify_shares(
+    receivers: List[int], encrypted_shares: List[int], shared_keys: List[PointG1], commitments: List[PointG1]
+) -> List[int]:
+    """ Decrypts the shares of one issuer for all receivers, invalid shares are replaced by INVALID_SHARE.
+    """
+    shares = [(j, crypto.decrypt_share(s, k, j)) for j, s, k in zip(receivers, encrypted_shares, shared_keys)]
+    invalid = _find_invalid(shares, lambda batch: _batch_verify_shares(commitments, batch))
+    return [INVALID_SHARE if (j, s) in invalid else s for j, s in shares]
+
+
+def _verify_key_share_proof(h1: PointG1, h1_proof: Tuple[int, int], commitment_0: PointG1) -> bool:
+    return crypto.dleq_verify(H1, h1, G1, commitment_0, *h1_proof)
+
+
+def _batch_verify_key_shares(key_shares: List[Tuple[PointG1, PointG2]]) -> bool:
+    """ Performs the pairing checks e(H2, h1) == e(h2, H1) for all key shares (h1, h2) at once:
+        e(H2, sum_i w_i * h1_i) == e(sum_i w_i * h2_i, H1)
+    """
+    weights = [secrets.randbits(128) for _ in key_shares]
+    h1 = crypto.multi_multiply([h1 for h1, _ in key_shares], weights)
+    h2 = crypto.multi_multiply([h2 for _, h2 in key_shares], weights)
+    return pairing(H2, h1) == pairing(h2, H1)
+
+
+def _compute_key_share(secret: int, commitment_0: PointG1) -> Tuple[PointG1, Tuple[int, int], PointG2]:
+    h1 = multiply(H1, secret)
+    h1_proof = crypto.dleq(H1, h1, G1, commitment_0, secret)
+    h2 = multiply(H2, secret)
+    return h1, h1_proof, h2
+
+
+class Simulation:
+    """ Simulates a run of the DKG protocol with n nodes, using the indices 1, 2, ..., n.
+        The issuer of each pair in invalid_shares sends an invalid share to the corresponding receiver.
+        Nodes in absent_key_shares do not submit their key shares, which are therefore recovered.
+    """
+
+    def __init__(
+        self,
+        n: int,
+        t: Optional[int] = None,
+        processes: Optional[int] = None,
+        invalid_shares: Set[Tuple[int, int]] = frozenset(),
+        absent_key_shares: Set[int] = frozenset(),
+    ):
+        self.n = n
+        self.t = math.ceil(n / 2) - 1 if t is None else t
+        self.indices = list(range(1, n + 1))
+        self.invalid_shares = set(invalid_shares)
+        self.absent_key_shares = set(absent_key_shares)
+        self.processes = processes
+        self.executor = None
+        self.timings: Dict[str, float] = {}
+
+        # public state of the protocol, shared by all nodes
+        self.nodes: Dict[int, Node] = {}
+        self.encrypted_shares: Dict[int, Dict[int, int]] = {}
+        self.commitments: Dict[int, List[PointG1]] = {}
+        self.disputed_nodes: Set[int] = set()
+        self.qualified_nodes: List[int] = []
+        self.key_shares: Dict[int, Tuple[PointG1, PointG2]] = {}
+        self.master_public_key: Optional[PointG2] = None
+
+    def _map(self, func, *iterables) -> list:
+        if self.executor is None:
+            return list(map(func, *iterables))
+        return list(self.executor.map(func, *iterables))
+
+    @contextlib.contextmanager
+    def _phase(self, name):
+        t_start = time.time()
+        yield
+        self.timings[name] = time.time() - t_start
+
+    def run(self):
+        # the tables are built before the workers are started, so the (forked) workers inherit them
+        crypto.precompute_fixed_base_tables()
+        with contextlib.ExitStack() as stack:
+            if self.processes != 0:
+                self.executor = stack.enter_context(concurrent.futures.ProcessPoolExecutor(self.processes))
+            with self._phase("setup"):
+                self.setup()
+            with self._phase("share distribution"):
+                self.share_distribution()
+            with self._phase("disputes"):
+                self.disputes()
+            with self._phase("key share submission"):
+                self.key_share_submission()
+            with self._phase("key share recovery"):
+                self.key_share_recovery()
+            with self._phase("master key derivation"):
+                self.derive_master_public_key()
+        self.executor = None
+        return self
+
+    def setup(self):
+        self.nodes = {idx: Node() for idx in self.indices}
+        public_keys = {idx: node.public_key for idx, node in self.nodes.items()}
+
+        # each shared key is computed once for both nodes
+        secret_keys = [self.nodes[idx].secret_key for idx in self.indices]
+        rows = self._map(_derive_shared_keys, secret_keys[:-1], [secret_keys[k + 1 :] for k in range(self.n - 1)])
+        shared_keys: Dict[int, Dict[int, PointG1]] = {idx: {} for idx in self.indices}
+        for k, row in enumerate(rows):
+            i = self.indices[k]
+            for j, key in zip(self.indices[k + 1 :], row):
+                shared_keys[i][j] = shared_keys[j][i] = key
+
+        for idx, node in self.nodes.items():
+            node.n = self.n
+            node.t = self.t
+            node.idx = idx
+            node.nodes = self.indices
+            node.other_nodes = [j for j in self.indices if j != idx]
+            node.public_keys = public_keys
+            node.shared_keys = shared_keys[idx]
+            node.encrypted_shares = self.encrypted_shares
+            node.commitments = self.commitments
+            node.decrypted_shares = {}
+            node.disputed_nodes = self.disputed_nodes
+            node.key_shares = self.key_shares
+            node.recovered_key_share_secrets = {}
+
+    def share_distribution(self):
+        results = self._map(
+            _distribute_shares,
+            self.indices,
+            [self.nodes[i].secret for i in self.indices],
+            [self.t] * self.n,
+            [self.indices] * self.n,
+            [self.nodes[i].shared_keys for i in self.indices],
+            [{r for i_, r in self.invalid_shares if i_ == i} for i in self.indices],
+        )
+        for issuer, (own_share, encrypted_shares, commitments) in zip(self.indices, results):
+            # the published data is decoded once and then shared by all nodes
+            self.encrypted_shares[issuer] = dict(zip(self.nodes[issuer].other_nodes, encrypted_shares))
+            self.commitments[issuer] = [point_from_eth(c) for c in commitments]
+            self.nodes[issuer].decrypted_shares[issuer] = own_share
+
+        receivers = [self.nodes[i].other_nodes for i in self.indices]
+        results = self._map(
+            _decrypt_and_verify_shares,
+            receivers,
+            [list(self.encrypted_shares[i].values()) for i in self.indices],
+            [[self.nodes[j].shared_keys[i] for j in js] for i, js in zip(self.indices, receivers)],
+            [self.commitments[i] for i in self.indices],
+        )
+        for issuer, js, shares in zip(self.indices, receivers, results):
+            for j, share in zip(js, shares):
+                self.nodes[j].decrypted_shares[issuer] = share
+
+    def disputes(self):
+        disputers = {j for i, j in self.invalid_shares}
+        for disputer in sorted(disputers):
+            node = self.nodes[disputer]
+            disputes = node.compute_disputes()
+            node.disputed_nodes = self.disputed_nodes
+            for issuer, dispute in disputes.items():
+                # verified once, on success the issuer is added to the shared set of disputed nodes
+                if issuer not in self.disputed_nodes:
+                    assert node.load_dispute(issuer, disputer, *dispute), "valid dispute rejected"
+
+        self.qualified_nodes = [i for i in self.indices if i not in self.disputed_nodes]
+        for node in self.nodes.values():
+            node.qualified_nodes = self.qualified_nodes
+
+    def key_share_submission(self):
+        submitting = [i for i in self.qualified_nodes if i not in self.absent_key_shares]
+        key_shares = self._map(
+            _compute_key_share, [self.nodes[i].secret for i in submitting], [self.commitments[i][0] for i in submitting]
+        )
+
+        # verified once for all nodes: the proofs individually (using the workers),
+        # the pairing checks of all key shares are combined into a single randomized check
+        proofs_ok = self._map(
+            _verify_key_share_proof,
+            [h1 for h1, _, _ in key_shares],
+            [h1_proof for _, h1_proof, _ in key_shares],
+            [self.commitments[i][0] for i in submitting],
+        )
+        assert all(proofs_ok), "valid key share rejected"
+        key_shares = [(h1, h2) for h1, _, h2 in key_shares]
+        assert not _find_invalid(key_shares, _batch_verify_key_shares), "valid key share rejected"
+
+        for i, key_share in zip(submitting, key_shares):
+            self.key_shares[i] = key_share
+
+    def key_share_recovery(self):
+        recoverers = [i for i in self.qualified_nodes if i not in self.absent_key_shares]
+        verifier = self.nodes[recoverers[0]]
+        for node_idx in self.qualified_nodes:
+            if node_idx in self.key_shares:
+                continue
+            # stops as soon as t + 1 valid shares for recovery are available
+            for recoverer_idx in recoverers:
+                shared_key, proof = self.nodes[recoverer_idx].initiate_key_share_recovery(node_idx)
+                assert verifier.load_recovered_key_share(node_idx, recoverer_idx, shared_key, proof)
+                if verifier.recover_key_share(node_idx):
+                    break
+            assert node_idx in self.key_shares, "key share recovery failed"
+
+    def derive_master_public_key(self) -> PointG2:
+        self.master_public_key = crypto.sum_points(h2 for _, h2 in self.key_shares.values())
+        for node in self.nodes.values():
+            node.master_public_key = self.master_public_key
+        return self.master_public_key
+
+    def verify_master_public_key(self) -> bool:
+        """ Checks the result against the master secret key, which is known within the simulation.
+        """
+        master_secret_key = crypto.sum_scalars(self.nodes[i].secret for i in self.qualified_nodes)
+        return normalize(multiply(H2, master_secret_key)) == normalize(self.master_public_key)
+
+
+def run(n=16, processes=None, invalid_shares=None, absent_key_shares=None):
+    if invalid_shares is None:
+        invalid_shares = {(n, 1), (n, 2)}  # the last node sends invalid shares to the first two nodes
+    if absent_key_shares is None:
+        absent_key_shares = {n - 1}
+
+    print(f"\n\n{'='*80}\nRUNNING SIMULATION FOR N={n}\n")
+    sim = Simulation(n, processes=processes, invalid_shares=invalid_shares, absent_key_shares=absent_key_shares)
+    sim.run()
+
+    for phase, t in sim.timings.items():
+        print(f"{phase:<24} {t:10.2f}s")
+    print(f"{'total':<24} {sum(sim.timings.values()):10.2f}s")
+    print()
+    print(f"disputed nodes:  {sorted(sim.disputed_nodes)}")
+    print(f"qualified nodes: {len(sim.qualified_nodes)}")
+    print(f"master public key verified: {sim.verify_master_public_key()}")
+    print()
+    return sim
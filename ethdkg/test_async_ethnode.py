@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from . import utils
+from .async_ethnode import AsyncEthNode
+from .ethnode import SUBMISSION_SLOT_BLOCKS
+
+
+class StubWatcher:
+    """ Replaces the block watcher (see blocks.py), blocks are only produced via mine().
+    """
+
+    def __init__(self, block_number=100):
+        self.block_number = block_number
+        self.listeners = []
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def mine(self):
+        self.block_number += 1
+        for listener in list(self.listeners):
+            listener(self.block_number)
+
+
+class StubNode:
+    def __init__(self, slot, key_shares_completed_at=None, master_public_key_submitted_at=None):
+        self.slot = slot
+        self.key_shares_completed_at = key_shares_completed_at
+        self.master_public_key_submitted_at = master_public_key_submitted_at
+        self.submitted = []
+        self.derived = False
+
+    def submission_slot(self):
+        return self.slot
+
+    def master_public_key_missing(self):
+        block_number = utils.block_number()
+        if self.key_shares_completed_at is not None and block_number < self.key_shares_completed_at:
+            return None
+        return self.master_public_key_submitted_at is None or block_number < self.master_public_key_submitted_at
+
+    def master_public_key_submission_start(self):
+        return self.key_shares_completed_at
+
+    def submit_master_public_key(self, sync=False):
+        self.submitted.append(utils.block_number())
+        return b"\x01" * 32
+
+    def derive_master_public_key(self):
+        self.derived = True
+
+
+@pytest.fixture
+def watcher(monkeypatch):
+    watcher = StubWatcher()
+    monkeypatch.setattr(utils, "get_block_watcher", lambda: watcher)
+    monkeypatch.setattr(utils, "block_number", lambda: watcher.block_number)
+    return watcher
+
+
+def run_mining(watcher, coroutine, max_blocks=1000):
+    """ Runs the coroutine while mining a block in each iteration of the event loop, returns its result.
+    """
+
+    async def main():
+        task = asyncio.ensure_future(coroutine)
+        for _ in range(max_blocks):
+            await asyncio.sleep(0.001)
+            if task.done():
+                break
+            watcher.mine()
+        return await task
+
+    return asyncio.run(main())
+
+
+def test_wait_for_block(watcher):
+    node = AsyncEthNode(StubNode(slot=0))
+    assert run_mining(watcher, node.wait_for_block(90)) == 100  # already reached
+    assert run_mining(watcher, node.wait_for_block(105)) == 105
+    assert watcher.listeners == []
+
+
+def test_wait_for_block__timeout(watcher):
+    node = AsyncEthNode(StubNode(slot=0))
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(node.wait_for_block(watcher.block_number + 1, timeout=0.01))
+    assert watcher.listeners == []
+
+
+def test_wait_for_submission_slot(watcher):
+    node = AsyncEthNode(StubNode(slot=3))
+    missing = run_mining(watcher, node._wait_for_submission_slot(lambda: (100, [1])))
+    assert missing == [1]
+    assert watcher.block_number == 100 + 3 * SUBMISSION_SLOT_BLOCKS
+
+
+def test_wait_for_submission_slot__submitted_by_other_node(watcher):
+    node = AsyncEthNode(StubNode(slot=3))
+
+    def check_missing():
+        return 100, [1] if utils.block_number() < 107 else []  # submitted by another node in block 107
+
+    missing = run_mining(watcher, node._wait_for_submission_slot(check_missing))
+    assert missing == []
+    assert watcher.block_number == 110  # checked once per slot
+
+
+def test_wait_for_submission_slot__not_ready(watcher):
+    # the slots are only counted once the start block is known, the node never submits before
+    node = AsyncEthNode(StubNode(slot=0))
+
+    def check_missing():
+        return (120, True) if utils.block_number() >= 120 else (None, True)
+
+    assert run_mining(watcher, node._wait_for_submission_slot(check_missing)) is True
+    assert watcher.block_number == 120
+
+
+def test_submit_master_public_key_coordinated__waits_for_key_shares(watcher):
+    # recovered key shares are still pending until block 110
+    stub = StubNode(slot=1, key_shares_completed_at=110)
+    tx_hash = run_mining(watcher, AsyncEthNode(stub).submit_master_public_key_coordinated())
+    assert tx_hash is not None
+    assert stub.submitted == [110 + SUBMISSION_SLOT_BLOCKS]
+
+
+def test_submit_master_public_key_coordinated__submitted_by_other_node(watcher):
+    stub = StubNode(slot=1, key_shares_completed_at=110, master_public_key_submitted_at=112)
+    tx_hash = run_mining(watcher, AsyncEthNode(stub).submit_master_public_key_coordinated())
+    assert tx_hash is None
+    assert stub.submitted == []
+    assert stub.derived
@@ -0,0 +1,20 @@
+from . import benchutils
+
+
+def test_compare():
+    baseline = {8: {"dispute": 100_000, "registration": 50_000}, 16: {"dispute": 200_000}}
+    results = {
+        8: {"dispute": 101_000, "registration": 60_000, "new function": 1},
+        16: {"dispute": 190_000},
+        32: {"dispute": 400_000},  # not in the baseline
+    }
+    regressions = benchutils.compare(results, baseline, tolerance=0.02)
+    assert [(r.n, r.name) for r in regressions] == [(8, "registration")]
+    assert round(regressions[0].change, 2) == 0.2
+
+
+def test_save_and_load_results(tmp_path):
+    path = str(tmp_path / "results.json")
+    results = {8: {"dispute": 100_000}, 16: {"dispute": 200_000}}
+    benchutils.save_results(path, results, benchutils.metadata(fork="istanbul"))
+    assert benchutils.load_results(path) == results
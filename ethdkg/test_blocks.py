@@ -0,0 +1,58 @@
+import pytest
+import threading
+import time
+
+from . import utils
+from .blocks import BlockWatcher
+
+
+def mine_blocks_delayed(num_blocks, delay=0.2):
+    def mine():
+        for _ in range(num_blocks):
+            time.sleep(delay)
+            utils.mine_block()
+
+    thread = threading.Thread(target=mine)
+    thread.start()
+    return thread
+
+
+def test_block_watcher__polling():
+    utils.connect()
+    watcher = BlockWatcher(utils.block_number, max_polling_interval=lambda: 0.1).start()
+    start = watcher.block_number
+
+    thread = mine_blocks_delayed(3)
+    assert watcher.wait_for_block(start + 3, timeout=10) >= start + 3
+    assert watcher.mode == "polling"
+    thread.join()
+    watcher.stop()
+
+
+def test_block_watcher__subscription():
+    utils.connect()
+    watcher = BlockWatcher(utils.block_number, utils._get_subscription_uri(), lambda: 0.1).start()
+    time.sleep(0.5)
+    if watcher.mode != "subscription":
+        pytest.skip("ethereum client does not support newHeads subscriptions")
+    start = watcher.block_number
+
+    thread = mine_blocks_delayed(3)
+    assert watcher.wait_for_new_block(timeout=10) > start
+    assert watcher.wait_for_block(start + 3, timeout=10) >= start + 3
+    assert watcher.mode == "subscription"
+    thread.join()
+    watcher.stop()
+
+
+def test_wait_for_block__multiple_waiters():
+    start = utils.block_number()
+    results = []
+    waiters = [threading.Thread(target=lambda: results.append(utils.wait_for_new_block(start))) for _ in range(10)]
+    for waiter in waiters:
+        waiter.start()
+
+    mine_blocks_delayed(1).join()
+    for waiter in waiters:
+        waiter.join(timeout=30)
+    assert len(results) == 10 and all(r > start for r in results)
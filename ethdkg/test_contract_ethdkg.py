@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 
 from typing import List, Tuple
@@ -5,8 +6,9 @@ from typing import List, Tuple
 from . import utils
 from .utils import STATUS_OK, STATUS_ERROR
 from .node import INVALID_SHARE
-from .ethnode import EthNode, point_to_eth, point_G2_to_eth
-from .crypto import G1, H1, G2, H2, multiply, neg
+from .async_ethnode import AsyncEthNode
+from .ethnode import EthNode, get_parameters, get_registrations, point_to_eth, point_G2_to_eth
+from .crypto import G1, H1, G2, H2, multiply, neg, normalize, sum_points
 
 from .utils import (
     mine_until_registrations_confirmed,
@@ -35,13 +37,24 @@ def init_scenario(contract, n=5, t=2) -> Tuple[int, int, List[EthNode]]:
     return n, t, nodes
 
 
+async def mine_until(done):
+    """ Mines blocks until the given future (e.g. of the nodes of an async test) is done.
+    """
+    loop = asyncio.get_event_loop()
+    while not done.done():
+        await loop.run_in_executor(None, utils.mine_block)
+        await asyncio.sleep(0.01)
+
+
 def test_compilation():
     utils.compile_contract("ETHDKG")
+    assert utils.contract_size("ETHDKG") <= utils.MAX_CONTRACT_SIZE
 
 
-def test_deployment(contract):
-    # tests fixture for contract
-    pass
+def test_deployment():
+    contract, tx_receipt = utils.deploy_contract("ETHDKG", return_tx_receipt=True)
+    assert tx_receipt.status == STATUS_OK
+    assert tx_receipt.gasUsed < contract.web3.eth.getBlock("latest").gasLimit
 
 
 def test_bn128_check_pairing(contract):
@@ -95,9 +108,27 @@ def test_setup(contract):
     for node in nodes:
         node.setup()
 
+    addresses, public_keys = get_registrations(contract)
+    assert list(addresses.values()) == [contract.caller.addresses(i) for i in range(n)]
+    for node in nodes:
+        assert normalize(public_keys[node.idx]) == normalize(node.public_key)
+
     return contract, nodes
 
 
+def test_parameters(contract):
+    params = get_parameters(contract)
+    assert params.T_REGISTRATION_END == contract.caller.T_REGISTRATION_END()
+    assert params.T_KEY_SHARE_SUBMISSION_END == contract.caller.T_KEY_SHARE_SUBMISSION_END()
+    assert params.T_CONTRACT_CREATION == params.T_REGISTRATION_END - params.DELTA_INCLUDE
+    assert params.num_nodes is None  # registration still in progress
+    assert get_parameters(contract) is params
+
+    contract.register(DUMMY_PK).call_sync()
+    mine_until_registrations_confirmed(contract)
+    assert get_parameters(contract, refresh=True).num_nodes == 1
+
+
 def test_share_distribution(contract):
     n, t, nodes = init_scenario(contract)
 
@@ -177,10 +208,74 @@ def test_dispute__invalid_share(contract):
     for node in nodes:
         node.load_disputes()
         assert node.disputed_nodes == {nodes[0].idx}
+    assert contract.caller.num_qualified_nodes() == n - 1
 
     return contract, nodes
 
 
+def test_dispute__batch(contract):
+    n, t, nodes = init_scenario(contract)
+
+    for node in nodes:
+        node.register()
+    mine_until_registrations_confirmed(contract)
+
+    for node in nodes:
+        node.setup()
+
+    for node in nodes:
+        if node in nodes[:2]:
+            distribute_invalid_shares(issuer=node, receiver=nodes[2])
+        else:
+            node.distribute_shares()
+    mine_until_share_distribution_confirmed(contract)
+
+    for node in nodes:
+        node.load_shares()
+
+    tx_dispute_receipts = nodes[2].submit_disputes(sync=True, batch=True)
+    assert set(tx_dispute_receipts) == {nodes[0].idx, nodes[1].idx}
+    assert len({tx_receipt.transactionHash for tx_receipt in tx_dispute_receipts.values()}) == 1
+    assert tx_dispute_receipts[nodes[0].idx].status == STATUS_OK
+
+    mine_until_disputes_confirmed(contract)
+    for node in nodes:
+        node.load_disputes()
+        assert node.disputed_nodes == {nodes[0].idx, nodes[1].idx}
+
+
+def test_dispute__compressed_commitments(contract):
+    n, t, nodes = init_scenario(contract)
+
+    for node in nodes:
+        node.register()
+    mine_until_registrations_confirmed(contract)
+
+    for node in nodes:
+        node.setup()
+        node.compressed_commitments = True
+
+    for node in nodes:
+        if node is nodes[0]:
+            # the format of the share distribution is independent of the format of the dispute
+            distribute_invalid_shares(issuer=nodes[0], receiver=nodes[1])
+        else:
+            assert node.distribute_shares(sync=True).status == STATUS_OK
+    mine_until_share_distribution_confirmed(contract)
+
+    for node in nodes:
+        node.load_shares()
+        assert len(node.commitments) == n
+
+    tx_dispute_receipts = nodes[1].submit_disputes(sync=True)
+    assert [tx_receipt.status for tx_receipt in tx_dispute_receipts.values()] == [STATUS_OK]
+
+    mine_until_disputes_confirmed(contract)
+    for node in nodes:
+        node.load_disputes()
+        assert node.disputed_nodes == {nodes[0].idx}
+
+
 def test_dispute__valid_share(contract):
     n, t, nodes = init_scenario(contract)
 
@@ -268,7 +363,8 @@ def test_submit_key_share__recovery(contract):
         if node is not nodes[0]:
             node.recover_key_shares()
 
-    utils.mine_block()
+    # recovery events are processed once they are confirmed
+    utils.mine_blocks(contract.caller.DELTA_CONFIRM() + 1)
     for node in nodes:
         node.load_recovered_key_shares()
 
@@ -307,8 +403,74 @@ def test_key_derivation(contract):
     for node in nodes:
         node.load_key_shares()
 
+    # the contract aggregates the key shares as they are submitted
+    assert contract.caller.num_key_shares() == contract.caller.num_qualified_nodes() == n
+    key_shares_G1 = (key_share_G1 for key_share_G1, _ in nodes[0].key_shares.values())
+    assert [contract.caller.key_shares_aggregate(i) for i in range(2)] == list(point_to_eth(sum_points(key_shares_G1)))
+
     for node in nodes:
         node.load_key_shares()
         tx_receipt = node.submit_master_public_key(sync=True)
         assert tx_receipt.status == STATUS_OK
         node.derive_group_keys()
+
+
+def test_async_nodes(contract):
+    n, t, nodes = init_scenario(contract)
+    anodes = [AsyncEthNode(node) for node in nodes]
+
+    async def run(node):
+        await node.wait_for_tx(await node.register())
+        await node.setup()
+        await node.wait_for_tx(await node.distribute_shares())
+        await node.load_shares()
+        assert not await node.submit_disputes()
+        await node.load_disputes()
+        node.compute_qualified_nodes()
+        await node.wait_for_tx(await node.submit_key_share())
+        await node.load_key_shares()
+        await node.wait_for_tx_receipt(await node.submit_master_public_key())
+        await node.derive_group_keys()
+
+    async def main():
+        done = asyncio.gather(*(run(node) for node in anodes))
+        await asyncio.gather(done, mine_until(done))
+
+    asyncio.run(main())
+    assert len({str(normalize(node.master_public_key)) for node in nodes}) == 1
+
+
+def test_async_nodes__coordinated_submission(contract):
+    n, t, nodes = init_scenario(contract)
+    anodes = [AsyncEthNode(node) for node in nodes]
+
+    async def run_until_key_derivation(node):
+        await node.wait_for_tx(await node.register())
+        await node.setup()
+        await node.wait_for_tx(await node.distribute_shares())
+        await node.load_shares()
+        await node.load_disputes()
+        node.compute_qualified_nodes()
+        await node.wait_for_tx(await node.submit_key_share())
+        await node.load_key_shares()
+
+    async def submit_master_public_key(node):
+        tx_hash = await node.submit_master_public_key_coordinated()
+        if tx_hash is not None:
+            await node.wait_for_tx(tx_hash)
+        await node.derive_group_keys()
+        return tx_hash
+
+    async def main():
+        done = asyncio.gather(*(run_until_key_derivation(node) for node in anodes))
+        await asyncio.gather(done, mine_until(done))
+        # the slots are counted from the end of the key share submission phase, the same block for all nodes
+        done = asyncio.gather(*(submit_master_public_key(node) for node in anodes))
+        await asyncio.gather(done, mine_until(done))
+        return done.result()
+
+    tx_hashes = asyncio.run(main())
+    # only the node with the first slot submits the master public key
+    assert [tx_hash is not None for tx_hash in tx_hashes] == [node.submission_slot() == 0 for node in nodes]
+    assert contract.caller.master_public_key(0) != 0
+    assert len({str(normalize(node.master_public_key)) for node in nodes}) == 1
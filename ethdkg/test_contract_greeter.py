@@ -5,6 +5,14 @@ def test_compilation():
     utils.compile_contract("Greeter")
 
 
+def test_compilation_cache():
+    utils.compile_contract("Greeter")
+    # the output is cached, the compiler is not invoked again
+    assert utils.compile_contract("Greeter").startswith("using cached compilation output")
+    abi, bytecode = utils.load_contract("Greeter")
+    assert utils.load_contract("Greeter")[0] is abi
+
+
 def test_deployment():
     utils.compile_contract("Greeter")
     contract = utils.deploy_contract("Greeter")
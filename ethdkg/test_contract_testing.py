@@ -53,3 +53,64 @@ def test_event_filters():
     assert len(f.get_new_entries()) == 1
     assert len(f.get_all_entries()) == 2
 
+
+
+def test_get_events():
+    utils.compile_contract("Testing")
+    contract = utils.deploy_contract("Testing")
+
+    from_block = utils.block_number()
+    for i in range(5):
+        contract.trigger_something(i).call_sync()
+    utils.mine_blocks(3)
+
+    # small chunk size, to ensure that the range is split into multiple requests
+    events = list(utils.get_events(contract.events.SomethingHappend, from_block, chunk_size=1))
+    assert [e.args.x for e in events] == list(range(5))
+    assert len(list(utils.get_events(contract.events.SomethingHappend, utils.block_number()))) == 0
+
+
+def test_rpc_accounting():
+    utils.connect()
+    counts = dict(utils.rpc_counts)
+    for _ in range(3):
+        utils.block_number()
+
+    # no additional health checks for established connections
+    assert utils.rpc_counts["eth_blockNumber"] == counts.get("eth_blockNumber", 0) + 3
+    assert utils.rpc_counts["web3_clientVersion"] == counts.get("web3_clientVersion", 0)
+
+    assert utils.client_version() == utils.client_version()
+
+
+def test_local_signing():
+    utils.compile_contract("Testing")
+    contract = utils.deploy_contract("Testing")
+
+    w3 = utils.connect()
+    local_account = w3.eth.account.create()
+    tx_hash = w3.eth.sendTransaction(
+        {"from": utils.get_account_address(), "to": local_account.address, "value": w3.toWei(1, "ether")}
+    )
+    utils.mine_block()
+    utils.wait_for_tx_receipt(tx_hash)
+    address = utils.add_local_account(local_account.privateKey)
+    assert address == local_account.address
+
+    # all transactions are sent at once, the nonces are assigned locally
+    calls = {i: contract.trigger_something(i) for i in range(5)}
+    tx_receipts = utils.transact_all(calls, address)
+    assert all(r.status == utils.STATUS_OK for r in tx_receipts.values())
+    txs = [w3.eth.getTransaction(r.transactionHash) for r in tx_receipts.values()]
+    assert sorted(tx.nonce for tx in txs) == list(range(5))
+
+
+def test_wait_for_receipts():
+    utils.compile_contract("Testing")
+    contract = utils.deploy_contract("Testing")
+
+    tx_hashes = [contract.trigger_something(i).call_async() for i in range(5)]
+    utils.mine_block()
+    confirmed = [tx_hash for tx_hash, tx_receipt in utils.wait_for_receipts(tx_hashes)]
+    assert sorted(confirmed) == sorted(tx_hashes)
+    assert [r.transactionHash for r in utils.wait_for_tx_receipts(tx_hashes)] == tx_hashes
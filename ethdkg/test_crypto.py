@@ -11,6 +11,8 @@ from .crypto import shared_key, encrypt_share, decrypt_share
 from .crypto import dleq, dleq_verify
 from .crypto import sum_scalars, sum_points
 from .crypto import evaluate_public_polynomial
+from .crypto import CURVE_ORDER
+from py_ecc.optimized_bn128 import multiply as py_ecc_multiply
 
 
 def test_keygen():
@@ -94,6 +96,13 @@ def test_sum_points():
     assert normalize(sum_points([G1, G1, multiply(G1, 2)])) == normalize(multiply(G1, 4))
 
 
+def test_fixed_base_multiply():
+    for P in [G1, H1, G2, H2]:
+        for x in [1, 2, 15, 16, 4711, CURVE_ORDER - 1, CURVE_ORDER + 1, random_scalar()]:
+            assert normalize(multiply(P, x)) == normalize(py_ecc_multiply(P, x % CURVE_ORDER))
+        assert multiply(P, CURVE_ORDER)[2] == P[2].zero()
+
+
 def test_full_protocol_all_honest():
     # SETUP
     n = 10
@@ -0,0 +1,26 @@
+import pytest
+
+from .crypto import G1, H1, multiply, neg, normalize, random_scalar, FIELD_MODULUS
+from .ethnode import point_to_eth, point_to_eth_compressed, point_from_eth_compressed
+
+
+def test_point_compression():
+    for p in [G1, H1, neg(G1), multiply(G1, random_scalar()), multiply(H1, random_scalar())]:
+        x, y = point_to_eth(p)
+        c = point_to_eth_compressed(p)
+        assert c & ((1 << 255) - 1) == x
+        assert c >> 255 == y & 1
+        assert normalize(point_from_eth_compressed(c)) == normalize(p)
+
+
+def test_point_compression__parity():
+    # a point and its negation share the x-coordinate and differ in the parity of the y-coordinate
+    assert point_to_eth_compressed(G1) ^ point_to_eth_compressed(neg(G1)) == 1 << 255
+
+
+def test_point_decompression__invalid():
+    with pytest.raises(ValueError):
+        point_from_eth_compressed(FIELD_MODULUS)
+    # x**3 + 3 is not a square for x = 4, i.e. there is no point with this x-coordinate
+    with pytest.raises(ValueError):
+        point_from_eth_compressed(4)
@@ -0,0 +1,133 @@
+import types
+
+import pytest
+
+from . import ethutils
+
+EVENT_ABI = {"anonymous": False, "inputs": [], "name": "SomethingHappend", "type": "event"}
+
+
+class FakeEvent:
+    address = "0x" + "ab" * 20
+
+    def _get_event_abi(self):
+        return EVENT_ABI
+
+
+class FakeLogsProvider:
+    """ Answers eth_getLogs with one log per block, rejects requests covering more than max_range blocks.
+    """
+
+    def __init__(self, max_range, error="query returned more than 10000 results"):
+        self.max_range = max_range
+        self.error = error
+        self.requests = []
+        self.rejected = 0
+
+    def getLogs(self, params):
+        from_block, to_block = params["fromBlock"], params["toBlock"]
+        self.requests.append((from_block, to_block))
+        if to_block - from_block + 1 > self.max_range:
+            self.rejected += 1
+            raise ValueError({"code": -32005, "message": self.error})
+        return [{"blockNumber": b} for b in range(from_block, to_block + 1)]
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    def install(*args, **kwargs):
+        provider = FakeLogsProvider(*args, **kwargs)
+        monkeypatch.setattr(ethutils, "w3", types.SimpleNamespace(eth=provider))
+        return provider
+
+    return install
+
+
+def test_fetch_logs__adaptive_chunk_size(provider):
+    p = provider(max_range=1000)
+    logs = list(ethutils._fetch_logs(FakeEvent(), 0, 199_999, chunk_size=2_000))
+    assert [log["blockNumber"] for log in logs] == list(range(200_000))
+    # only the first request is rejected, afterwards the chunk size stays below the rejected size
+    assert p.rejected == 1
+    assert len(p.requests) == 1 + 200
+
+
+def test_fetch_logs__single_block_too_large(provider):
+    provider(max_range=0)
+    with pytest.raises(ValueError):
+        list(ethutils._fetch_logs(FakeEvent(), 0, 10))
+
+
+def test_fetch_logs__other_errors_not_retried(provider):
+    p = provider(max_range=1000, error="rate limit exceeded")
+    with pytest.raises(ValueError):
+        list(ethutils._fetch_logs(FakeEvent(), 0, 199_999, chunk_size=2_000))
+    assert len(p.requests) == 1
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "query returned more than 10000 results",
+        "Log response size exceeded. You can make eth_getLogs requests with up to a 2K block range",
+        "exceed maximum block range: 5000",
+        "block range is too wide",
+        "block range too large",
+    ],
+)
+def test_logs_result_too_large_error(message):
+    assert ethutils._is_logs_result_too_large_error(ValueError({"code": -32005, "message": message}))
+    assert ethutils._is_logs_result_too_large_error(ValueError(message))
+
+
+@pytest.mark.parametrize("message", ["rate limit exceeded", "Too Many Requests", "daily request limit reached"])
+def test_logs_result_too_large_error__other_errors(message):
+    assert not ethutils._is_logs_result_too_large_error(ValueError({"code": 429, "message": message}))
+
+
+class FakeContractFunction:
+    fn_name = "distribute_shares"
+
+    def __init__(self):
+        self.transacted = []
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def transact(self, tx_params):
+        self.transacted.append(tx_params)
+        return b"\x01" * 32
+
+
+@pytest.fixture
+def transact(monkeypatch):
+    eth = types.SimpleNamespace(generateGasPrice=lambda: 10 ** 9, gasPrice=10 ** 9)
+    monkeypatch.setattr(ethutils, "w3", types.SimpleNamespace(eth=eth))
+    monkeypatch.setattr(ethutils, "get_block_watcher", lambda: types.SimpleNamespace(block_number=150))
+    monkeypatch.setattr(ethutils.gas_pricing, "enabled", True)
+    return FakeContractFunction()
+
+
+def test_call_async__deadline_priced_from_phase_start(transact):
+    deadline = 100 + 90 + ethutils.gas_pricing.URGENT_BLOCKS
+    ethutils.SimplifiedCallInterfaceCall(transact).with_deadline(deadline, phase_start=100).call_async("0xab")
+    ethutils.SimplifiedCallInterfaceCall(transact).with_deadline(deadline).call_async("0xab")
+
+    # submitted in block 150, i.e. after 50 of the 90 blocks of the phase (by default, the price counts from block 150)
+    factor = ethutils.gas_pricing.START_FACTOR + (ethutils.gas_pricing.MAX_FACTOR - 1) * 50 / 90
+    assert transact.transacted[0]["gasPrice"] == int(10 ** 9 * factor)
+    assert transact.transacted[1]["gasPrice"] == 10 ** 9 * ethutils.gas_pricing.START_FACTOR
+
+
+def test_call_async__without_deadline(transact, monkeypatch):
+    monkeypatch.setattr(ethutils, "get_block_watcher", None)  # not required
+    ethutils.SimplifiedCallInterfaceCall(transact).call_async("0xab")
+    assert transact.transacted == [{"from": "0xab"}]
+
+
+def test_contract_size(tmp_path, monkeypatch):
+    # the creation code (.bin) also contains the constructor, only the code of the deployed contract is limited
+    (tmp_path / "Example.bin").write_text("60806040" * 100)
+    (tmp_path / "Example.bin-runtime").write_text("6080" * 10 + "\n")
+    monkeypatch.setitem(ethutils._contract_artifacts, "Example", str(tmp_path))
+    assert ethutils.contract_size("Example") == 20
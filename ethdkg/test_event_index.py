@@ -0,0 +1,79 @@
+from .event_index import EventIndex
+
+CONTRACT = "0x" + "ab" * 20
+TOPIC = "0x" + "cd" * 32
+
+
+def make_log(block_number, log_index=0):
+    return {
+        "address": CONTRACT,
+        "blockHash": b"\x01" * 32,
+        "blockNumber": block_number,
+        "data": "0x" + "00" * 31 + "2a",
+        "logIndex": log_index,
+        "topics": [bytes.fromhex(TOPIC[2:])],
+        "transactionHash": b"\x02" * 32,
+        "transactionIndex": 0,
+    }
+
+
+class Chain:
+    def __init__(self, logs):
+        self.logs = logs
+        self.block_hashes = {}
+        self.fetched = 0
+
+    def fetch_logs(self, from_block, to_block):
+        self.fetched += 1
+        return [log for log in self.logs if from_block <= log["blockNumber"] <= to_block]
+
+    def get_block_hash(self, block_number):
+        return self.block_hashes.get(block_number, "0x00")
+
+
+def get_logs(index, chain, from_block, to_block, latest_block=100):
+    return index.get_logs(CONTRACT, TOPIC, from_block, to_block, latest_block, chain.get_block_hash, chain.fetch_logs)
+
+
+def test_event_index__shared_between_processes(tmp_path):
+    chain = Chain([make_log(10), make_log(12, 1), make_log(30)])
+    path = str(tmp_path / "events.sqlite")
+
+    logs = get_logs(EventIndex(path, confirmations=6), chain, 10, 20)
+    assert [log["blockNumber"] for log in logs] == [10, 12]
+    assert chain.fetched == 1
+
+    # a second process (here: a second connection) reads the logs from the index
+    index = EventIndex(path, confirmations=6)
+    logs = get_logs(index, chain, 10, 20)
+    assert [(log.blockNumber, log.logIndex) for log in logs] == [(10, 0), (12, 1)]
+    assert logs[0].data == "0x" + "00" * 31 + "2a"
+    assert logs[0].topics == [bytes.fromhex(TOPIC[2:])]
+    assert chain.fetched == 1
+    assert (index.hits, index.misses) == (1, 0)
+
+    # sub-ranges of an indexed range are served from the index
+    assert [log["blockNumber"] for log in get_logs(index, chain, 11, 15)] == [12]
+    assert chain.fetched == 1
+
+
+def test_event_index__unconfirmed_blocks_not_indexed(tmp_path):
+    chain = Chain([make_log(98)])
+    index = EventIndex(str(tmp_path / "events.sqlite"), confirmations=6)
+    get_logs(index, chain, 90, 98)
+    get_logs(index, chain, 90, 98)
+    assert chain.fetched == 2
+
+
+def test_event_index__reorg(tmp_path):
+    chain = Chain([make_log(10), make_log(12)])
+    index = EventIndex(str(tmp_path / "events.sqlite"), confirmations=6)
+    get_logs(index, chain, 10, 20)
+
+    # the block at the end of the indexed range changed, i.e. the logs must be fetched again
+    chain.logs = [make_log(11)]
+    chain.block_hashes[20] = "0x01"
+    assert [log["blockNumber"] for log in get_logs(index, chain, 10, 20)] == [11]
+    assert chain.fetched == 2
+    assert [log["blockNumber"] for log in get_logs(index, chain, 10, 20)] == [11]
+    assert chain.fetched == 2
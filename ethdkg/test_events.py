@@ -0,0 +1,141 @@
+import types
+
+import eth_abi
+import pytest
+
+from eth_abi.exceptions import DecodingError
+from eth_utils import event_abi_to_log_topic
+
+from . import events
+
+ADDRESS = "0x" + "ab" * 20
+ENCRYPTED_SHARES = [1, 2, 2 ** 256 - 1]
+COMMITMENTS = [(3, 4), (5, 6)]
+
+
+def encode_share_distribution(issuer, encrypted_shares, commitments):
+    return eth_abi.encode_abi(["address", "uint256[]", "uint256[2][]"], [issuer, encrypted_shares, commitments])
+
+
+def test_parse_share_distribution_data():
+    data = encode_share_distribution(ADDRESS, ENCRYPTED_SHARES, COMMITMENTS)
+    issuer, encrypted_shares, commitments = events.parse_share_distribution_data(data)
+    assert issuer == int(ADDRESS, 16)
+    assert encrypted_shares == ENCRYPTED_SHARES
+    assert commitments == COMMITMENTS
+
+
+def test_parse_share_distribution_data__malformed():
+    data = encode_share_distribution(ADDRESS, ENCRYPTED_SHARES, COMMITMENTS)
+    with pytest.raises(ValueError):
+        events.parse_share_distribution_data(data[:-32])  # truncated
+    with pytest.raises(ValueError):
+        events.parse_share_distribution_data(data[:32] + (2 ** 255).to_bytes(32, "big") + data[64:])  # invalid offset
+
+
+def test_decode_share_distribution__matches_generic_decoder():
+    event_abi = {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": False, "name": "issuer", "type": "address"},
+            {"indexed": False, "name": "encrypted_shares", "type": "uint256[]"},
+            {"indexed": False, "name": "commitments", "type": "uint256[2][]"},
+        ],
+        "name": "ShareDistribution",
+        "type": "event",
+    }
+    data = encode_share_distribution(ADDRESS, ENCRYPTED_SHARES, COMMITMENTS)
+    log = {
+        "address": ADDRESS,
+        "blockHash": b"\x00" * 32,
+        "blockNumber": 7,
+        "data": "0x" + data.hex(),
+        "logIndex": 0,
+        "topics": [event_abi_to_log_topic(event_abi)],
+        "transactionHash": b"\x00" * 32,
+        "transactionIndex": 0,
+    }
+    d = events.decode_share_distribution(event_abi, log)
+    assert (d.issuer, d.encrypted_shares, d.commitments, d.block_number) == (
+        int(ADDRESS, 16),
+        ENCRYPTED_SHARES,
+        COMMITMENTS,
+        7,
+    )
+
+    # data with an unexpected layout (here: an address with dirty upper bits) falls back to the generic decoder,
+    # which rejects it
+    log["data"] = "0x" + "ff" * 12 + data.hex()[24:]
+    with pytest.raises(DecodingError):
+        events.decode_share_distribution(event_abi, log)
+
+
+class FakeEvent:
+    def _get_event_abi(self):
+        return {}
+
+
+def block_hash(block_number, chain=0):
+    return "0x" + f"{chain:02x}{block_number:062x}"
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    """ A fake chain whose blocks 3, 5 and 9 contain events; chain.fork(b) replaces all blocks from b onwards.
+    """
+    chain = types.SimpleNamespace(events={3: ["a"], 5: ["b", "c"], 9: ["d"]}, hashes={}, fork_at=None)
+    chain.hashes = {b: block_hash(b) for b in range(20)}
+
+    def fork(from_block):
+        chain.hashes.update({b: block_hash(b, chain=1) for b in range(from_block, 20)})
+
+    def get_logs(event, start, end):
+        if chain.fork_at is not None:
+            fork(chain.fork_at)  # the reorg happens while the logs are fetched
+        return [
+            {"blockNumber": b, "blockHash": chain.hashes[b], "data": e}
+            for b in range(start, end + 1)
+            for e in chain.events.get(b, [])
+        ]
+
+    chain.fork = fork
+    monkeypatch.setattr(events.utils, "get_block_hash", lambda b: chain.hashes[b])
+    monkeypatch.setattr(events.utils, "get_logs", get_logs)
+    return chain
+
+
+def test_event_stream(chain):
+    stream = events.EventStream(FakeEvent(), 2, 8, confirmations=2, decode=lambda abi, log: log["data"].upper())
+    assert stream.poll(3) == []  # block 2 not yet confirmed
+    assert stream.poll(7) == ["A", "B", "C"]
+    assert stream.cursor == events.Cursor(5, block_hash(5))
+    assert stream.next_confirmation == 8
+    assert stream.poll(7) == []
+    assert not stream.done
+
+    # resume from the cursor, the events of block 9 are beyond the end of the stream
+    resumed = events.EventStream(FakeEvent(), 2, 8, confirmations=2, cursor=stream.cursor)
+    assert resumed.poll(20) == [] and resumed.done
+
+    chain.fork(5)
+    with pytest.raises(events.ChainReorganization):
+        stream.poll(10)
+
+
+def test_event_stream__reorg_while_fetching(chain):
+    # the events are fetched from the old chain, but the end block is replaced before the poll completes
+    chain.fork_at = 5
+    stream = events.EventStream(FakeEvent(), 2, 8, confirmations=2, decode=lambda abi, log: log["data"])
+    with pytest.raises(events.ChainReorganization):
+        stream.poll(7)
+    assert stream.cursor is None
+
+
+def test_event_stream__reorg_while_fetching__no_events_in_end_block(chain):
+    # block 4 contains no events, the stale hash read before the reorg is detected by the next poll
+    chain.fork_at = 4
+    stream = events.EventStream(FakeEvent(), 2, 8, confirmations=2, decode=lambda abi, log: log["data"])
+    assert stream.poll(6) == ["a"]
+    assert stream.cursor == events.Cursor(4, block_hash(4))
+    with pytest.raises(events.ChainReorganization):
+        stream.poll(7)
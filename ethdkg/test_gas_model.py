@@ -0,0 +1,44 @@
+from . import gas_model
+
+
+class Receipt:
+    def __init__(self, gas_used, status=1):
+        self.gasUsed = gas_used
+        self.status = status
+
+
+def test_gas_limit__model(monkeypatch):
+    # the limits cover the maximal gas consumption measured in the evaluation (the share distribution only got more
+    # expensive since, its model is not used until it is refitted)
+    monkeypatch.setattr(gas_model, "UNMEASURED", set())
+    for n, t, max_gas_used in [(256, 127, 1_499_611), (512, 255, 2_921_718)]:
+        assert max_gas_used < gas_model.gas_limit("distribute_shares", n, t) < 1.3 * max_gas_used
+    for n, t, max_gas_used in [(256, 127, 2_360_075), (512, 255, 4_677_945)]:
+        assert max_gas_used < gas_model.gas_limit("submit_dispute", n, t) < 1.3 * max_gas_used
+
+    assert gas_model.gas_limit("register") > 109_921
+    assert gas_model.gas_limit("distribute_shares") is None  # n not known
+    assert gas_model.gas_limit("recover_key_shares", 256, 127) is None  # not modelled
+
+
+def test_gas_limit__refined_by_receipts():
+    gas_model.track(b"\x01" * 32, "submit_dispute", 8, 3)
+    gas_model.track(b"\x02" * 32, "submit_dispute", 8, 3)
+    gas_model.track(b"\x03" * 32, "submit_dispute", 8, 3)
+    gas_model.observe_receipt(b"\x01" * 32, Receipt(100_000))
+    gas_model.observe_receipt(b"\x02" * 32, Receipt(120_000))
+    gas_model.observe_receipt(b"\x03" * 32, Receipt(500_000, status=0))  # failed transactions are ignored
+    gas_model.observe_receipt(b"\x04" * 32, Receipt(500_000))  # untracked transaction
+
+    assert gas_model.gas_limit("submit_dispute", 8, 3) == int(120_000 * gas_model.OBSERVED_SAFETY_MARGIN)
+    base, per_node = gas_model.GAS_MODELS["submit_dispute"]
+    assert gas_model.gas_limit("submit_dispute", 9, 4) == int((base + per_node * 9) * gas_model.SAFETY_MARGIN)
+
+
+def test_gas_limit__unmeasured():
+    # estimated via eth_estimateGas until the gas consumption of an included transaction is known
+    assert gas_model.gas_limit("submit_key_share", 8, 3) is None
+    gas_model.track(b"\x05" * 32, "submit_key_share", 8, 3)
+    gas_model.observe_receipt(b"\x05" * 32, Receipt(300_000))
+    assert gas_model.gas_limit("submit_key_share", 8, 3) == int(300_000 * gas_model.OBSERVED_SAFETY_MARGIN)
+    assert gas_model.gas_limit("submit_key_share", 9, 4) is None
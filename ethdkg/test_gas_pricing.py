@@ -0,0 +1,29 @@
+from collections import namedtuple
+
+from . import gas_pricing
+
+Receipt = namedtuple("Receipt", "blockNumber")
+
+
+def test_gas_price():
+    price = 10 ** 9
+    deadline = 100 + 90 + gas_pricing.URGENT_BLOCKS
+
+    assert gas_pricing.gas_price(price, 100, deadline, 100) == price * gas_pricing.START_FACTOR
+    halfway_factor = (gas_pricing.START_FACTOR + gas_pricing.MAX_FACTOR) / 2
+    assert gas_pricing.gas_price(price, 100, deadline, 145) == price * halfway_factor
+    assert gas_pricing.gas_price(price, 100, deadline, 190) == price * gas_pricing.MAX_FACTOR
+    assert gas_pricing.gas_price(price, 100, deadline, deadline) == price * gas_pricing.MAX_FACTOR
+
+    # submitted shortly before the deadline
+    assert gas_pricing.gas_price(price, deadline - 1, deadline, deadline - 1) == price * gas_pricing.MAX_FACTOR
+
+
+def test_inclusion_latency():
+    gas_pricing.track(b"\x01" * 32, "test_fn", 100, 200)
+    gas_pricing.track(b"\x02" * 32, "test_fn", 100, 200)
+    gas_pricing.observe_receipt(b"\x01" * 32, Receipt(102))
+    gas_pricing.observe_receipt(b"\x02" * 32, Receipt(106))
+    gas_pricing.observe_receipt(b"\x03" * 32, Receipt(106))  # untracked transaction
+
+    assert ("test_fn", 2, 4.0, 6, 94) in gas_pricing.summary()
@@ -1,10 +1,11 @@
 import pytest
 import random
+import concurrent.futures
 
 from typing import Tuple, List, Dict, Optional, Set
 
 from .node import Node, INVALID_SHARE
-from .crypto import normalize, add, multiply, G1, H1, G2, H2
+from .crypto import normalize, add, multiply, G1, H1, G2, H2, FQ
 from . import crypto
 
 
@@ -69,6 +70,17 @@ def test_shared_keys():
     assert normalize(n1.shared_keys[n2.idx]) == normalize(n2.shared_keys[n1.idx])
 
 
+def test_shared_keys__executor():
+    nodes = [Node() for _ in range(5)]
+    public_keys = {idx: node.public_key for idx, node in enumerate(nodes, 1)}
+    n1, n2, *_ = nodes
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        n1.executor = executor
+        n1.setup(5, 2, 1, public_keys)
+    n2.setup(5, 2, 2, public_keys)
+    assert normalize(n1.shared_keys[2]) == normalize(n2.shared_keys[1])
+
+
 def test_share_distribution_all_fine_case():
     n, t, nodes = init_scenario()
     compute_and_distribute_shares(nodes)
@@ -254,6 +266,38 @@ def test_key_shares_recovery():
         assert x == verifier.key_shares
 
 
+def test_key_shares_recovery__batch():
+    n, t, nodes = init_scenario(n=7, t=3)
+    n1, n2, n3, *_ = nodes
+    compute_and_distribute_shares(nodes)
+    compute_and_distribute_disputes(nodes)
+    compute_and_distribute_key_shares(nodes)
+    verifier = n3
+    expected_key_shares = dict(verifier.key_shares)
+    del verifier.key_shares[n1.idx]
+    del verifier.key_shares[n2.idx]
+
+    recovery_shares = []
+    for node in nodes:
+        for recovered_node in (n1, n2):
+            if node is not recovered_node:
+                shared_key, proof = node.initiate_key_share_recovery(recovered_node.idx)
+                if node is nodes[3]:
+                    proof = proof[0], proof[1] + 1  # invalid share, must be replaced by another one
+                recovery_shares.append((recovered_node.idx, node.idx, shared_key, proof))
+
+    recovered = []
+    assert verifier.load_recovered_key_share_batch(recovery_shares, on_recovered=recovered.append) == recovered
+    assert sorted(recovered) == sorted([n1.idx, n2.idx])
+    assert verifier.key_shares == expected_key_shares
+    for recovered_node in (n1, n2):
+        # verification stops as soon as t + 1 valid shares are available
+        assert len(verifier.decrypted_shares_for_recovery[recovered_node.idx]) == t + 1
+        assert nodes[3].idx not in verifier.decrypted_shares_for_recovery[recovered_node.idx]
+
+    assert verifier.load_recovered_key_share_batch(recovery_shares) == []
+
+
 def test_master_key_derivation():
     n, t, nodes = init_scenario()
     n1, *_ = nodes
@@ -287,3 +331,22 @@ def test_group_key_derivation():
             node.group_public_key_correctness_proof,
         )
 
+
+
+def test_validation__malformed_shares_rejected():
+    n, t, nodes = init_scenario()
+    n1, n2, *_ = nodes
+    encrypted_shares, commitments = n1.compute_shares()
+    n2.compute_shares()
+
+    assert not n2.load_shares(n1.idx, encrypted_shares, commitments[:-1])
+    assert not n2.load_shares(n1.idx, {**encrypted_shares, n1.idx: 0}, commitments)
+    assert not n2.load_shares(n1.idx, {**encrypted_shares, n2.idx: 2 ** 256}, commitments)
+    assert not n2.load_shares(n1.idx, encrypted_shares, [(FQ(1), FQ(1), FQ(1))] + commitments[1:])
+    assert n1.idx not in n2.encrypted_shares
+    assert n2.validator.rejected == {("shares", "structure"): 2, ("shares", "range"): 1, ("shares", "curve"): 1}
+
+    assert n2.load_shares(n1.idx, encrypted_shares, commitments)
+    assert not n2.load_shares(n1.idx, encrypted_shares, commitments)  # duplicate share distribution
+    assert n2.validator.accepted["shares"] == 1
+    assert n2.validator.rejected["shares", "structure"] == 3
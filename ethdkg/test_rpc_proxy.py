@@ -0,0 +1,75 @@
+import importlib.util
+import os
+import types
+
+import pytest
+
+PROXY_PATH = os.path.join(os.path.dirname(__file__), "..", "scripts", "rpc-proxy.py")
+
+
+@pytest.fixture
+def proxy():
+    spec = importlib.util.spec_from_file_location("rpc_proxy", PROXY_PATH)
+    proxy = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(proxy)
+    proxy.args = types.SimpleNamespace(confirmations=6)
+    proxy.head = proxy.Head()
+    proxy.head.block_number = 100
+    proxy.cache = proxy.Cache()
+    return proxy
+
+
+def test_is_cacheable__immutable_and_per_block(proxy):
+    assert proxy.cache.is_cacheable("eth_chainId", [], "0x1")
+    assert proxy.cache.is_cacheable("eth_call", [{}, "latest"], "0x")
+    assert not proxy.cache.is_cacheable("eth_getBlockByHash", ["0xab", False], None)
+    assert not proxy.cache.is_cacheable("eth_sendRawTransaction", ["0x"], "0xab")
+
+
+@pytest.mark.parametrize("method", ["eth_getTransactionByHash", "eth_getTransactionReceipt"])
+def test_is_cacheable__confirmed(proxy, method):
+    assert proxy.cache.is_cacheable(method, ["0xab"], {"hash": "0xab", "blockNumber": hex(94)})
+    assert not proxy.cache.is_cacheable(method, ["0xab"], {"hash": "0xab", "blockNumber": hex(95)})  # not confirmed
+    assert not proxy.cache.is_cacheable(method, ["0xab"], {"hash": "0xab", "blockNumber": None})  # pending
+    assert not proxy.cache.is_cacheable(method, ["0xab"], None)
+
+
+def block(number):
+    """ A block as returned by eth_getBlockByNumber (without the transactions).
+    """
+    return {
+        "number": hex(number),
+        "hash": "0x" + f"{number:064x}",
+        "parentHash": "0x" + f"{number - 1:064x}",
+        "timestamp": hex(1_600_000_000 + number),
+        "gasLimit": hex(8_000_000),
+        "gasUsed": "0x0",
+        "transactions": [],
+    }
+
+
+def test_is_cacheable__blocks(proxy):
+    assert proxy.cache.is_cacheable("eth_getBlockByNumber", [hex(94), False], block(94))
+    assert not proxy.cache.is_cacheable("eth_getBlockByNumber", [hex(95), False], block(95))  # not yet confirmed
+    assert not proxy.cache.is_cacheable("eth_getBlockByNumber", [hex(200), False], None)  # not yet mined
+    assert proxy.cache.is_cacheable("eth_getBlockByHash", [block(99)["hash"], False], block(99))
+
+
+def test_is_cacheable__logs(proxy):
+    assert proxy.cache.is_cacheable("eth_getLogs", [{"fromBlock": "0x0", "toBlock": hex(94)}], [])
+    assert proxy.cache.is_cacheable("eth_getLogs", [{"blockHash": "0xab"}], [])
+    assert not proxy.cache.is_cacheable("eth_getLogs", [{"fromBlock": "0x0", "toBlock": hex(95)}], [])
+    assert not proxy.cache.is_cacheable("eth_getLogs", [{"fromBlock": "0x0", "toBlock": "latest"}], [])
+    assert not proxy.cache.is_cacheable("eth_getLogs", [{"fromBlock": "0x0"}], [])
+
+
+def test_per_block_entries_evicted(proxy):
+    proxy.upstream = types.SimpleNamespace(request=lambda method, params: hex(proxy.head.block_number))
+    assert proxy.cache.get("eth_call", [{}, "latest"]) == hex(100)
+    assert proxy.cache.get("eth_chainId", []) == hex(100)
+    assert len(proxy.cache.values) == 2
+
+    proxy.head.block_number = 101
+    assert proxy.cache.get("eth_call", [{}, "latest"]) == hex(101)
+    assert len(proxy.cache.values) == 2  # the entry of block 100 is dropped, the immutable one is kept
+    assert list(proxy.cache.per_block_keys) == [101]
@@ -0,0 +1,65 @@
+import asyncio
+import types
+
+import pytest
+
+from . import crypto
+from . import events
+from . import sessions
+from . import utils
+
+
+class StubNode:
+    def __init__(self, account, contract, logger):
+        self.account = account
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(utils, "connect", lambda: None)
+    monkeypatch.setattr(utils, "set_connection_pool_size", lambda size: None)
+    monkeypatch.setattr(utils, "get_contract", lambda name, address: types.SimpleNamespace(address=address))
+    monkeypatch.setattr(crypto, "precompute_fixed_base_tables", lambda: None)
+    with sessions.SessionManager(max_sessions=2, crypto_workers=0) as manager:
+        yield manager
+
+
+def test_session_manager__max_sessions(manager, monkeypatch):
+    running = []
+    max_running = 0
+
+    async def run(session):
+        nonlocal max_running
+        running.append(session)
+        max_running = max(max_running, len(running))
+        await asyncio.sleep(0.05)
+        running.remove(session)
+
+    monkeypatch.setattr(sessions.Session, "_run", run)
+    started = [manager.start_session(f"0x{i:040x}", "0xab", node_cls=StubNode) for i in range(5)]
+    assert manager.wait(timeout=10) == []
+    assert max_running == 2
+    assert all(session.phase == "completed" for session in started)
+
+
+def test_session_manager__failed_session(manager, monkeypatch):
+    async def run(session):
+        if session.contract.address.endswith("1"):
+            exit(1)  # as done by the nodes if the protocol cannot be completed
+
+    monkeypatch.setattr(sessions.Session, "_run", run)
+    started = [manager.start_session(f"0x{i:040x}", "0xab", node_cls=StubNode) for i in range(3)]
+    assert manager.wait(timeout=10) == [started[1]]
+    assert [session.phase for session in started] == ["completed", "failed", "completed"]
+
+
+def test_session_manager__chain_reorganization(manager, monkeypatch):
+    async def run(session):
+        if session.contract.address.endswith("0"):
+            raise events.ChainReorganization("block 5 is no longer part of the chain")
+
+    monkeypatch.setattr(sessions.Session, "_run", run)
+    started = [manager.start_session(f"0x{i:040x}", "0xab", node_cls=StubNode) for i in range(2)]
+    assert manager.wait(timeout=10) == [started[0]]
+    assert [session.phase for session in started] == ["failed", "completed"]
+    assert isinstance(started[0].error, events.ChainReorganization)
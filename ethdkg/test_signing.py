@@ -0,0 +1,147 @@
+import types
+
+import pytest
+
+from eth_account import Account
+from eth_utils import keccak
+
+from . import signing
+from .signing import LocalSigner, GAS_PRICE_BUMP, STUCK_AFTER_BLOCKS
+
+PRIVATE_KEY = "0x" + "11" * 32
+TX = {"to": "0x" + "ab" * 20, "value": 0, "gas": 100_000, "gasPrice": 10, "data": b""}
+
+
+class FakeNode:
+    """ Stands in for the Ethereum node: records the sent transactions, answers the transaction counts and rejects
+        the next send requests with the errors given in errors.
+    """
+
+    def __init__(self):
+        self.sent = []
+        self.errors = []
+        self.confirmed = 0  # transaction count of the latest block
+        self.pending = 0  # transaction count including pending transactions
+        self.gasPrice = 10
+        self.account = Account
+
+    def getTransactionCount(self, address, block_identifier="latest"):
+        return self.pending if block_identifier == "pending" else self.confirmed
+
+    def send(self, tx):
+        if self.errors:
+            raise ValueError({"code": -32000, "message": self.errors.pop(0)})
+        self.sent.append(tx)
+        self.pending = max(self.pending, tx["nonce"] + 1)
+        return keccak(text=repr(sorted(tx.items())))
+
+
+@pytest.fixture
+def node():
+    return FakeNode()
+
+
+@pytest.fixture
+def signer(node):
+    signer = LocalSigner(types.SimpleNamespace(eth=node), PRIVATE_KEY)
+    signer._send = node.send  # signing itself is done by eth_account
+    return signer
+
+
+def test_nonces(signer, node):
+    for _ in range(3):
+        signer.send_transaction(TX, block_number=100)
+    assert [tx["nonce"] for tx in node.sent] == [0, 1, 2]
+
+
+def test_nonce_reused_after_rejected_send(signer, node):
+    signer.send_transaction(TX, block_number=100)
+    node.errors = ["insufficient funds for gas * price + value"]
+    with pytest.raises(ValueError):
+        signer.send_transaction(TX, block_number=100)
+    signer.send_transaction(TX, block_number=100)
+    assert [tx["nonce"] for tx in node.sent] == [0, 1]
+
+
+def test_nonce_too_low__resync(signer, node):
+    signer.send_transaction(TX, block_number=100)
+    node.pending = 5  # the account was used by someone else
+    node.errors = ["nonce too low"]
+    signer.send_transaction(TX, block_number=100)
+    signer.send_transaction(TX, block_number=100)
+    assert [tx["nonce"] for tx in node.sent] == [0, 5, 6]
+
+
+def test_fill_nonce_gaps(signer, node):
+    # a concurrent send reserves nonce 0 but is rejected after nonce 1 was used by the next transaction
+    nonce = signer._reserve_nonce()
+    signer.send_transaction(TX, block_number=100)
+    signer._release_nonce(nonce)
+
+    signer.fill_nonce_gaps(max_nonce=1, block_number=100)
+    assert [tx["nonce"] for tx in node.sent] == [1, 0]
+    gap_tx = node.sent[-1]
+    assert gap_tx["to"] == signer.address and gap_tx["value"] == 0 and gap_tx["gas"] == 21000
+    assert signer._free_nonces == []
+
+
+def test_fill_nonce_gaps__via_resubmission(signer, node):
+    nonce = signer._reserve_nonce()
+    signer.send_transaction(TX, block_number=100)
+    signer._release_nonce(nonce)
+    signer.resubmit_stuck_transactions(block_number=101)
+    assert [tx["nonce"] for tx in node.sent] == [1, 0]
+
+
+def test_resubmit_stuck_transactions(signer, node):
+    tx_hash = signer.send_transaction(TX, block_number=100)
+
+    signer.resubmit_stuck_transactions(block_number=100 + STUCK_AFTER_BLOCKS - 1)
+    assert len(node.sent) == 1
+
+    signer.resubmit_stuck_transactions(block_number=100 + STUCK_AFTER_BLOCKS)
+    assert len(node.sent) == 2
+    assert node.sent[1]["nonce"] == node.sent[0]["nonce"]
+    assert node.sent[1]["gasPrice"] == int(TX["gasPrice"] * GAS_PRICE_BUMP) + 1
+    assert len(signer.get_tx_hashes(tx_hash)) == 2
+    assert signer.num_resubmissions == 1
+
+    # checked at most once per block
+    signer.resubmit_stuck_transactions(block_number=100 + STUCK_AFTER_BLOCKS)
+    assert len(node.sent) == 2
+
+
+def test_resubmit_stuck_transactions__suggested_price(signer, node):
+    signer.send_transaction(TX, block_number=100)
+    node.gasPrice = 100  # the suggested price is higher than the bumped one
+    signer.resubmit_stuck_transactions(block_number=100 + STUCK_AFTER_BLOCKS)
+    assert node.sent[-1]["gasPrice"] == 100
+
+
+def test_resubmit_stuck_transactions__included(signer, node):
+    signer.send_transaction(TX, block_number=100)
+    node.confirmed = 1
+    signer.resubmit_stuck_transactions(block_number=100 + STUCK_AFTER_BLOCKS)
+    assert len(node.sent) == 1
+    assert signer._pending == {}
+
+
+def test_resubmit_stuck_transactions__deadline(signer, node, monkeypatch):
+    monkeypatch.setattr(signing.gas_pricing, "enabled", True)
+    signer.send_transaction(TX, block_number=100, deadline=200)
+    # the price for the deadline does not yet exceed the paid price by the replacement bump
+    signer.resubmit_stuck_transactions(block_number=101)
+    assert len(node.sent) == 1
+    # close to the deadline, the maximal price is paid
+    signer.resubmit_stuck_transactions(block_number=195)
+    assert len(node.sent) == 2
+    assert node.sent[-1]["gasPrice"] == int(node.gasPrice * signing.gas_pricing.MAX_FACTOR)
+
+
+
+def test_resubmit_stuck_transactions__deadline_priced_from_phase_start(signer, node, monkeypatch):
+    monkeypatch.setattr(signing.gas_pricing, "enabled", True)
+    signer.send_transaction(TX, block_number=150, deadline=200, phase_start=100)
+    signer.resubmit_stuck_transactions(block_number=151)
+    # the price is based on the blocks passed since the start of the phase, not since the submission
+    assert node.sent[-1]["gasPrice"] == signing.gas_pricing.gas_price(node.gasPrice, 100, 200, 151)
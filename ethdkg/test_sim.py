@@ -0,0 +1,17 @@
+from .sim import Simulation
+
+
+def test_simulation_all_honest():
+    sim = Simulation(5, processes=0).run()
+    assert sim.disputed_nodes == set()
+    assert sim.qualified_nodes == [1, 2, 3, 4, 5]
+    assert sim.verify_master_public_key()
+
+
+def test_simulation_invalid_shares_and_recovery():
+    sim = Simulation(7, processes=2, invalid_shares={(1, 2), (1, 3), (4, 5)}, absent_key_shares={2}).run()
+    assert sim.disputed_nodes == {1, 4}
+    assert sim.qualified_nodes == [2, 3, 5, 6, 7]
+    assert sim.nodes[2].decrypted_shares[1] < 0
+    assert sim.nodes[6].decrypted_shares[1] >= 0
+    assert sim.verify_master_public_key()
@@ -0,0 +1,163 @@
+""" Staged pre-validation of the data published by other nodes (share distributions, disputes and key shares).
+
+    Before any expensive processing (decryption, share verification, DLEQ proofs, pairings), the data is passed
+    through a sequence of checks in increasing order of cost:
+
+        1. structure: number of encrypted shares and commitments, known and non-duplicate issuers, ...
+        2. range:     scalars and coordinates within their valid range, no points at infinity
+        3. curve:     points on the elliptic curve (optional)
+
+    Data is rejected by the first failing check, so malformed data never reaches the more expensive checks.
+    The smart contract already ensures that all points it accepts are on the curve, therefore nodes which obtain
+    the data from the contract disable the curve check.
+"""
+
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from py_ecc.optimized_bn128 import b, b2
+
+from .crypto import CURVE_ORDER, FIELD_MODULUS, is_on_curve
+from .crypto import PointG1, PointG2
+
+STRUCTURE = "structure"
+RANGE = "range"
+CURVE = "curve"
+STAGES = [STRUCTURE, RANGE, CURVE]
+
+SHARES = "shares"
+DISPUTE = "dispute"
+KEY_SHARE = "key share"
+
+UINT256_MAX = 2 ** 256 - 1
+
+
+class Validator:
+    def __init__(self, check_curve: bool = True):
+        self.check_curve = check_curve
+        self.accepted = Counter()  # kind -> number of accepted items
+        self.rejected = Counter()  # (kind, stage) -> number of rejected items
+        self.last_error: Optional[str] = None
+
+    def validate_shares(self, node, issuer_idx: int, encrypted_shares: Dict[int, int], commitments: List[PointG1]):
+        def structure():
+            if issuer_idx == node.idx:
+                return "shares issued by this node"
+            if issuer_idx not in node.public_keys:
+                return "unknown issuer"
+            if issuer_idx in node.encrypted_shares:
+                return "duplicate share distribution"
+            if len(encrypted_shares) != node.n - 1:
+                return "invalid number of encrypted shares"
+            if any(i not in encrypted_shares for i in node.nodes if i != issuer_idx):
+                return "invalid set of receivers"
+            if len(commitments) != node.t + 1:
+                return "invalid number of commitments"
+
+        def range_():
+            if not all(_is_uint256(s) for s in encrypted_shares.values()):
+                return "encrypted share out of range"
+            if not all(_is_point_in_range(c) for c in commitments):
+                return "commitment out of range"
+
+        def curve():
+            if not all(is_on_curve(c, b) for c in commitments):
+                return "commitment not on curve"
+
+        return self._validate(SHARES, structure, range_, curve)
+
+    def validate_dispute(
+        self,
+        node,
+        issuer_idx: int,
+        disputer_idx: int,
+        shared_key: PointG1,
+        shared_key_correctness_proof: Tuple[int, int],
+    ):
+        def structure():
+            if issuer_idx not in node.encrypted_shares:
+                return "issuer did not distribute shares"
+            if disputer_idx not in node.public_keys or disputer_idx == issuer_idx:
+                return "invalid disputer"
+            if len(shared_key_correctness_proof) != 2:
+                return "invalid proof"
+
+        def range_():
+            if not _is_point_in_range(shared_key):
+                return "shared key out of range"
+            if not _is_proof_in_range(shared_key_correctness_proof):
+                return "proof out of range"
+
+        def curve():
+            if not is_on_curve(shared_key, b):
+                return "shared key not on curve"
+
+        return self._validate(DISPUTE, structure, range_, curve)
+
+    def validate_key_share(self, node, issuer_idx: int, h1: PointG1, h1_proof: Tuple[int, int], h2: PointG2):
+        def structure():
+            if issuer_idx not in node.qualified_nodes:
+                return "issuer not qualified"
+            if len(h1_proof) != 2:
+                return "invalid proof"
+
+        def range_():
+            if not _is_point_in_range(h1) or not _is_point_in_range(h2):
+                return "key share out of range"
+            if not _is_proof_in_range(h1_proof):
+                return "proof out of range"
+
+        def curve():
+            if not is_on_curve(h1, b) or not is_on_curve(h2, b2):
+                return "key share not on curve"
+
+        return self._validate(KEY_SHARE, structure, range_, curve)
+
+    def validate_eth_points(self, kind: str, points: List[Tuple[int, ...]]) -> bool:
+        """ Range check for points in the format used by the smart contract (affine, integer coordinates).
+            Must be performed before the conversion via ethnode.point_from_eth,
+            as this conversion silently reduces the coordinates modulo the field modulus.
+        """
+        if all(0 <= v < FIELD_MODULUS for p in points for v in p):
+            return True
+        self._reject(kind, RANGE, "coordinate not a field element")
+        return False
+
+    def summary(self) -> List[str]:
+        lines = []
+        for kind in [SHARES, DISPUTE, KEY_SHARE]:
+            rejected = [f"{self.rejected[kind, s]} at {s} check" for s in STAGES if self.rejected[kind, s]]
+            if self.accepted[kind] or rejected:
+                lines.append(f"{kind}: {self.accepted[kind]} accepted, {', '.join(rejected) or 'none'} rejected")
+        return lines
+
+    def _validate(self, kind: str, *checks: Callable[[], Optional[str]]) -> bool:
+        for stage, check in zip(STAGES, checks):
+            if stage == CURVE and not self.check_curve:
+                continue
+            error = check()
+            if error is not None:
+                self._reject(kind, stage, error)
+                return False
+        self.accepted[kind] += 1
+        return True
+
+    def _reject(self, kind: str, stage: str, error: str):
+        self.rejected[kind, stage] += 1
+        self.last_error = f"{kind} rejected at {stage} check: {error}"
+
+
+def _is_uint256(x) -> bool:
+    return isinstance(x, int) and 0 <= x <= UINT256_MAX
+
+
+def _is_proof_in_range(proof: Tuple[int, int]) -> bool:
+    challenge, response = proof
+    return _is_uint256(challenge) and isinstance(response, int) and 0 <= response < CURVE_ORDER
+
+
+def _is_point_in_range(p) -> bool:
+    """ Checks a point in projective coordinates, the coordinates are reduced field elements by construction,
+        but the point must not be the point at infinity (which cannot be represented in the smart contract).
+    """
+    return len(p) == 3 and p[2] != p[2].zero()
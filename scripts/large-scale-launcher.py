@@ -43,7 +43,10 @@ def print_stdout(data):
     return lines
 
 
-def run(n=None):
+def run(n=None, event_index="ethdkg-events.sqlite", rpc_url=None):
+    """ event_index: path of the event index shared by all node processes (None to disable)
+        rpc_url: endpoint used by the node processes, e.g. http://127.0.0.1:7645 for scripts/rpc-proxy.py
+    """
     global N, node_processes, node_states, node_addresses, contract
 
     if n is not None:
@@ -80,6 +83,7 @@ def run(n=None):
                 "--account-index",
                 str(i),
                 "--interactive",
+                *(["--event-index", event_index] if event_index else []),
             ],
             # f"pipenv run python -m ethdkg run {contract_addr} --account-index {i}",
             # shell=True,
@@ -87,6 +91,7 @@ def run(n=None):
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             universal_newlines=True,
+            env=dict(os.environ, ETHDKG_RPC_URL=rpc_url) if rpc_url else None,
         )
         for i in range(N)
     ]
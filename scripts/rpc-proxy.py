@@ -0,0 +1,384 @@
+""" Read-through caching JSON-RPC proxy for running many ETHDKG node processes against a single Ethereum node.
+
+    usage: python3 scripts/rpc-proxy.py [--port 7645] [--upstream http://127.0.0.1:7545] [--confirmations 6]
+    nodes: ETHDKG_RPC_URL=http://127.0.0.1:7645 python3 -m ethdkg run ...
+
+    - identical read requests which are in flight at the same time are forwarded only once
+    - immutable answers are cached: chain id, client version, logs / blocks / transactions / receipts of confirmed
+      blocks
+    - eth_call results are cached until the next block (the state only changes with new blocks)
+    - eth_blockNumber is answered by a head tracker which polls the upstream node,
+      clients subscribing to newHeads via WebSocket (on the same port, as e.g. for ganache) get new blocks pushed
+    - GET /stats reports the hit rates and the upstream load
+"""
+
+import argparse
+import base64
+import collections
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# answers which never change
+IMMUTABLE_METHODS = {
+    "eth_chainId",
+    "net_version",
+    "web3_clientVersion",
+    "eth_getBlockByHash",
+}
+
+# answers which only change with new blocks
+PER_BLOCK_METHODS = {"eth_call", "eth_getCode", "eth_getBalance", "eth_accounts"}
+
+# answers which are immutable once the referenced block is confirmed
+CONFIRMED_METHODS = {"eth_getLogs", "eth_getTransactionByHash", "eth_getTransactionReceipt", "eth_getBlockByNumber"}
+
+# identical requests for these methods are deduplicated while in flight
+READ_METHODS = IMMUTABLE_METHODS | PER_BLOCK_METHODS | CONFIRMED_METHODS | {"eth_gasPrice", "eth_estimateGas"}
+
+# requests which change the state, the head is refreshed immediately afterwards (e.g. ganache mines instantly)
+WRITE_METHODS = {"eth_sendTransaction", "eth_sendRawTransaction", "evm_mine"}
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+args = None
+stats = collections.Counter()  # by category, e.g. "requests", "cache hits", "upstream requests"
+requests_by_method = collections.Counter()
+upstream_requests_by_method = collections.Counter()
+stats_lock = threading.Lock()
+
+
+def count(key, method=None, upstream=False):
+    with stats_lock:
+        stats[key] += 1
+        if method is not None:
+            (upstream_requests_by_method if upstream else requests_by_method)[method] += 1
+
+
+class Head:
+    """ Tracks the latest block number of the upstream node and notifies waiting WebSocket clients.
+    """
+
+    def __init__(self):
+        self.block_number = None
+        self.condition = threading.Condition()
+
+    def refresh(self):
+        block_number = int(upstream.request("eth_blockNumber", []), 16)
+        with self.condition:
+            if self.block_number is None or block_number > self.block_number:
+                self.block_number = block_number
+                self.condition.notify_all()
+        return self.block_number
+
+    def run(self, interval):
+        while True:
+            try:
+                self.refresh()
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(interval)
+
+    def wait_for_new_block(self, block_number, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.block_number > block_number, timeout)
+            return self.block_number
+
+
+class Upstream:
+    def __init__(self, url):
+        self.url = url
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=64)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method, params):
+        """ Returns the result or raises an RpcError with the error response of the upstream node.
+        """
+        count("upstream requests", method, upstream=True)
+        payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        response = self.session.post(self.url, json=payload, timeout=600).json()
+        if "error" in response:
+            raise RpcError(response["error"])
+        return response.get("result")
+
+
+class RpcError(Exception):
+    def __init__(self, error):
+        super().__init__(error)
+        self.error = error
+
+
+class Cache:
+    def __init__(self):
+        self.values = {}
+        self.per_block_keys = collections.defaultdict(list)  # block number -> keys of the PER_BLOCK_METHODS entries
+        self.in_flight = {}  # key -> threading.Event, set as soon as the result is available
+        self.lock = threading.Lock()
+
+    def get(self, method, params):
+        """ Answers the request from the cache, by waiting for an identical request in flight, or from upstream.
+        """
+        key = json.dumps([method, params], sort_keys=True)
+        block_number = head.block_number
+        if method in PER_BLOCK_METHODS:
+            key = f"{block_number}:{key}"
+
+        with self.lock:
+            if key in self.values:
+                count("cache hits")
+                return self.values[key]
+            event = self.in_flight.get(key)
+            if event is None:
+                self.in_flight[key] = threading.Event()
+
+        if event is not None:
+            count("deduplicated requests")
+            event.wait()
+            with self.lock:
+                if key in self.values:
+                    return self.values[key]
+            # the request failed or its result is not cacheable
+            return upstream.request(method, params)
+
+        try:
+            result = upstream.request(method, params)
+            with self.lock:
+                if self.is_cacheable(method, params, result):
+                    self.values[key] = result
+                    if method in PER_BLOCK_METHODS:
+                        self.per_block_keys[block_number].append(key)
+                self.evict()
+            return result
+        finally:
+            with self.lock:
+                self.in_flight.pop(key).set()
+
+    def evict(self):
+        """ Drops the entries of the PER_BLOCK_METHODS for blocks older than the current head (caller holds the lock).
+        """
+        for block_number in [b for b in self.per_block_keys if b < head.block_number]:
+            for key in self.per_block_keys.pop(block_number):
+                self.values.pop(key, None)
+
+    def is_cacheable(self, method, params, result):
+        if method in IMMUTABLE_METHODS or method in PER_BLOCK_METHODS:
+            return result is not None
+        if method not in CONFIRMED_METHODS or result is None:
+            return False
+        confirmed = head.block_number - args.confirmations
+        if method == "eth_getLogs":
+            to_block = params[0].get("toBlock", "latest")
+            return "blockHash" in params[0] or (to_block.startswith("0x") and int(to_block, 16) <= confirmed)
+        # transaction, receipt or block (pending transactions have no block number yet)
+        block_number = result.get("number") if method == "eth_getBlockByNumber" else result.get("blockNumber")
+        return block_number is not None and int(block_number, 16) <= confirmed
+
+
+def handle_request(request):
+    method, params = request.get("method"), request.get("params", [])
+    count("requests", method)
+    response = {"jsonrpc": "2.0", "id": request.get("id")}
+    try:
+        if method == "eth_blockNumber":
+            count("cache hits")
+            response["result"] = hex(head.block_number)
+        elif method in READ_METHODS:
+            response["result"] = cache.get(method, params)
+        else:
+            response["result"] = upstream.request(method, params)
+            if method in WRITE_METHODS:
+                head.refresh()
+    except RpcError as e:
+        response["error"] = e.error
+    except requests.exceptions.RequestException as e:
+        count("upstream errors")
+        response["error"] = {"code": -32603, "message": f"upstream request failed: {e}"}
+    return response
+
+
+def get_stats():
+    with stats_lock:
+        num_requests = stats["requests"]
+        answered_locally = stats["cache hits"] + stats["deduplicated requests"]
+        return {
+            "requests": num_requests,
+            "cache hits": stats["cache hits"],
+            "deduplicated requests": stats["deduplicated requests"],
+            "hit rate": answered_locally / num_requests if num_requests else None,
+            "upstream requests": stats["upstream requests"],
+            "upstream errors": stats["upstream errors"],
+            "websocket clients": stats["websocket clients"] - stats["websocket clients closed"],
+            "block number": head.block_number,
+            "requests by method": dict(requests_by_method.most_common()),
+            "upstream requests by method": dict(upstream_requests_by_method.most_common()),
+        }
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive connections
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if isinstance(request, list):
+            response = [handle_request(r) for r in request]
+        else:
+            response = handle_request(request)
+        self.send_json(response)
+
+    def do_GET(self):
+        if self.headers.get("Upgrade", "").lower() == "websocket":
+            self.handle_websocket()
+        elif self.path == "/stats":
+            self.send_json(get_stats())
+        else:
+            self.send_error(404)
+
+    def send_json(self, data):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_websocket(self):
+        """ Minimal WebSocket endpoint supporting newHeads subscriptions (as used by ethdkg/blocks.py).
+        """
+        accept = hashlib.sha1((self.headers["Sec-WebSocket-Key"] + WEBSOCKET_GUID).encode()).digest()
+        self.send_response(101)
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", base64.b64encode(accept).decode())
+        self.end_headers()
+        self.close_connection = True
+        count("websocket clients")
+
+        ws = WebSocket(self.connection)
+        threading.Thread(target=ws.receive_loop, daemon=True).start()
+        try:
+            block_number = None
+            while not ws.closed:
+                if ws.subscription_id is None:
+                    time.sleep(0.05)
+                    continue
+                current = head.wait_for_new_block(block_number if block_number is not None else -1, timeout=1.0)
+                if block_number is None or current > block_number:
+                    block_number = current
+                    ws.send_json(
+                        {
+                            "jsonrpc": "2.0",
+                            "method": "eth_subscription",
+                            "params": {"subscription": ws.subscription_id, "result": {"number": hex(block_number)}},
+                        }
+                    )
+        except OSError:
+            pass
+        finally:
+            count("websocket clients closed")
+
+
+class WebSocket:
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.closed = False
+        self.subscription_id = None
+        self.lock = threading.Lock()
+
+    def receive_loop(self):
+        try:
+            while not self.closed:
+                opcode, payload = self.receive_frame()
+                if opcode == 0x8:  # close
+                    break
+                elif opcode == 0x9:  # ping
+                    self.send_frame(0xA, payload)
+                elif opcode in (0x1, 0x2):
+                    self.handle_message(json.loads(payload))
+        except (OSError, ValueError):
+            pass
+        self.closed = True
+
+    def handle_message(self, request):
+        if request.get("method") == "eth_subscribe" and request.get("params") == ["newHeads"]:
+            self.send_json({"jsonrpc": "2.0", "id": request.get("id"), "result": "0x1"})
+            self.subscription_id = "0x1"
+        else:
+            self.send_json(handle_request(request))
+
+    def receive_frame(self):
+        b0, b1 = self.receive_exactly(2)
+        length = b1 & 0x7F
+        if length == 126:
+            length, = struct.unpack(">H", self.receive_exactly(2))
+        elif length == 127:
+            length, = struct.unpack(">Q", self.receive_exactly(8))
+        mask = self.receive_exactly(4) if b1 & 0x80 else bytes(4)
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(self.receive_exactly(length)))
+        return b0 & 0x0F, payload
+
+    def receive_exactly(self, n):
+        data = b""
+        while len(data) < n:
+            chunk = self.sock.recv(n - len(data))
+            if not chunk:
+                raise OSError("connection closed")
+            data += chunk
+        return data
+
+    def send_json(self, data):
+        self.send_frame(0x1, json.dumps(data).encode())
+
+    def send_frame(self, opcode, payload):
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        elif len(payload) < 2 ** 16:
+            header += bytes([126]) + struct.pack(">H", len(payload))
+        else:
+            header += bytes([127]) + struct.pack(">Q", len(payload))
+        with self.lock:
+            self.sock.sendall(header + payload)
+
+
+def main():
+    global args, upstream, head, cache
+    parser = argparse.ArgumentParser(description="read-through caching JSON-RPC proxy")
+    parser.add_argument("--port", type=int, default=7645, help="port of the proxy (default: 7645)")
+    parser.add_argument("--upstream", type=str, default="http://127.0.0.1:7545", help="url of the Ethereum node")
+    parser.add_argument(
+        "--confirmations", type=int, default=6, help="blocks after which logs and receipts are considered immutable"
+    )
+    parser.add_argument("--head-polling-interval", type=float, default=0.2, help="in seconds (default: 0.2)")
+    args = parser.parse_args()
+
+    upstream = Upstream(args.upstream)
+    head = Head()
+    cache = Cache()
+    head.refresh()
+    threading.Thread(target=head.run, args=(args.head_polling_interval,), daemon=True).start()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    server.daemon_threads = True
+    print(f"proxy for {args.upstream} listening on http://127.0.0.1:{args.port} (stats: /stats)")
+    print(f"usage: ETHDKG_RPC_URL=http://127.0.0.1:{args.port} python3 -m ethdkg run ...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(json.dumps(get_stats(), indent=4))
+
+
+upstream: Upstream
+head: Head
+cache: Cache
+
+if __name__ == "__main__":
+    main()